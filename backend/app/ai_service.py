@@ -1,11 +1,26 @@
-import google.generativeai as genai
+import asyncio
+import hashlib
+import math
 import os
+import re
 import logging
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from difflib import SequenceMatcher
 from datetime import datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
-from app import models
+from app import free_busy, models, rollups, syllabus
+from app.cache import create_cache
+from app.circuit_breaker import CircuitBreaker, CircuitOpen
+from app.llm_providers import INSIGHTS, QUIZ, SCHEDULE, LLMProvider, get_provider
+from app.metrics import LatencyRecorder
+from app.singleflight import SingleFlight, SingleFlightTimeout
+from app.schedule_optimizer import fit_sessions, plan_study_sessions
 from app.schemas_advanced import Question
 import json
 
@@ -13,66 +28,320 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+# How long a request waits on another request's in-flight insight generation
+AI_INSIGHTS_WAIT_SECONDS = float(os.getenv("AI_INSIGHTS_WAIT_SECONDS", "20"))
+# Deadline for one LLM call, including time spent waiting for a free slot
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+# Upstream LLM calls allowed in flight at once per worker
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Circuit breaker: stop calling the provider while too many recent calls fail
+# or miss the latency target, and answer with fallbacks until a probe succeeds
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "50"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+LLM_SLOW_CALL_SECONDS = float(os.getenv("LLM_SLOW_CALL_SECONDS", "10"))
+LLM_BREAKER_SLOW_RATE = float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5"))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
 
-# Simple in-memory cache (in production, use Redis or similar)
-ai_cache: Dict[str, Dict] = {}
+
+class LLMTimeout(Exception):
+    """An LLM call did not finish before its deadline"""
+
+
+class _ProcessSlots:
+    """Counting semaphore shared by every event loop in the process.
+
+    Request handling and background jobs run on different loops, and an
+    asyncio.Semaphore only works within one, so waiters park a future on
+    their own loop and release() hands the slot straight to the oldest one.
+    """
+
+    def __init__(self, value: int):
+        self._lock = threading.Lock()
+        self._free = value
+        self._waiters: "deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]" = deque()
+
+    async def acquire(self, timeout: float) -> None:
+        """Take a slot, or raise asyncio.TimeoutError after ``timeout`` seconds"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter[1]), timeout)
+        except BaseException:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted:
+                # release() handed this waiter a slot it will never use
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(_grant, future)
+                    return
+                except RuntimeError:
+                    continue  # that loop has closed; try the next waiter
+            self._free += 1
+
+
+def _grant(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMClient:
+    """Async LLM access with a deadline per call and a cap on concurrent calls.
+
+    Calls beyond ``max_concurrency`` queue for a slot. The cap covers every
+    event loop in the process (requests and background jobs), and the queue
+    wait counts against the call's deadline so a backlog cannot hold
+    requests forever.
+    While the circuit breaker is open, calls fail at once with CircuitOpen
+    so callers go straight to their fallbacks.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[LLMProvider] = None,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout_seconds: float = LLM_TIMEOUT_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.provider = provider or get_provider()
+        self.breaker = breaker or CircuitBreaker(
+            window=LLM_BREAKER_WINDOW,
+            min_calls=LLM_BREAKER_MIN_CALLS,
+            error_rate=LLM_BREAKER_ERROR_RATE,
+            slow_call_ms=LLM_SLOW_CALL_SECONDS * 1000,
+            slow_rate=LLM_BREAKER_SLOW_RATE,
+            open_seconds=LLM_BREAKER_OPEN_SECONDS,
+        )
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout_seconds = timeout_seconds
+        self._slots = _ProcessSlots(self.max_concurrency)
+        self.queue_latency = LatencyRecorder()
+        self.call_latency = LatencyRecorder()
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether the provider is configured; callers use their fallbacks if not"""
+        return self.provider.available
+
+    async def _call(self, prompt: str, kind: Optional[str]) -> str:
+        return await self.provider.complete(prompt, kind)
+
+    async def generate(self, prompt: str, kind: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """Return the model's text for ``prompt`` or raise LLMTimeout/CircuitOpen"""
+        token = self.breaker.allow()
+        if token is None:
+            raise CircuitOpen(f"{self.provider.name} circuit is open")
+        timeout = self.timeout_seconds if timeout is None else timeout
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire(timeout)
+        except asyncio.TimeoutError:
+            # Local backlog, not an upstream failure
+            self.breaker.release(token)
+            self.timeouts += 1
+            raise LLMTimeout(f"No LLM slot became free within {timeout}s")
+        except BaseException:
+            self.breaker.release(token)
+            raise
+        finally:
+            self.waiting -= 1
+
+        started_at = time.monotonic()
+        self.queue_latency.record((started_at - queued_at) * 1000)
+        self.in_flight += 1
+        try:
+            text = await asyncio.wait_for(self._call(prompt, kind), max(0.0, timeout - (started_at - queued_at)))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.breaker.record(token, True, (time.monotonic() - started_at) * 1000)
+            raise LLMTimeout(f"LLM call exceeded its {timeout}s deadline")
+        except asyncio.CancelledError:
+            self.breaker.release(token)
+            raise
+        except Exception:
+            self.failed += 1
+            self.breaker.record(token, True, (time.monotonic() - started_at) * 1000)
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+        elapsed_ms = (time.monotonic() - started_at) * 1000
+        self.completed += 1
+        self.call_latency.record(elapsed_ms)
+        self.breaker.record(token, False, elapsed_ms)
+        return text
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider.name,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "queue_latency": self.queue_latency.summary(),
+            "call_latency": self.call_latency.summary(),
+            "circuit": self.breaker.stats(),
+        }
+
+
+llm = LLMClient()
+
+# Insights keyed by a fingerprint of the user's study stats; AI_CACHE_BACKEND=sqlite
+# shares them across workers and keeps them across restarts
+AI_INSIGHTS_TTL_SECONDS = float(os.getenv("AI_INSIGHTS_TTL_SECONDS", str(30 * 86400)))
+# Each fingerprint bucket spans this many times the values of the one below it,
+# so small changes to large counts don't trigger a new generation
+AI_INSIGHTS_BUCKET_GROWTH = float(os.getenv("AI_INSIGHTS_BUCKET_GROWTH", "1.25"))
+ai_cache = create_cache("insights", ttl_seconds=AI_INSIGHTS_TTL_SECONDS)
+
+# Generated questions keyed by the content that went into the prompt, so
+# students uploading the same syllabus share one generation
+QUIZ_CACHE_MAX_ENTRIES = int(os.getenv("QUIZ_CACHE_MAX_ENTRIES", "5000"))
+QUIZ_CACHE_TTL_SECONDS = float(os.getenv("QUIZ_CACHE_TTL_SECONDS", str(30 * 86400)))
+quiz_cache = create_cache("quizzes", max_entries=QUIZ_CACHE_MAX_ENTRIES, ttl_seconds=QUIZ_CACHE_TTL_SECONDS)
+
+# Larger quizzes are generated as concurrent batches of this many questions
+QUIZ_BATCH_SIZE = int(os.getenv("QUIZ_BATCH_SIZE", "5"))
+# Batches one quiz runs at once; kept below LLM_MAX_CONCURRENCY so other requests still get slots
+QUIZ_FANOUT_CONCURRENCY = max(1, min(
+    int(os.getenv("QUIZ_FANOUT_CONCURRENCY", str(LLM_MAX_CONCURRENCY // 2))), LLM_MAX_CONCURRENCY - 1
+))
+# Questions at least this similar (0-1) to an earlier one are dropped
+QUIZ_DUPLICATE_SIMILARITY = float(os.getenv("QUIZ_DUPLICATE_SIMILARITY", "0.9"))
+
+# "local" plans schedules with app.schedule_optimizer; "llm" asks the LLM first
+SCHEDULE_ENGINE = os.getenv("SCHEDULE_ENGINE", "local")
+# With SCHEDULE_ENGINE=llm each class is its own concurrent LLM call
+SCHEDULE_FANOUT_CONCURRENCY = int(os.getenv("SCHEDULE_FANOUT_CONCURRENCY", "4"))
+# Classes still without an answer after this long use the local plan
+SCHEDULE_CLASS_TIMEOUT_SECONDS = float(os.getenv("SCHEDULE_CLASS_TIMEOUT_SECONDS", "20"))
+# Per-class answers are reused while the prompt (class, settings, date) is unchanged
+SCHEDULE_CACHE_TTL_SECONDS = float(os.getenv("SCHEDULE_CACHE_TTL_SECONDS", "86400"))
+schedule_cache = create_cache("schedules", ttl_seconds=SCHEDULE_CACHE_TTL_SECONDS)
+
+# Concurrent requests for the same user and study profile share one generation
+insight_flights = SingleFlight()
+
+FALLBACK_INSIGHTS = {
+    "summary": "Keep up the great work! Your study journey is progressing well.",
+    "focus_area": "Consistency",
+    "daily_tip": "Try to maintain a regular study schedule for better results."
+}
 
 
 def get_user_study_data(db: Session, user_id: int) -> Dict:
     """Aggregate user's study data for AI insights"""
-    tasks = db.query(models.Task).filter(models.Task.user_id == user_id).all()
-    pomodoros = db.query(models.Pomodoro).filter(
-        models.Pomodoro.user_id == user_id,
-        models.Pomodoro.completed == True
-    ).all()
-    notes = db.query(models.Note).filter(models.Note.user_id == user_id).all()
-
-    completed_tasks = [t for t in tasks if t.completed]
-    active_tasks = [t for t in tasks if not t.completed]
-    
-    recent_pomodoros = [p for p in pomodoros if p.created_at and 
-                       (datetime.utcnow() - p.created_at.replace(tzinfo=None)).days <= 7]
+    # Counted in SQL so neither row counts nor note sizes reach Python
+    completed = models.Task.completed.is_(True)
+    notes_count = (
+        select(func.count(models.Note.id)).where(models.Note.user_id == user_id).scalar_subquery()
+    )
+    total_tasks, completed_tasks, high_priority_tasks, notes = db.execute(
+        select(
+            func.count(models.Task.id),
+            func.coalesce(func.sum(case((completed, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((~completed & (models.Task.priority == "High"), 1), else_=0)), 0),
+            notes_count,
+        ).where(models.Task.user_id == user_id)
+    ).one()
     
-    total_focus_minutes = sum(p.duration_minutes for p in recent_pomodoros)
+    # Pomodoro counts come from the hourly rollups; "last 7 days" means any
+    # session less than 8 whole days old, at hour granularity
+    total_pomodoros, _ = rollups.focus_totals(db, user_id)
+    recent_pomodoros, total_focus_minutes = rollups.focus_totals(
+        db, user_id, since=datetime.utcnow() - timedelta(days=8)
+    )
     
     return {
-        "total_tasks": len(tasks),
-        "completed_tasks": len(completed_tasks),
-        "active_tasks": len(active_tasks),
-        "total_pomodoros": len(pomodoros),
-        "recent_pomodoros": len(recent_pomodoros),
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "active_tasks": total_tasks - completed_tasks,
+        "total_pomodoros": total_pomodoros,
+        "recent_pomodoros": recent_pomodoros,
         "total_focus_minutes": total_focus_minutes,
-        "notes_count": len(notes),
-        "high_priority_tasks": len([t for t in active_tasks if t.priority == "High"]),
+        "notes_count": notes,
+        "high_priority_tasks": high_priority_tasks,
     }
 
 
-def generate_ai_insights(db: Session, user_id: int) -> Dict[str, str]:
+def _bucket(value: float, growth: float = AI_INSIGHTS_BUCKET_GROWTH) -> int:
+    """Geometric bucket of a non-negative stat; 0 only for 0"""
+    if value <= 0:
+        return 0
+    return 1 + int(math.log(value, growth))
+
+
+def insights_fingerprint(study_data: Dict) -> str:
+    """Short hash of the bucketed study stats; it changes only when the
+    profile shifts enough to deserve new insights"""
+    buckets = {key: _bucket(value) for key, value in sorted(study_data.items())}
+    return hashlib.sha256(json.dumps(buckets, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def insights_cache_key(user_id: int, study_data: Dict) -> str:
+    return f"{user_id}:{insights_fingerprint(study_data)}"
+
+
+async def generate_ai_insights(db: Session, user_id: int) -> Dict[str, str]:
     """Generate AI insights using Gemini"""
-    cache_key = f"{user_id}_{datetime.utcnow().date()}"
+    study_data = await run_in_threadpool(get_user_study_data, db, user_id)
+    return await insights_for_study_data(user_id, study_data)
+
+
+async def insights_for_study_data(user_id: int, study_data: Dict) -> Dict[str, str]:
+    """Cached insights for ``study_data``, generating them if needed"""
+    cache_key = insights_cache_key(user_id, study_data)
     
     # Check cache
-    if cache_key in ai_cache:
-        cached = ai_cache[cache_key]
-        if (datetime.utcnow() - cached["timestamp"]).total_seconds() < 86400:  # 24 hours
-            return cached["data"]
+    cached = ai_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    study_data = get_user_study_data(db, user_id)
+    try:
+        return await insight_flights.do(
+            cache_key, lambda: _generate_ai_insights(study_data, cache_key), timeout=AI_INSIGHTS_WAIT_SECONDS
+        )
+    except SingleFlightTimeout:
+        logger.warning(f"Timed out waiting for in-flight insights for user {user_id}")
+        return dict(FALLBACK_INSIGHTS)
+
+
+async def _generate_ai_insights(study_data: Dict, cache_key: str) -> Dict[str, str]:
+    # A generation that finished just before this one started has cached its result
+    cached = ai_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    if not GEMINI_API_KEY:
+    if not llm.available:
         # Fallback response if API key not configured
-        return {
-            "summary": "Keep up the great work! Your study journey is progressing well.",
-            "focus_area": "Consistency",
-            "daily_tip": "Try to maintain a regular study schedule for better results."
-        }
+        return dict(FALLBACK_INSIGHTS)
     
     try:
-        model = genai.GenerativeModel('gemini-pro')
-        
         prompt = f"""Based on the following study data, provide personalized insights:
         
         Total Tasks: {study_data['total_tasks']}
@@ -92,8 +361,7 @@ def generate_ai_insights(db: Session, user_id: int) -> Dict[str, str]:
         Be encouraging and specific. If the user has few tasks, encourage them to add more.
         Format your response as valid JSON only, no markdown."""
         
-        response = model.generate_content(prompt)
-        text = response.text.strip()
+        text = (await llm.generate(prompt, INSIGHTS)).strip()
         
         # Clean up response if it has markdown code blocks
         if "```json" in text:
@@ -101,7 +369,6 @@ def generate_ai_insights(db: Session, user_id: int) -> Dict[str, str]:
         elif "```" in text:
             text = text.split("```")[1].split("```")[0].strip()
         
-        import json
         insights = json.loads(text)
         
         # Validate and set defaults
@@ -112,53 +379,112 @@ def generate_ai_insights(db: Session, user_id: int) -> Dict[str, str]:
         }
         
         # Cache the result
-        ai_cache[cache_key] = {
-            "data": result,
-            "timestamp": datetime.utcnow()
-        }
+        ai_cache.set(cache_key, result)
         
         return result
         
     except Exception as e:
         # Fallback response on error
-        return {
-            "summary": "Keep up the great work! Your study journey is progressing well.",
-            "focus_area": "Consistency",
-            "daily_tip": "Try to maintain a regular study schedule for better results."
-        }
+        return dict(FALLBACK_INSIGHTS)
+
 
+def _normalize_text(text: Optional[str]) -> str:
+    return " ".join((text or "").split()).casefold()
 
-def generate_quiz_from_syllabus(
+
+def quiz_cache_key(
     syllabus_content: str,
     class_name: str,
-    num_questions: int = 5,
+    num_questions: int,
     survey_responses: Optional[Dict] = None
+) -> str:
+    """Content address of a quiz generation: whitespace and case in the text don't matter"""
+    material = json.dumps({
+        "syllabus": _normalize_text(syllabus_content),
+        "class_name": _normalize_text(class_name),
+        "num_questions": num_questions,
+        "survey": survey_responses or None,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def split_syllabus(syllabus_content: str, parts: int) -> List[str]:
+    """Split a syllabus into ``parts`` contiguous sections of similar length.
+
+    Lines are never broken up; a syllabus with fewer lines than ``parts``
+    repeats its sections.
+    """
+    lines = [line.strip() for line in (syllabus_content or "").splitlines() if line.strip()]
+    if not lines:
+        return [syllabus_content or ""] * parts
+    target = sum(len(line) for line in lines) / parts
+    sections, current, size = [], [], 0
+    for i, line in enumerate(lines):
+        current.append(line)
+        size += len(line)
+        lines_left = len(lines) - i - 1
+        sections_left = parts - len(sections) - 1
+        if size >= target and sections_left > 0 and lines_left >= sections_left:
+            sections.append("\n".join(current))
+            current, size = [], 0
+    if current:
+        sections.append("\n".join(current))
+    return [sections[i % len(sections)] for i in range(parts)]
+
+
+def _question_signature(question: Question) -> Tuple[str, ...]:
+    return tuple(re.sub(r"[^\w\s]", " ", question.question.casefold()).split())
+
+
+def dedupe_questions(questions: List[Question], threshold: float = QUIZ_DUPLICATE_SIMILARITY) -> List[Question]:
+    """Drop questions whose wording nearly matches an earlier question's (word-level similarity)"""
+    kept, signatures = [], []
+    for question in questions:
+        signature = _question_signature(question)
+        if any(SequenceMatcher(None, signature, seen).ratio() >= threshold for seen in signatures):
+            continue
+        kept.append(question)
+        signatures.append(signature)
+    return kept
+
+
+def _fallback_questions(class_name: str, count: int, start: int = 0, sample: bool = False) -> List[Question]:
+    """Distinct placeholder questions used when generation is unavailable or falls short"""
+    return [
+        Question(
+            question=(
+                f"Sample question {start + i + 1} about {class_name}?" if sample
+                else f"Key concept question {start + i + 1} about {class_name}?"
+            ),
+            options=["Option A", "Option B", "Option C", "Option D"],
+            correct_answer=0,
+            explanation="This is a sample question." if sample else "Generated question based on syllabus."
+        )
+        for i in range(count)
+    ]
+
+
+async def _request_questions(
+    syllabus_content: str,
+    class_name: str,
+    num_questions: int,
+    survey_context: str = "",
+    part: Optional[Tuple[int, int]] = None,
+    avoid: Optional[List[str]] = None
 ) -> List[Question]:
-    """Generate quiz questions from syllabus content"""
-    if not GEMINI_API_KEY:
-        # Return sample questions if API key not configured
-        return [
-            Question(
-                question=f"Sample question about {class_name}?",
-                options=["Option A", "Option B", "Option C", "Option D"],
-                correct_answer=0,
-                explanation="This is a sample question."
-            )
-        ] * num_questions
+    section_note = ""
+    if part:
+        section_note = f"\nThis is part {part[0]} of {part[1]} of the syllabus. Ask only about this part."
+    avoid_note = ""
+    if avoid:
+        avoid_note = "\nDo not repeat or rephrase these existing questions:\n" + "\n".join(f"- {q}" for q in avoid)
     
-    try:
-        model = genai.GenerativeModel('gemini-pro')
-        
-        survey_context = ""
-        if survey_responses:
-            survey_context = f"\n\nUser study preferences: {json.dumps(survey_responses)}"
-        
-        prompt = f"""Based on the following class syllabus, generate {num_questions} multiple-choice quiz questions.
+    prompt = f"""Based on the following class syllabus, generate {num_questions} multiple-choice quiz questions.
 
 Class: {class_name}
 Syllabus Content:
 {syllabus_content}
-{survey_context}
+{survey_context}{section_note}{avoid_note}
 
 For each question, provide:
 1. A clear, specific question
@@ -177,140 +503,176 @@ Format your response as valid JSON array:
 ]
 
 Generate exactly {num_questions} questions covering key concepts from the syllabus."""
-        
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        
-        # Clean up response if it has markdown code blocks
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
-        
-        questions_data = json.loads(text)
-        questions = [Question(**q) for q in questions_data]
-        
-        return questions[:num_questions]
-        
-    except Exception as e:
-        # Fallback questions
-        return [
-            Question(
-                question=f"Key concept question about {class_name}?",
-                options=["Option A", "Option B", "Option C", "Option D"],
-                correct_answer=0,
-                explanation="Generated question based on syllabus."
-            )
-        ] * num_questions
+    
+    text = (await llm.generate(prompt, QUIZ)).strip()
+    
+    # Clean up response if it has markdown code blocks
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+    
+    questions_data = json.loads(text)
+    return [Question(**q) for q in questions_data][:num_questions]
 
 
-def generate_study_schedule(
-    classes: List[models.Class],
-    user_settings: Optional[models.UserSettings],
-    existing_tasks: List[models.Task],
-    existing_pomodoros: List[models.Pomodoro]
-) -> List[Dict]:
-    """Generate optimal study schedule recommendations"""
+def _quiz_sections(chunks: List[Dict], batches: int) -> List[str]:
+    """Token-budgeted syllabus text for each batch of a quiz"""
+    if batches == 1:
+        return [syllabus.select_chunks(chunks)]
+    if len(chunks) >= batches:
+        return [syllabus.select_chunks(group) for group in syllabus.partition_chunks(chunks, batches)]
+    # Too few indexed sections to go around; split the selected text by line instead
+    return split_syllabus(syllabus.select_chunks(chunks), batches)
+
+
+async def generate_quiz_from_syllabus(
+    syllabus_content: str,
+    class_name: str,
+    num_questions: int = 5,
+    survey_responses: Optional[Dict] = None,
+    chunks: Optional[List[Dict]] = None
+) -> List[Question]:
+    """Generate quiz questions from syllabus content.
+
+    Prompts carry only the syllabus sections that fit SYLLABUS_PROMPT_TOKENS,
+    taken from ``chunks`` (see app.syllabus.load_chunks) or chunked here.
+    Requests larger than QUIZ_BATCH_SIZE are split into concurrent batches,
+    each over its own section of the syllabus, and merged without
+    near-duplicates. Any shortfall is topped up once, then filled with
+    placeholder questions.
+    """
+    if not llm.available:
+        # Return sample questions if API key not configured
+        return _fallback_questions(class_name, num_questions, sample=True)
     
-    # Generate fallback recommendations if AI is not available
-    def generate_fallback_recommendations():
-        recommendations = []
-        now = datetime.utcnow()
-        
-        # Get preferred times from settings if available
-        preferred_times = ["09:00", "14:00", "19:00"]  # Default
-        if user_settings and user_settings.preferred_study_times:
-            try:
-                preferred_times = json.loads(user_settings.preferred_study_times)
-            except:
-                pass
-        
-        # Get preferred days
-        preferred_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-        if user_settings and user_settings.preferred_study_days:
-            try:
-                preferred_days = json.loads(user_settings.preferred_study_days)
-            except:
-                pass
-        
-        # Generate recommendations for each class
-        for cls in classes:
-            class_name = cls.name or cls.subject or "Study Session"
-            
-            # Create 2-3 recommendations per class
-            for i, time_str in enumerate(preferred_times[:2]):  # 2 recommendations per class
-                try:
-                    hour, minute = map(int, time_str.split(":"))
-                    # Schedule for tomorrow + i days
-                    recommended_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    recommended_time = recommended_time + timedelta(days=i+1)
-                    
-                    recommendations.append({
-                        "subject": class_name,
-                        "recommended_time": recommended_time.isoformat(),
-                        "duration_minutes": 60,
-                        "priority": "High" if i == 0 else "Medium",
-                        "reasoning": f"Recommended study time based on your preferences. Optimal time for {class_name}."
-                    })
-                except Exception as e:
-                    logger.warning(f"Error creating fallback recommendation: {e}")
-                    continue
-        
-        return recommendations
+    cache_key = quiz_cache_key(syllabus_content, class_name, num_questions, survey_responses)
+    cached = quiz_cache.get(cache_key)
+    if cached is not None:
+        return [Question(**q) for q in cached]
     
-    if not GEMINI_API_KEY:
-        logger.info("GEMINI_API_KEY not set, using fallback recommendations")
-        return generate_fallback_recommendations()
+    survey_context = ""
+    if survey_responses:
+        survey_context = f"\n\nUser study preferences: {json.dumps(survey_responses)}"
     
-    try:
-        model = genai.GenerativeModel('gemini-pro')
-        
-        classes_info = []
-        for cls in classes:
-            schedule_data = None
-            if cls.schedule:
-                try:
-                    schedule_data = json.loads(cls.schedule)
-                except:
-                    pass
-            
-            classes_info.append({
-                "name": cls.name or "Unnamed Class",
-                "subject": cls.subject or cls.name or "General",
-                "syllabus_preview": cls.syllabus_content[:200] if cls.syllabus_content else None,
-                "schedule": schedule_data
-            })
-        
-        settings_info = {}
-        if user_settings:
-            if user_settings.preferred_study_times:
-                try:
-                    settings_info["preferred_times"] = json.loads(user_settings.preferred_study_times)
-                except:
-                    pass
-            if user_settings.preferred_study_days:
-                try:
-                    settings_info["preferred_days"] = json.loads(user_settings.preferred_study_days)
-                except:
-                    pass
-            if user_settings.focus_habits:
+    batches = max(1, math.ceil(num_questions / QUIZ_BATCH_SIZE))
+    sizes = [num_questions // batches + (1 if i < num_questions % batches else 0) for i in range(batches)]
+    if chunks is None:
+        chunks = syllabus.chunk_syllabus(syllabus_content)
+    sections = _quiz_sections(chunks, batches)
+    # Cap this request's share of the LLM slots so one big quiz can't take them all
+    fanout = asyncio.Semaphore(QUIZ_FANOUT_CONCURRENCY)
+    
+    async def batch(i: int) -> List[Question]:
+        async with fanout:
+            part = (i + 1, batches) if batches > 1 else None
+            return await _request_questions(sections[i], class_name, sizes[i], survey_context, part)
+    
+    results = await asyncio.gather(*(batch(i) for i in range(batches)), return_exceptions=True)
+    questions = []
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Quiz batch for {class_name} failed: {result}")
+            continue
+        questions.extend(result)
+    questions = dedupe_questions(questions)[:num_questions]
+    
+    shortfall = num_questions - len(questions)
+    if shortfall and len(questions) > 0:
+        try:
+            extra = await _request_questions(
+                syllabus.select_chunks(chunks), class_name, shortfall, survey_context,
+                avoid=[q.question for q in questions]
+            )
+            questions = dedupe_questions(questions + extra)[:num_questions]
+        except Exception as e:
+            logger.warning(f"Quiz top-up for {class_name} failed: {e}")
+    
+    # Only complete sets are worth serving to the next student
+    if len(questions) == num_questions:
+        quiz_cache.set(cache_key, [q.dict() for q in questions])
+    
+    return questions + _fallback_questions(class_name, num_questions - len(questions), start=len(questions))
+
+
+def _settings_info(user_settings: Optional[models.UserSettings]) -> Dict:
+    settings_info = {}
+    if user_settings:
+        for key, value in (
+            ("preferred_times", user_settings.preferred_study_times),
+            ("preferred_days", user_settings.preferred_study_days),
+            ("focus_habits", user_settings.focus_habits),
+        ):
+            if value:
                 try:
-                    settings_info["focus_habits"] = json.loads(user_settings.focus_habits)
-                except:
+                    settings_info[key] = json.loads(value)
+                except (TypeError, ValueError):
                     pass
-        
-        prompt = f"""Analyze the following information and recommend optimal study times for each class.
+    return settings_info
+
 
-Classes:
-{json.dumps(classes_info, indent=2)}
+def _meetings_info(cls: models.Class) -> List[str]:
+    return [
+        f"{free_busy.WEEKDAYS[m.weekday].capitalize()} {m.start_time.strftime('%H:%M')}-{m.end_time.strftime('%H:%M')}"
+        for m in cls.meetings
+    ]
+
+
+def _parse_json_array(text: str) -> List:
+    text = text.strip()
+    # Clean up markdown code blocks
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+    
+    # Try to extract JSON if there's extra text
+    start_idx = text.find('[')
+    end_idx = text.rfind(']') + 1
+    if start_idx >= 0 and end_idx > start_idx:
+        text = text[start_idx:end_idx]
+    
+    parsed = json.loads(text)
+    if not isinstance(parsed, list):
+        raise ValueError("Expected a JSON array")
+    return parsed
+
+
+async def _class_schedule(
+    cls: models.Class,
+    classes: List[models.Class],
+    settings_info: Dict,
+    syllabus_topics: Dict,
+    task_count: int,
+    pomodoro_count: int,
+    deadline: float,
+) -> List[Dict]:
+    """LLM recommendations for one class, cached by prompt; raises if none are usable"""
+    class_info = {
+        "name": cls.name or "Unnamed Class",
+        "subject": cls.subject or cls.name or "General",
+        "syllabus_topics": syllabus_topics.get(cls.id),
+        "meetings": _meetings_info(cls),
+    }
+    # Other classes' meetings are busy time for this one
+    busy = sorted({slot for other in classes if other is not cls for slot in _meetings_info(other)})
+    
+    prompt = f"""Analyze the following information and recommend optimal study times for this class.
+
+Today is {datetime.utcnow().strftime('%A %Y-%m-%d')}.
+
+Class:
+{json.dumps(class_info, indent=2)}
+
+Other classes meet (do not overlap these): {', '.join(busy) or 'none'}
 
 User Preferences:
 {json.dumps(settings_info, indent=2)}
 
-Existing Tasks: {len(existing_tasks)}
-Existing Pomodoro Sessions: {len(existing_pomodoros)}
+Existing Tasks: {task_count}
+Existing Pomodoro Sessions: {pomodoro_count}
 
-For each class, recommend 2-3 optimal study times. Consider:
+Recommend 2-3 optimal study times over the next week. Consider:
 1. User's preferred study times and days
 2. Class difficulty and workload
 3. Spacing between study sessions
@@ -328,40 +690,86 @@ Format as JSON array:
 
 Important: 
 - Use ISO format for recommended_time (YYYY-MM-DDTHH:MM:SS)
-- Provide 2-3 recommendations per class
 - Return ONLY valid JSON, no markdown or extra text"""
-        
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        
-        # Clean up markdown code blocks
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
-        
-        # Try to extract JSON if there's extra text
-        start_idx = text.find('[')
-        end_idx = text.rfind(']') + 1
-        if start_idx >= 0 and end_idx > start_idx:
-            text = text[start_idx:end_idx]
-        
-        recommendations = json.loads(text)
-        
-        # Validate recommendations have required fields
-        validated = []
-        for rec in recommendations:
-            if isinstance(rec, dict) and "subject" in rec and "recommended_time" in rec:
-                validated.append(rec)
-        
-        logger.info(f"Generated {len(validated)} schedule recommendations")
-        return validated
-        
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse AI response as JSON: {e}")
-        logger.debug(f"Response text: {text[:500] if 'text' in locals() else 'N/A'}")
-        return generate_fallback_recommendations()
-    except Exception as e:
-        logger.error(f"Error generating study schedule: {e}", exc_info=True)
-        return generate_fallback_recommendations()
+    
+    cache_key = hashlib.sha256(prompt.encode()).hexdigest()
+    cached = schedule_cache.get(cache_key)
+    if cached is not None:
+        return [dict(rec, class_id=cls.id) for rec in cached]
+    
+    remaining = deadline - asyncio.get_running_loop().time()
+    if remaining <= 0:
+        raise LLMTimeout(f"No time left to schedule {class_info['name']}")
+    text = await llm.generate(prompt, SCHEDULE, timeout=remaining)
+    
+    recommendations = [
+        dict(rec, subject=rec.get("subject") or class_info["name"])
+        for rec in _parse_json_array(text)
+        if isinstance(rec, dict) and "recommended_time" in rec
+    ]
+    if not recommendations:
+        raise ValueError("No usable recommendations in the response")
+    
+    schedule_cache.set(cache_key, recommendations)
+    return [dict(rec, class_id=cls.id) for rec in recommendations]
+
+
+async def generate_study_schedule(
+    classes: List[models.Class],
+    user_settings: Optional[models.UserSettings],
+    existing_tasks: List[models.Task],
+    pomodoro_count: int,
+    syllabus_topics: Optional[Dict[int, Dict[str, List[str]]]] = None,
+    existing_sessions: Optional[List[models.StudySchedule]] = None
+) -> List[Dict]:
+    """Generate optimal study schedule recommendations.
 
+    With SCHEDULE_ENGINE=local (the default) sessions are placed by
+    app.schedule_optimizer without an LLM call; with SCHEDULE_ENGINE=llm
+    each class gets its own LLM call, at most SCHEDULE_FANOUT_CONCURRENCY
+    at once and all within SCHEDULE_CLASS_TIMEOUT_SECONDS. A class whose
+    call fails, times out or returns nothing usable gets its sessions from
+    the local plan; the other classes keep their LLM results. Since no
+    prompt sees the others' answers, the merged sessions go through
+    app.schedule_optimizer.fit_sessions so none overlap.
+    ``syllabus_topics`` (see app.syllabus.topic_summaries) describes each
+    class's syllabus by its section headings and keywords.
+    """
+    plan = plan_study_sessions(classes, user_settings, existing_tasks, existing_sessions or [])
+    
+    if SCHEDULE_ENGINE != "llm":
+        return plan
+    
+    if not llm.available:
+        logger.info("LLM provider not configured, using local schedule")
+        return plan
+    
+    settings_info = _settings_info(user_settings)
+    deadline = asyncio.get_running_loop().time() + SCHEDULE_CLASS_TIMEOUT_SECONDS
+    fanout = asyncio.Semaphore(SCHEDULE_FANOUT_CONCURRENCY)
+    
+    async def one(cls: models.Class) -> List[Dict]:
+        async with fanout:
+            return await _class_schedule(
+                cls, classes, settings_info, syllabus_topics or {},
+                len(existing_tasks), pomodoro_count, deadline
+            )
+    
+    results = await asyncio.gather(*(one(cls) for cls in classes), return_exceptions=True)
+    recommendations, fallbacks = [], 0
+    for cls, result in zip(classes, results):
+        if isinstance(result, Exception):
+            if isinstance(result, CircuitOpen):
+                logger.info(f"{result}, using local schedule for {cls.name}")
+            else:
+                logger.warning(f"Schedule generation for {cls.name} failed, using local schedule: {result!r}")
+            fallbacks += 1
+            result = [rec for rec in plan if rec["class_id"] == cls.id]
+        recommendations.extend(result)
+    
+    recommendations = fit_sessions(recommendations, plan, classes, existing_sessions or [])
+    logger.info(
+        f"Generated {len(recommendations)} schedule recommendations "
+        f"({len(classes) - fallbacks} of {len(classes)} classes from the LLM)"
+    )
+    return recommendations
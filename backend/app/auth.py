@@ -4,10 +4,16 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app import models, schemas
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app import models
 from app.database import get_db
+from collections import OrderedDict
 import os
+import threading
+import time
+import uuid
 from dotenv import load_dotenv
 import bcrypt
 
@@ -16,6 +22,14 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+# Calendar feed URLs are polled by calendar apps that can't refresh tokens;
+# creating a new one (or revoking) invalidates the previous URL
+CALENDAR_TOKEN_EXPIRE_DAYS = int(os.getenv("CALENDAR_TOKEN_EXPIRE_DAYS", "30"))
+# Invalidation is per process: other workers can keep serving a changed or
+# deleted user from their cache for up to this long
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "15"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
 
 # Configure password context with error handling
 try:
@@ -70,6 +84,118 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def create_refresh_token(email: str, family: Optional[str] = None) -> str:
+    """Create a single-use refresh token; rotations share the same family id"""
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = {
+        "sub": email,
+        "type": "refresh",
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex,
+        "exp": expire,
+    }
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def issue_tokens(email: str, family: Optional[str] = None) -> dict:
+    access_token = create_access_token(
+        data={"sub": email}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": create_refresh_token(email, family),
+        "token_type": "bearer",
+    }
+
+
+def rotate_calendar_token(db: Session, user_id: int) -> str:
+    """Create a read-only token for the .ics feed, revoking any earlier one.
+
+    It is not accepted as an access token.
+    """
+    user = db.get(models.User, user_id)
+    user.calendar_token_id = uuid.uuid4().hex
+    db.commit()
+    expire = datetime.utcnow() + timedelta(days=CALENDAR_TOKEN_EXPIRE_DAYS)
+    to_encode = {"sub": user.email, "type": "calendar", "jti": user.calendar_token_id, "exp": expire}
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def revoke_calendar_token(db: Session, user_id: int) -> None:
+    db.get(models.User, user_id).calendar_token_id = None
+    db.commit()
+
+
+def _refresh_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def decode_refresh_token(refresh_token: str) -> dict:
+    try:
+        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _refresh_exception()
+    if payload.get("type") != "refresh" or not all(payload.get(claim) for claim in ("sub", "jti", "fam")):
+        raise _refresh_exception()
+    return payload
+
+
+def rotate_refresh_token(db: Session, refresh_token: str) -> dict:
+    """Exchange a refresh token for a new access/refresh pair.
+
+    The presented token is revoked as part of the exchange. Presenting an
+    already-revoked token means it leaked, so its whole family is revoked.
+    """
+    payload = decode_refresh_token(refresh_token)
+    email, jti, family = payload["sub"], payload["jti"], payload["fam"]
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    family_key = f"family:{family}"
+
+    revoked = {
+        row.token_id for row in db.query(models.RevokedToken.token_id).filter(
+            models.RevokedToken.token_id.in_([jti, family_key])
+        )
+    }
+    if family_key in revoked:
+        raise _refresh_exception()
+    if jti in revoked:
+        revoke_refresh_family(db, family)
+        raise _refresh_exception()
+    if get_user_by_email(db, email) is None:
+        raise _refresh_exception()
+
+    prune_revoked_tokens(db)
+    db.add(models.RevokedToken(token_id=jti, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request already rotated this token
+        db.rollback()
+        revoke_refresh_family(db, family)
+        raise _refresh_exception()
+    return issue_tokens(email, family)
+
+
+def revoke_refresh_family(db: Session, family: str) -> None:
+    family_key = f"family:{family}"
+    if db.query(models.RevokedToken).filter(models.RevokedToken.token_id == family_key).first():
+        return
+    expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    db.add(models.RevokedToken(token_id=family_key, expires_at=expires_at))
+    db.commit()
+
+
+def prune_revoked_tokens(db: Session) -> int:
+    """Forget revocations for tokens that have expired anyway"""
+    return db.query(models.RevokedToken).filter(
+        models.RevokedToken.expires_at < datetime.utcnow()
+    ).delete(synchronize_session=False)
+
+
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
@@ -89,6 +215,97 @@ def authenticate_user(db: Session, email: str, password: str):
     return user
 
 
+class PrincipalCache:
+    """Bounded TTL cache of authenticated users keyed by token subject (email).
+
+    Writes through the ORM evict entries in this process only, so with
+    several workers a changed or deleted user can stay authenticated
+    elsewhere for up to ``ttl_seconds``.
+    """
+
+    # Columns copied into the cache; the password hash is left out and
+    # lazy-loads from the request's session if anything ever needs it.
+    _columns = ("id", "email", "name", "google_id", "created_at")
+
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_MAX_SIZE, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, db: Session, email: str) -> Optional[models.User]:
+        """Return the cached user attached to ``db`` without querying, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[email]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            snapshot = entry[1]
+        user = models.User(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def put(self, user: models.User) -> None:
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        snapshot = {column: getattr(user, column) for column in self._columns}
+        with self._lock:
+            self._entries[user.email] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(user.email)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, email: str) -> None:
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target):
+    """Drop cached principals whenever a user row changes or disappears"""
+    principal_cache.invalidate(target.email)
+    # An email change must also evict the entry stored under the old subject
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        principal_cache.invalidate(old_email)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state):
+    """Bulk query.update()/delete() on users skip the mapper events, so drop every cached principal"""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and any(
+        mapper.class_ is models.User for mapper in orm_execute_state.all_mappers
+    ):
+        principal_cache.clear()
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -98,12 +315,39 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("type") in ("refresh", "calendar"):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    return _principal(db, email, credentials_exception)
+
+
+def get_calendar_user(token: str, db: Session) -> models.User:
+    """The user a calendar feed token was issued to"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired calendar token",
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("type") != "calendar" or not payload.get("sub") or not payload.get("jti"):
+        raise credentials_exception
+    user = get_user_by_email(db, email=payload["sub"])
+    # Only the most recently issued token is valid
+    if user is None or user.calendar_token_id != payload["jti"]:
+        raise credentials_exception
+    return user
+
+
+def _principal(db: Session, email: str, credentials_exception: HTTPException) -> models.User:
+    user = principal_cache.get(db, email)
+    if user is not None:
+        return user
     user = get_user_by_email(db, email=email)
     if user is None:
         raise credentials_exception
+    principal_cache.put(user)
     return user
 
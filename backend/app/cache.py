@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+AI_CACHE_BACKEND = os.getenv("AI_CACHE_BACKEND", "memory")  # "memory" or "sqlite"
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", "./ai_cache.db")
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "10000"))
+AI_CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", "86400"))
+
+
+class CacheBackend(ABC):
+    """Key/value cache with per-entry TTL, a size bound and LRU eviction.
+
+    Values must be JSON-serializable so every backend can store them.
+    """
+
+    def __init__(self, max_entries: int = AI_CACHE_MAX_ENTRIES, ttl_seconds: float = AI_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    def _count(self, hits: int = 0, misses: int = 0, evictions: int = 0) -> None:
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def _ttl(self, ttl_seconds: Optional[float]) -> float:
+        return self.ttl_seconds if ttl_seconds is None else ttl_seconds
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            counters = {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+        return {
+            "backend": self.backend,
+            "size": self.size(),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            **counters,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU cache"""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = AI_CACHE_MAX_ENTRIES, ttl_seconds: float = AI_CACHE_TTL_SECONDS):
+        super().__init__(max_entries, ttl_seconds)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self._count(misses=1)
+            return None
+        self._count(hits=1)
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self._ttl(ttl_seconds)
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self._count(evictions=evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """LRU cache in a local SQLite file, shared by every worker on the host.
+
+    Expiry uses wall-clock time because entries outlive the process that
+    wrote them. Hit/miss/eviction counters are per process; ``size`` is the
+    shared total.
+    """
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: str = AI_CACHE_PATH,
+        namespace: str = "default",
+        max_entries: int = AI_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = AI_CACHE_TTL_SECONDS,
+    ):
+        super().__init__(max_entries, ttl_seconds)
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", namespace):
+            raise ValueError(f"Invalid cache namespace: {namespace!r}")
+        self.path = path
+        self.table = f"cache_{namespace}"
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_last_access ON {self.table} (last_access)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_expires_at ON {self.table} (expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not safe to share between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            if row is not None:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?", (key, now))
+            self._count(misses=1)
+            return None
+        conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+        self._count(hits=1)
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self._ttl(ttl_seconds)
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+            overflow = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                self._count(evictions=overflow)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        self._connect().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._connect().execute(f"DELETE FROM {self.table}")
+
+    def size(self) -> int:
+        return self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+def create_cache(
+    namespace: str,
+    backend: str = AI_CACHE_BACKEND,
+    max_entries: int = AI_CACHE_MAX_ENTRIES,
+    ttl_seconds: float = AI_CACHE_TTL_SECONDS,
+) -> CacheBackend:
+    """Build the configured cache backend for one kind of cached data"""
+    if backend == "sqlite":
+        try:
+            return SQLiteCache(AI_CACHE_PATH, namespace, max_entries, ttl_seconds)
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache unavailable at {AI_CACHE_PATH}, using memory: {e}")
+    elif backend != "memory":
+        logger.warning(f"Unknown AI_CACHE_BACKEND {backend!r}, using memory")
+    return MemoryCache(max_entries, ttl_seconds)
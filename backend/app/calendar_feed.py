@@ -0,0 +1,156 @@
+import hashlib
+import os
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app import models
+
+load_dotenv()
+
+# Window of study sessions and task due dates the .ics feed covers
+CALENDAR_FEED_PAST_DAYS = int(os.getenv("CALENDAR_FEED_PAST_DAYS", "30"))
+CALENDAR_FEED_FUTURE_DAYS = int(os.getenv("CALENDAR_FEED_FUTURE_DAYS", "180"))
+# Rows fetched per round trip while streaming the feed
+CALENDAR_FEED_BATCH_SIZE = int(os.getenv("CALENDAR_FEED_BATCH_SIZE", "500"))
+
+PRODID = "-//StudyPlanner//Study Schedule//EN"
+RRULE_DAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+def feed_window(now: Optional[datetime] = None):
+    now = now or datetime.utcnow()
+    return now - timedelta(days=CALENDAR_FEED_PAST_DAYS), now + timedelta(days=CALENDAR_FEED_FUTURE_DAYS)
+
+
+def escape(text: Optional[str]) -> str:
+    """Escape a TEXT value (RFC 5545 3.3.11)"""
+    return (
+        (text or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    """Fold a content line to 75 octets, continuation lines starting with a space"""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Don't split a UTF-8 sequence
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode())
+        start, limit = end, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc(value: datetime) -> str:
+    return value.replace(tzinfo=None).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event(uid: str, stamp: str, lines) -> str:
+    body = [f"UID:{uid}", f"DTSTAMP:{stamp}", *lines]
+    return "".join(fold(line) for line in ["BEGIN:VEVENT", *body, "END:VEVENT"])
+
+
+def feed_etag(db: Session, user_id: int, start: datetime, end: datetime) -> str:
+    """Validator for a user's feed from row counts and latest changes, without reading the rows"""
+    sessions = db.execute(
+        select(func.count(), func.max(models.StudySchedule.id), func.max(models.StudySchedule.created_at)).where(
+            models.StudySchedule.user_id == user_id,
+            models.StudySchedule.recommended_time >= start,
+            models.StudySchedule.recommended_time < end,
+        )
+    ).one()
+    tasks = db.execute(
+        select(func.count(), func.max(models.Task.id), func.max(models.Task.updated_at),
+               func.max(models.Task.created_at)).where(models.Task.user_id == user_id)
+    ).one()
+    classes = db.execute(
+        select(func.count(), func.max(models.Class.id), func.max(models.Class.updated_at),
+               func.max(models.Class.created_at)).where(models.Class.user_id == user_id)
+    ).one()
+    material = repr((start.date(), end.date(), tuple(sessions), tuple(tasks), tuple(classes)))
+    return '"' + hashlib.sha256(material.encode()).hexdigest()[:32] + '"'
+
+
+def _first_meeting(meeting: models.ClassMeeting, start: date) -> date:
+    first = max(start, meeting.start_date) if meeting.start_date else start
+    return first + timedelta(days=(meeting.weekday - first.weekday()) % 7)
+
+
+def iter_calendar(db: Session, user_id: int, start: datetime, end: datetime) -> Iterator[str]:
+    """Yield a VCALENDAR for the user piece by piece: study sessions and task
+    due dates in [start, end), plus weekly class meetings as recurring events"""
+    stamp = _utc(datetime.utcnow())
+    yield "".join(fold(line) for line in [
+        "BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:StudyPlanner",
+    ])
+
+    sessions = db.execute(
+        select(models.StudySchedule.id, models.StudySchedule.subject, models.StudySchedule.recommended_time,
+               models.StudySchedule.duration_minutes, models.StudySchedule.priority, models.StudySchedule.reasoning)
+        .where(
+            models.StudySchedule.user_id == user_id,
+            models.StudySchedule.recommended_time >= start,
+            models.StudySchedule.recommended_time < end,
+        )
+        .order_by(models.StudySchedule.recommended_time, models.StudySchedule.id)
+        .execution_options(yield_per=CALENDAR_FEED_BATCH_SIZE)
+    )
+    for id, subject, begin, minutes, priority, reasoning in sessions:
+        lines = [
+            f"DTSTART:{_utc(begin)}",
+            f"DTEND:{_utc(begin + timedelta(minutes=minutes or 60))}",
+            f"SUMMARY:{escape(f'Study: {subject}')}",
+            f"CATEGORIES:{escape(priority)}",
+        ]
+        if reasoning:
+            lines.append(f"DESCRIPTION:{escape(reasoning)}")
+        yield _event(f"schedule-{id}@studyplanner", stamp, lines)
+
+    tasks = db.execute(
+        select(models.Task.id, models.Task.title, models.Task.description, models.Task.due_date, models.Task.completed)
+        .where(models.Task.user_id == user_id, models.Task.due_date >= start, models.Task.due_date < end)
+        .order_by(models.Task.due_date, models.Task.id)
+        .execution_options(yield_per=CALENDAR_FEED_BATCH_SIZE)
+    )
+    for id, title, description, due, completed in tasks:
+        label = "Done" if completed else "Due"
+        lines = [
+            f"DTSTART:{_utc(due)}",
+            f"DTEND:{_utc(due)}",
+            f"SUMMARY:{escape(f'{label}: {title}')}",
+            "TRANSP:TRANSPARENT",
+        ]
+        if description:
+            lines.append(f"DESCRIPTION:{escape(description)}")
+        yield _event(f"task-{id}@studyplanner", stamp, lines)
+
+    meetings = db.execute(
+        select(models.ClassMeeting, models.Class.name)
+        .join(models.Class, models.Class.id == models.ClassMeeting.class_id)
+        .where(models.ClassMeeting.user_id == user_id)
+        .order_by(models.ClassMeeting.class_id, models.ClassMeeting.weekday)
+    )
+    for meeting, name in meetings:
+        if meeting.end_date and meeting.end_date < start.date():
+            continue
+        first = _first_meeting(meeting, start.date())
+        rule = f"RRULE:FREQ=WEEKLY;BYDAY={RRULE_DAYS[meeting.weekday]}"
+        if meeting.end_date:
+            rule += f";UNTIL={meeting.end_date.strftime('%Y%m%d')}T235959"
+        # Class times are local wall-clock times, so they're written floating
+        yield _event(f"meeting-{meeting.id}@studyplanner", stamp, [
+            f"DTSTART:{datetime.combine(first, meeting.start_time).strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND:{datetime.combine(first, meeting.end_time).strftime('%Y%m%dT%H%M%S')}",
+            rule,
+            f"SUMMARY:{escape(name)}",
+        ])
+
+    yield fold("END:VCALENDAR")
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """A call was rejected because its upstream is failing"""
+
+
+class CircuitBreaker:
+    """Stop calling an upstream that is failing or missing its latency target.
+
+    The outcomes of the last ``window`` calls are kept. Once at least
+    ``min_calls`` are recorded and the share of failures reaches
+    ``error_rate``, or the share of calls slower than ``slow_call_ms``
+    reaches ``slow_rate``, the breaker opens and ``allow()`` refuses every
+    call for ``open_seconds``. It then half-opens: up to ``probes`` calls go
+    through, and the breaker closes if they succeed in time or opens again
+    if any of them does not.
+
+    ``allow()`` hands each call a token naming the phase it started in
+    (each trip, half-open and close starts a new one). Outcomes carrying an
+    earlier phase's token are ignored, so a call that began before a trip
+    can't settle the probes of the half-open that follows.
+
+    Thread-safe, since the API and the background job loop share one client.
+    """
+
+    def __init__(
+        self,
+        window: int = 50,
+        min_calls: int = 10,
+        error_rate: float = 0.5,
+        slow_call_ms: float = 10000,
+        slow_rate: float = 0.5,
+        open_seconds: float = 30,
+        probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_calls = max(1, min_calls)
+        self.error_rate = error_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.probes = max(1, probes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=max(self.min_calls, window))  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._generation = 1
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._enter(HALF_OPEN)
+        return self._state
+
+    def _enter(self, state: str) -> None:
+        self._state = state
+        self._probes_in_flight = 0
+        self._generation += 1
+
+    def allow(self) -> Optional[int]:
+        """A token if a call may go ahead, None if not; each allowed call
+        must be followed by ``record()`` or ``release()`` with its token"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return self._generation
+            if state == HALF_OPEN and self._probes_in_flight < self.probes:
+                self._probes_in_flight += 1
+                return self._generation
+            self.rejected += 1
+            return None
+
+    def record(self, token: int, failed: bool, elapsed_ms: float) -> None:
+        """Record the outcome of an allowed call"""
+        slow = elapsed_ms >= self.slow_call_ms
+        with self._lock:
+            state = self._current_state()
+            if token != self._generation:
+                # Started in an earlier phase, e.g. before the breaker opened
+                return
+            if state == HALF_OPEN:
+                self._probes_in_flight -= 1
+                if failed or slow:
+                    self._trip()
+                elif self._probes_in_flight == 0:
+                    self._enter(CLOSED)
+                    self._outcomes.clear()
+                return
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for f, _ in self._outcomes if f)
+                slow_calls = sum(1 for _, s in self._outcomes if s)
+                if (failures / len(self._outcomes) >= self.error_rate
+                        or slow_calls / len(self._outcomes) >= self.slow_rate):
+                    self._trip()
+
+    def release(self, token: int) -> None:
+        """Forget an allowed call that ended without an outcome (e.g. cancelled)"""
+        with self._lock:
+            if self._current_state() == HALF_OPEN and token == self._generation:
+                self._probes_in_flight -= 1
+
+    def reset(self) -> None:
+        """Close the breaker and forget recorded outcomes"""
+        with self._lock:
+            self._enter(CLOSED)
+            self._outcomes.clear()
+
+    def _trip(self) -> None:
+        self._enter(OPEN)
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.trips += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slow_calls = sum(1 for _, s in self._outcomes if s)
+            retry_in = self.open_seconds - (self._clock() - self._opened_at) if state == OPEN else 0.0
+        return {
+            "state": state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "window_calls": calls,
+            "error_rate": round(failures / calls, 3) if calls else 0.0,
+            "slow_rate": round(slow_calls / calls, 3) if calls else 0.0,
+            "retry_in_seconds": round(max(0.0, retry_in), 2),
+        }
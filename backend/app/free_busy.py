@@ -0,0 +1,207 @@
+import json
+import os
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import delete, event, exists, insert, inspect, or_, select
+from sqlalchemy.orm import Session
+from app import models
+
+load_dotenv()
+
+# Class schedules only record a start time unless they give end_time/duration_minutes
+CLASS_MEETING_MINUTES = int(os.getenv("CLASS_MEETING_MINUTES", "75"))
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+Interval = Tuple[datetime, datetime]
+
+Meeting = models.ClassMeeting
+
+_CLOCK = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?\s*m?\.?\s*$", re.IGNORECASE)
+
+
+def parse_clock(value: Optional[str]) -> Optional[time]:
+    """Parse "14:30", "9:00 AM" or "2 pm" into a time; None if unparseable"""
+    match = _CLOCK.match(value or "")
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").lower()
+    if meridiem == "p" and hour < 12:
+        hour += 12
+    elif meridiem == "a" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+def _parse_date(value) -> Optional[date]:
+    try:
+        return date.fromisoformat(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+
+def meetings_from_schedule(schedule: Optional[str]) -> List[Dict]:
+    """Weekly meetings described by a class's schedule JSON, e.g.
+    {"days": ["Monday"], "time": "10:00 AM", "end_time": "11:15 AM",
+    "start_date": "2024-01-08", "end_date": "2024-05-03"}"""
+    try:
+        data = json.loads(schedule) if schedule else None
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(data, dict):
+        return []
+    start = parse_clock(data.get("time") or data.get("start_time"))
+    if start is None:
+        return []
+    minutes = CLASS_MEETING_MINUTES
+    end = parse_clock(data.get("end_time"))
+    if end is not None and end > start:
+        minutes = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+    elif isinstance(data.get("duration_minutes"), int) and data["duration_minutes"] > 0:
+        minutes = data["duration_minutes"]
+    end = (datetime.combine(date.min, start) + timedelta(minutes=minutes)).time()
+    if end <= start:
+        end = time.max.replace(microsecond=0)  # don't run past midnight
+    days = data.get("days") or []
+    if isinstance(days, str):
+        days = [days]
+    weekdays = sorted({
+        WEEKDAYS.index(d.strip().lower()) for d in days if isinstance(d, str) and d.strip().lower() in WEEKDAYS
+    })
+    return [
+        {
+            "weekday": weekday,
+            "start_time": start,
+            "end_time": end,
+            "start_date": _parse_date(data.get("start_date")),
+            "end_date": _parse_date(data.get("end_date")),
+        }
+        for weekday in weekdays
+    ]
+
+
+def _reindex(connection, cls) -> None:
+    connection.execute(delete(Meeting).where(Meeting.class_id == cls.id))
+    rows = [{"class_id": cls.id, "user_id": cls.user_id, **row} for row in meetings_from_schedule(cls.schedule)]
+    if rows:
+        connection.execute(insert(Meeting), rows)
+
+
+@event.listens_for(models.Class, "after_insert")
+def _class_inserted(mapper, connection, target):
+    if target.schedule:
+        _reindex(connection, target)
+
+
+@event.listens_for(models.Class, "after_update")
+def _class_updated(mapper, connection, target):
+    if inspect(target).attrs.schedule.history.has_changes():
+        _reindex(connection, target)
+
+
+@event.listens_for(models.Class, "before_delete")
+def _class_deleted(mapper, connection, target):
+    connection.execute(delete(Meeting).where(Meeting.class_id == target.id))
+
+
+def index_missing(db: Session) -> int:
+    """Build meetings for classes whose schedule predates the table; returns how many"""
+    classes = db.execute(
+        select(models.Class.id, models.Class.user_id, models.Class.schedule).where(
+            models.Class.schedule.isnot(None),
+            models.Class.schedule != "",
+            ~exists().where(Meeting.class_id == models.Class.id),
+        )
+    ).all()
+    for cls in classes:
+        _reindex(db.connection(), cls)
+    db.commit()
+    return len(classes)
+
+
+def expand_meetings(meetings: Iterable, start: datetime, end: datetime) -> List[Interval]:
+    """Occurrences of weekly meetings that overlap [start, end)"""
+    intervals = []
+    for meeting in meetings:
+        day = start.date() + timedelta(days=(meeting.weekday - start.weekday()) % 7)
+        if meeting.start_date and day < meeting.start_date:
+            day += timedelta(days=7 * -(-(meeting.start_date - day).days // 7))
+        while day <= end.date() and (meeting.end_date is None or day <= meeting.end_date):
+            begin = datetime.combine(day, meeting.start_time)
+            finish = datetime.combine(day, meeting.end_time)
+            if begin < end and finish > start:
+                intervals.append((begin, finish))
+            day += timedelta(days=7)
+    return intervals
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sweep over intervals sorted by start, merging any that overlap or touch"""
+    merged: List[Interval] = []
+    for begin, finish in sorted(intervals):
+        if merged and begin <= merged[-1][1]:
+            if finish > merged[-1][1]:
+                merged[-1] = (merged[-1][0], finish)
+        else:
+            merged.append((begin, finish))
+    return merged
+
+
+def free_windows(
+    busy: List[Interval],
+    start: datetime,
+    end: datetime,
+    day_start: time = time(8),
+    day_end: time = time(22),
+    min_minutes: int = 30,
+) -> List[Interval]:
+    """Gaps of at least ``min_minutes`` between merged ``busy`` intervals,
+    within [day_start, day_end) of each day in [start, end)"""
+    windows = []
+    i = 0
+    day = start.date()
+    while day <= end.date():
+        lo = max(start, datetime.combine(day, day_start))
+        hi = min(end, datetime.combine(day, day_end))
+        # busy is sorted and disjoint, so one pointer walks it once overall
+        while i < len(busy) and busy[i][1] <= lo:
+            i += 1
+        cursor, j = lo, i
+        while cursor < hi:
+            if j < len(busy) and busy[j][0] < hi:
+                gap_end = max(cursor, busy[j][0])
+                if (gap_end - cursor).total_seconds() >= min_minutes * 60:
+                    windows.append((cursor, gap_end))
+                cursor = max(cursor, busy[j][1])
+                j += 1
+            else:
+                if (hi - cursor).total_seconds() >= min_minutes * 60:
+                    windows.append((cursor, hi))
+                break
+        day += timedelta(days=1)
+    return windows
+
+
+def busy_intervals(db: Session, user_id: int, start: datetime, end: datetime) -> List[Interval]:
+    """Merged class meetings and study sessions overlapping [start, end)"""
+    meetings = db.query(Meeting).filter(
+        Meeting.user_id == user_id,
+        or_(Meeting.start_date.is_(None), Meeting.start_date <= end.date()),
+        or_(Meeting.end_date.is_(None), Meeting.end_date >= start.date()),
+    ).all()
+    intervals = expand_meetings(meetings, start, end)
+    sessions = db.query(models.StudySchedule.recommended_time, models.StudySchedule.duration_minutes).filter(
+        models.StudySchedule.user_id == user_id,
+        models.StudySchedule.recommended_time >= start - timedelta(days=1),
+        models.StudySchedule.recommended_time < end,
+    )
+    for begin, minutes in sessions:
+        begin = begin.replace(tzinfo=None) if begin.tzinfo else begin
+        finish = begin + timedelta(minutes=minutes or 60)
+        if finish > start:
+            intervals.append((begin, finish))
+    return [(max(b, start), min(f, end)) for b, f in merge_intervals(intervals)]
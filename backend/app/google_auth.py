@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+import re
+import time
+import weakref
+from typing import Dict, Optional
+import httpx
+from dotenv import load_dotenv
+from jose import JWTError, jwt
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_USERINFO_URL = os.getenv("GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v1/userinfo")
+GOOGLE_CERTS_MAX_AGE_SECONDS = int(os.getenv("GOOGLE_CERTS_MAX_AGE_SECONDS", "3600"))
+GOOGLE_HTTP_TIMEOUT_SECONDS = float(os.getenv("GOOGLE_HTTP_TIMEOUT_SECONDS", "5"))
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Never refetch the key set more often than this when an unknown kid shows up
+_MIN_REFRESH_INTERVAL_SECONDS = 60
+
+
+class GoogleAuthError(Exception):
+    """The presented Google credential could not be verified"""
+
+
+# Process-wide pooled client. httpx async connections belong to the event loop
+# that opened them, so the client is rebuilt if it is used from another loop.
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def configure_transport(transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    """Route Google HTTP calls through ``transport`` (e.g. a local stand-in)"""
+    global _transport, _client, _client_loop
+    _transport = transport
+    _client = None
+    _client_loop = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=GOOGLE_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            transport=_transport,
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+class GoogleKeySet:
+    """Google's ID-token signing keys, cached for the lifetime the endpoint advertises"""
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL, default_max_age: int = GOOGLE_CERTS_MAX_AGE_SECONDS):
+        self.url = url
+        self.default_max_age = default_max_age
+        self._keys: Dict[str, dict] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self.fetches = 0
+        # One refresh at a time per event loop; waiters reuse its result
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    def _needs_refresh(self, kid: str) -> bool:
+        now = time.monotonic()
+        stale = now >= self._expires_at
+        # Google rotates keys ahead of use, so an unknown kid may mean our copy is old
+        unknown = kid not in self._keys and now - self._fetched_at >= _MIN_REFRESH_INTERVAL_SECONDS
+        return stale or unknown
+
+    async def _refresh(self) -> None:
+        response = await get_http_client().get(self.url)
+        response.raise_for_status()
+        max_age = self.default_max_age
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        if match:
+            max_age = int(match.group(1))
+        self._keys = {key["kid"]: key for key in response.json().get("keys", []) if "kid" in key}
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max_age
+        self.fetches += 1
+
+    async def get_key(self, kid: str) -> dict:
+        if self._needs_refresh(kid):
+            async with self._get_lock():
+                # Another request may have refreshed while this one waited
+                if self._needs_refresh(kid):
+                    await self._refresh()
+        if kid not in self._keys:
+            raise GoogleAuthError("Unknown Google signing key")
+        return self._keys[kid]
+
+    def clear(self) -> None:
+        self._keys = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+
+
+google_keys = GoogleKeySet()
+
+
+async def verify_id_token(id_token: str) -> Dict[str, Optional[str]]:
+    """Verify a Google ID token locally against the cached key set"""
+    if not GOOGLE_CLIENT_ID:
+        raise GoogleAuthError("GOOGLE_CLIENT_ID is required to verify ID tokens")
+    try:
+        header = jwt.get_unverified_header(id_token)
+        key = await google_keys.get_key(header.get("kid", ""))
+        claims = jwt.decode(
+            id_token,
+            key,
+            algorithms=["RS256"],
+            audience=GOOGLE_CLIENT_ID,
+            issuer=GOOGLE_ISSUERS,
+            options={"verify_at_hash": False},
+        )
+    except JWTError as e:
+        raise GoogleAuthError(str(e))
+    if claims.get("email") and claims.get("email_verified") is False:
+        raise GoogleAuthError("Google email address is not verified")
+    return {"id": claims.get("sub"), "email": claims.get("email"), "name": claims.get("name")}
+
+
+async def fetch_userinfo(access_token: str) -> Dict[str, Optional[str]]:
+    """Resolve an OAuth access token through Google's userinfo endpoint"""
+    response = await get_http_client().get(
+        GOOGLE_USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"}
+    )
+    if response.status_code != 200:
+        raise GoogleAuthError("Invalid Google token")
+    google_user = response.json()
+    return {"id": google_user.get("id"), "email": google_user.get("email"), "name": google_user.get("name")}
+
+
+async def resolve_identity(request: dict) -> Dict[str, Optional[str]]:
+    """Identify the Google user behind a sign-in request.
+
+    ID tokens (``id_token``/``credential``, or a JWT passed as ``token``) are
+    verified locally; plain OAuth access tokens still need the userinfo call.
+    """
+    id_token = request.get("id_token") or request.get("credential")
+    token = request.get("token") or request.get("access_token")
+    if not id_token and token and token.count(".") == 2:
+        id_token = token
+    if id_token:
+        return await verify_id_token(id_token)
+    return await fetch_userinfo(token)
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app import ai_service, models, syllabus
+from app.database import SessionLocal
+from app.metrics import LatencyRecorder
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+QUIZ_JOB_WORKERS = int(os.getenv("QUIZ_JOB_WORKERS", "4"))
+# Jobs left "running" longer than this by a dead process are queued again on startup
+QUIZ_JOB_STALE_SECONDS = int(os.getenv("QUIZ_JOB_STALE_SECONDS", "300"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+def _age_ms(created_at: Optional[datetime]) -> float:
+    if created_at is None:
+        return 0.0
+    now = datetime.now(timezone.utc) if created_at.tzinfo else datetime.utcnow()
+    return max(0.0, (now - created_at).total_seconds() * 1000)
+
+
+class JobRunner:
+    """Runs quiz generation jobs on a background event loop.
+
+    The ``quiz_jobs`` table is the source of truth: jobs are claimed with a
+    conditional UPDATE, so a job submitted twice (or recovered by another
+    process) runs once, and a cancelled job's result is discarded.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, workers: int = QUIZ_JOB_WORKERS):
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        self._finished_at = deque(maxlen=1024)
+        self.queue_latency = LatencyRecorder()
+        self.run_latency = LatencyRecorder()
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._serve, args=(ready,), name="quiz-jobs", daemon=True)
+            self._thread.start()
+        ready.wait()
+
+    def _serve(self, ready: threading.Event) -> None:
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        self._queue = asyncio.Queue()
+        workers = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            for task in workers + list(self._running.values()):
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*workers, return_exceptions=True))
+            loop.close()
+
+    def stop(self, timeout: float = 5) -> None:
+        with self._lock:
+            thread, loop = self._thread, self._loop
+            self._thread = None
+        if thread is not None and loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+
+    def recover(self) -> int:
+        """Queue jobs left behind by a previous run and return how many"""
+        db = self.session_factory()
+        try:
+            stale_before = datetime.utcnow() - timedelta(seconds=QUIZ_JOB_STALE_SECONDS)
+            db.execute(
+                update(models.QuizJob)
+                .where(models.QuizJob.status == RUNNING, models.QuizJob.started_at < stale_before)
+                .values(status=QUEUED, started_at=None)
+            )
+            db.commit()
+            job_ids = [
+                job_id for (job_id,) in db.query(models.QuizJob.id)
+                .filter(models.QuizJob.status == QUEUED)
+                .order_by(models.QuizJob.created_at, models.QuizJob.id)
+            ]
+        finally:
+            db.close()
+        for job_id in job_ids:
+            self.submit(job_id)
+        return len(job_ids)
+
+    # -- called from request threads ---------------------------------------
+
+    def submit(self, job_id: int) -> None:
+        self.start()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job_id)
+
+    def cancel(self, job_id: int) -> None:
+        """Stop a running job's generation; its row must already be marked cancelled"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._cancel_task, job_id)
+
+    def _cancel_task(self, job_id: int) -> None:
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+
+    # -- background loop ---------------------------------------------------
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            task = asyncio.ensure_future(self._run(job_id))
+            self._running[job_id] = task
+            try:
+                # asyncio.wait does not raise if the job task is cancelled
+                await asyncio.wait({task})
+            finally:
+                self._running.pop(job_id, None)
+                self._queue.task_done()
+
+    async def _run(self, job_id: int) -> None:
+        job = await asyncio.to_thread(self._claim, job_id)
+        if job is None:
+            return
+        self.queue_latency.record(job["queued_ms"])
+        started = time.perf_counter()
+        try:
+            if job.get("error"):
+                raise LookupError(job["error"])
+            questions = await ai_service.generate_quiz_from_syllabus(
+                job["syllabus_content"], job["class_name"], job["num_questions"], job["survey_data"],
+                job["chunks"],
+            )
+            stored = await asyncio.to_thread(self._complete, job, questions)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            logger.error(f"Quiz job {job_id} failed: {e}", exc_info=True)
+            await asyncio.to_thread(self._finish, job_id, FAILED, str(e))
+            self.failed += 1
+            return
+        self.run_latency.record((time.perf_counter() - started) * 1000)
+        self._finished_at.append(time.monotonic())
+        if stored:
+            self.succeeded += 1
+        else:
+            self.cancelled += 1
+
+    def _claim(self, job_id: int) -> Optional[dict]:
+        db = self.session_factory()
+        try:
+            claimed = db.execute(
+                update(models.QuizJob)
+                .where(models.QuizJob.id == job_id, models.QuizJob.status == QUEUED)
+                .values(status=RUNNING, started_at=datetime.utcnow())
+            ).rowcount
+            db.commit()
+            if not claimed:
+                return None
+            job = db.get(models.QuizJob, job_id)
+            context = {
+                "id": job.id,
+                "user_id": job.user_id,
+                "class_id": job.class_id,
+                "num_questions": job.num_questions,
+                "queued_ms": _age_ms(job.created_at),
+            }
+            cls = db.query(models.Class).filter(
+                models.Class.id == job.class_id, models.Class.user_id == job.user_id
+            ).first()
+            if not cls:
+                return {**context, "error": "Class not found"}
+            settings = db.query(models.UserSettings).filter(models.UserSettings.user_id == job.user_id).first()
+            survey_data = None
+            if settings and settings.survey_responses:
+                survey_data = settings.survey_responses
+                if isinstance(survey_data, str):
+                    survey_data = json.loads(survey_data)
+            return {
+                **context,
+                "syllabus_content": cls.syllabus_content or "",
+                "class_name": cls.name,
+                "survey_data": survey_data,
+                "chunks": syllabus.load_chunks(db, cls.id),
+            }
+        finally:
+            db.close()
+
+    def _complete(self, job: dict, questions: List) -> bool:
+        """Store the quiz unless the job was cancelled meanwhile"""
+        db = self.session_factory()
+        try:
+            quiz = models.Quiz(
+                user_id=job["user_id"],
+                class_id=job["class_id"],
+                title=f"Quiz: {job['class_name']}",
+                description=f"Auto-generated quiz for {job['class_name']}",
+                questions=json.dumps([q.dict() for q in questions]),
+            )
+            db.add(quiz)
+            db.flush()
+            stored = db.execute(
+                update(models.QuizJob)
+                .where(models.QuizJob.id == job["id"], models.QuizJob.status == RUNNING)
+                .values(status=SUCCEEDED, quiz_id=quiz.id, finished_at=datetime.utcnow())
+            ).rowcount
+            if stored:
+                db.commit()
+            else:
+                db.rollback()
+            return bool(stored)
+        finally:
+            db.close()
+
+    def _finish(self, job_id: int, status: str, error: Optional[str] = None) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(models.QuizJob)
+                .where(models.QuizJob.id == job_id, models.QuizJob.status == RUNNING)
+                .values(status=status, error=error, finished_at=datetime.utcnow())
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        cutoff = time.monotonic() - 60
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._running),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "completed_last_minute": sum(1 for t in list(self._finished_at) if t >= cutoff),
+            "queue_latency": self.queue_latency.summary(),
+            "run_latency": self.run_latency.summary(),
+        }
+
+
+quiz_jobs = JobRunner()
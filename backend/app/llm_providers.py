@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional
+import google.generativeai as genai
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")  # "gemini" or "fake"
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-pro")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "0"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_SEED = os.getenv("FAKE_LLM_SEED")
+
+if GEMINI_API_KEY:
+    genai.configure(api_key=GEMINI_API_KEY)
+
+# What a prompt asks for; lets non-LLM providers shape their reply
+INSIGHTS = "insights"
+QUIZ = "quiz"
+SCHEDULE = "schedule"
+
+FAKE_QUIZ_TEMPLATES = [
+    "Which statement about {term} in {name} is correct?",
+    "How would you explain {term} in {name}?",
+    "Why does {term} matter for {name}?",
+    "Which example best illustrates {term} in {name}?",
+]
+
+
+class LLMProvider(ABC):
+    """A text-completion backend used by ai_service"""
+
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def complete(self, prompt: str, kind: Optional[str] = None) -> str:
+        ...
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, model_name: str = LLM_MODEL):
+        self.model_name = model_name
+
+    @property
+    def available(self) -> bool:
+        return bool(GEMINI_API_KEY)
+
+    async def complete(self, prompt: str, kind: Optional[str] = None) -> str:
+        model = genai.GenerativeModel(self.model_name)
+        response = await model.generate_content_async(prompt)
+        return response.text
+
+
+class FakeProviderError(Exception):
+    """Injected failure from FakeProvider"""
+
+
+class FakeProvider(LLMProvider):
+    """Offline stand-in that returns schema-valid JSON for each prompt kind.
+
+    Latency (``latency_ms`` +/- ``jitter_ms``) and failures (``error_rate``)
+    are injected so the AI paths can be load-tested without a network. A
+    ``seed`` makes the sequence of delays, errors and answers repeatable.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = FAKE_LLM_LATENCY_MS,
+        jitter_ms: float = FAKE_LLM_JITTER_MS,
+        error_rate: float = FAKE_LLM_ERROR_RATE,
+        seed: Optional[int] = int(FAKE_LLM_SEED) if FAKE_LLM_SEED else None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    async def complete(self, prompt: str, kind: Optional[str] = None) -> str:
+        delay_ms = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        if self._random.random() < self.error_rate:
+            raise FakeProviderError("Injected fake LLM failure")
+        if kind == QUIZ:
+            return json.dumps(self._quiz(prompt))
+        if kind == SCHEDULE:
+            return json.dumps(self._schedule(prompt))
+        return json.dumps(self._insights())
+
+    def _insights(self) -> dict:
+        return {
+            "summary": "You are building a steady study rhythm. Keep it going this week.",
+            "focus_area": self._random.choice(["Consistency", "Time Management", "Balance", "Motivation"]),
+            "daily_tip": "Start with your highest-priority task during your first focus session.",
+        }
+
+    def _quiz(self, prompt: str) -> list:
+        match = re.search(r"generate (\d+) multiple-choice", prompt)
+        count = int(match.group(1)) if match else 5
+        match = re.search(r"^Class: (.*)$", prompt, re.MULTILINE)
+        class_name = match.group(1).strip() if match else "this class"
+        # Ask about distinct terms from the syllabus text in the prompt
+        match = re.search(r"Syllabus Content:\n(.*?)\nFor each question", prompt, re.DOTALL)
+        words = re.findall(r"[A-Za-z]{4,}", match.group(1) if match else "")
+        terms = list(dict.fromkeys(word.lower() for word in words)) or ["the syllabus"]
+        questions = []
+        for i in range(count):
+            correct = self._random.randrange(4)
+            # Short syllabi have few terms, so repeat visits use a different wording
+            visit = i // len(terms)
+            template = FAKE_QUIZ_TEMPLATES[visit % len(FAKE_QUIZ_TEMPLATES)]
+            if visit >= len(FAKE_QUIZ_TEMPLATES):
+                template += f" (review {visit // len(FAKE_QUIZ_TEMPLATES) + 1})"
+            questions.append({
+                "question": template.format(term=terms[i % len(terms)], name=class_name),
+                "options": [f"Statement {letter}" for letter in "ABCD"],
+                "correct_answer": correct,
+                "explanation": f"Statement {'ABCD'[correct]} matches the syllabus.",
+            })
+        return questions
+
+    def _schedule(self, prompt: str) -> list:
+        names = re.findall(r'"name": "((?:[^"\\]|\\.)*)"', prompt) or ["Study Session"]
+        tomorrow = (datetime.utcnow() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        recommendations = []
+        for i, name in enumerate(names):
+            for j, hour in enumerate((9, 14)):
+                when = (tomorrow + timedelta(days=i + j)).replace(hour=hour)
+                recommendations.append({
+                    "subject": json.loads(f'"{name}"'),
+                    "recommended_time": when.isoformat(),
+                    "duration_minutes": self._random.choice([30, 45, 60]),
+                    "priority": "High" if j == 0 else "Medium",
+                    "reasoning": "Spaced review session generated by the fake provider.",
+                })
+        return recommendations
+
+
+def get_provider(name: str = LLM_PROVIDER) -> LLMProvider:
+    """Build the configured provider"""
+    if name == "fake":
+        return FakeProvider()
+    if name != "gemini":
+        logger.warning(f"Unknown LLM_PROVIDER {name!r}, using gemini")
+    return GeminiProvider()
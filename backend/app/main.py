@@ -1,12 +1,33 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.database import engine
+from app.migrations import run_migrations
+from app.pagination import NEXT_CURSOR_HEADER
+from app import ai_service, auth, google_auth
+from app.jobs import quiz_jobs
+from app.precompute import insights_scheduler
+from app.hashing import password_hasher
 from app.routers import users, tasks, pomodoro, notes, ai, settings, classes, quizzes, schedule, analytics
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables and any indexes added since the database was created
+run_migrations(engine)
 
-app = FastAPI(title="Study Planner API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    quiz_jobs.start()
+    await run_in_threadpool(quiz_jobs.recover)
+    insights_scheduler.start()
+    yield
+    await insights_scheduler.stop()
+    quiz_jobs.stop()
+    password_hasher.shutdown()
+    await google_auth.close_http_client()
+
+
+app = FastAPI(title="Study Planner API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -15,6 +36,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -39,3 +61,18 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/metrics")
+def metrics():
+    """In-process cache and pool statistics for this worker"""
+    return {
+        "principal_cache": auth.principal_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "ai_cache": ai_service.ai_cache.stats(),
+        "quiz_cache": ai_service.quiz_cache.stats(),
+        "ai_insight_flights": ai_service.insight_flights.stats(),
+        "llm": ai_service.llm.stats(),
+        "quiz_jobs": quiz_jobs.stats(),
+        "insights_precompute": insights_scheduler.stats(),
+    }
+
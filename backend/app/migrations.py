@@ -0,0 +1,71 @@
+import logging
+from typing import List
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.database import Base
+from app import free_busy, models, rollups, syllabus
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_columns(bind: Engine) -> List[str]:
+    """Add nullable model columns missing from existing tables.
+
+    Like indexes, columns declared after a table was created are skipped by
+    ``create_all``. Only nullable columns without a server default can be
+    added this way, which is how new columns are declared.
+    """
+    inspector = inspect(bind)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable or column.server_default is not None:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            with bind.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            added.append(f"{table.name}.{column.name}")
+            logger.info(f"Added column {column.name} to {table.name}")
+    return added
+
+
+def ensure_indexes(bind: Engine) -> List[str]:
+    """Create model indexes missing from an existing database.
+
+    ``create_all`` skips tables that already exist, along with any index
+    added to them later, so databases created before an index was declared
+    never get it. Works for both SQLite and Postgres.
+    """
+    inspector = inspect(bind)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=bind, checkfirst=True)
+                created.append(index.name)
+                logger.info(f"Created index {index.name} on {table.name}")
+    return created
+
+
+def run_migrations(bind: Engine) -> List[str]:
+    """Bring the schema of ``bind`` up to date with the models; returns the
+    columns and indexes it had to add"""
+    Base.metadata.create_all(bind=bind)
+    created = ensure_columns(bind) + ensure_indexes(bind)
+    with Session(bind=bind) as db:
+        if rollups.backfill_if_empty(db):
+            logger.info("Backfilled pomodoro_rollups from existing sessions")
+        indexed = syllabus.index_missing(db)
+        if indexed:
+            logger.info(f"Indexed syllabus sections for {indexed} classes")
+        meetings = free_busy.index_missing(db)
+        if meetings:
+            logger.info(f"Built class meetings for {meetings} classes")
+    return created
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Time, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -12,6 +12,7 @@ class User(Base):
     name = Column(String, nullable=True)
     hashed_password = Column(String, nullable=True)
     google_id = Column(String, unique=True, nullable=True, index=True)
+    calendar_token_id = Column(String, nullable=True)  # Id of the one valid calendar feed token; NULL when revoked
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan")
@@ -20,11 +21,17 @@ class User(Base):
     user_settings = relationship("UserSettings", back_populates="owner", uselist=False, cascade="all, delete-orphan")
     classes = relationship("Class", back_populates="owner", cascade="all, delete-orphan")
     quizzes = relationship("Quiz", back_populates="owner", cascade="all, delete-orphan")
+    quiz_jobs = relationship("QuizJob", cascade="all, delete-orphan")
     study_schedules = relationship("StudySchedule", back_populates="owner", cascade="all, delete-orphan")
+    pomodoro_rollups = relationship("PomodoroRollup", cascade="all, delete-orphan")
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_user_order", "user_id", "order_index", "created_at"),
+        Index("ix_tasks_user_due", "user_id", "due_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -43,6 +50,11 @@ class Task(Base):
 
 class Pomodoro(Base):
     __tablename__ = "pomodoros"
+    __table_args__ = (
+        Index("ix_pomodoros_user_created", "user_id", "created_at"),
+    )
+    # Fetch created_at during the INSERT so rollup events can bucket it
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     completed = Column(Boolean, default=False)
@@ -53,8 +65,23 @@ class Pomodoro(Base):
     owner = relationship("User", back_populates="pomodoros")
 
 
+class PomodoroRollup(Base):
+    """Per-user, per-hour Pomodoro totals maintained by app.rollups"""
+    __tablename__ = "pomodoro_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    sessions = Column(Integer, nullable=False, default=0)
+    completed_sessions = Column(Integer, nullable=False, default=0)
+    focus_minutes = Column(Integer, nullable=False, default=0)  # completed sessions only
+
+
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_user_updated", "user_id", "updated_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -89,6 +116,9 @@ class UserSettings(Base):
 
 class Class(Base):
     __tablename__ = "classes"
+    __table_args__ = (
+        Index("ix_classes_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -103,10 +133,50 @@ class Class(Base):
     owner = relationship("User", back_populates="classes")
     quizzes = relationship("Quiz", back_populates="class_rel", cascade="all, delete-orphan")
     study_schedules = relationship("StudySchedule", back_populates="class_rel", cascade="all, delete-orphan")
+    meetings = relationship(
+        "ClassMeeting", viewonly=True, order_by="(ClassMeeting.weekday, ClassMeeting.start_time)"
+    )
+
+
+class ClassMeeting(Base):
+    """One weekly meeting of a class, maintained from its schedule by app.free_busy"""
+    __tablename__ = "class_meetings"
+    __table_args__ = (
+        Index("ix_class_meetings_user_weekday", "user_id", "weekday"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    weekday = Column(Integer, nullable=False)  # 0 = Monday
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    start_date = Column(Date, nullable=True)  # first day the class meets, if known
+    end_date = Column(Date, nullable=True)
+
+
+class SyllabusChunk(Base):
+    """One section of a class syllabus, maintained by app.syllabus"""
+    __tablename__ = "syllabus_chunks"
+    __table_args__ = (
+        Index("ix_syllabus_chunks_class_position", "class_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    heading = Column(String, nullable=True)
+    content = Column(Text, nullable=False)
+    keywords = Column(Text, nullable=True)  # JSON array of keywords
+    token_estimate = Column(Integer, nullable=False, default=0)
 
 
 class Quiz(Base):
     __tablename__ = "quizzes"
+    __table_args__ = (
+        Index("ix_quizzes_user_created", "user_id", "created_at"),
+        Index("ix_quizzes_user_class_created", "user_id", "class_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -121,8 +191,32 @@ class Quiz(Base):
     class_rel = relationship("Class")
 
 
+class QuizJob(Base):
+    """A queued request to generate a quiz in the background"""
+    __tablename__ = "quiz_jobs"
+    __table_args__ = (
+        Index("ix_quiz_jobs_user_created", "user_id", "created_at"),
+        Index("ix_quiz_jobs_status_created", "status", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    num_questions = Column(Integer, default=5)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
 class StudySchedule(Base):
     __tablename__ = "study_schedules"
+    __table_args__ = (
+        Index("ix_study_schedules_user_time", "user_id", "recommended_time"),
+        Index("ix_study_schedules_user_batch", "user_id", "batch_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -132,8 +226,22 @@ class StudySchedule(Base):
     duration_minutes = Column(Integer, default=60)
     priority = Column(String, default="Medium")
     reasoning = Column(Text, nullable=True)  # AI explanation for recommendation
+    batch_key = Column(String, nullable=True)  # Hash of the inputs of a generated batch; NULL for manual entries
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     owner = relationship("User")
     class_rel = relationship("Class")
 
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # Refresh token jti, or "family:<id>" when a whole rotation chain is revoked
+    token_id = Column(String, primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+# Registered here so every writer of these models keeps class_meetings,
+# syllabus_chunks and pomodoro_rollups in step, not just the routers
+from app import free_busy, rollups, syllabus  # noqa: E402,F401
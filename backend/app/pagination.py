@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import DateTime, String, and_, false, or_, tuple_, type_coerce
+from sqlalchemy.orm import Query as SAQuery
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class SortKey(NamedTuple):
+    """One column of a list endpoint's sort order.
+
+    The last key must be unique (normally the primary key) so every row has
+    a distinct position. Nullable keys sort their NULLs last.
+    """
+    column: Any
+    descending: bool = False
+    nullable: bool = False
+
+
+def limit_param(default: int = DEFAULT_PAGE_SIZE):
+    return Query(default, ge=1, le=MAX_PAGE_SIZE)
+
+
+def skip_param():
+    """Legacy OFFSET paging, still accepted by endpoints that had it; use cursor instead"""
+    return Query(None, ge=0, deprecated=True)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    encoded = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(encoded, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, expected: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != expected
+        or not all(v is None or isinstance(v, (str, int, float)) for v in values)
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def _cursor_expr(key: SortKey):
+    # Datetimes are compared as the database stores them. SQLite keeps them
+    # as text whose format depends on who wrote the row (server default vs
+    # Python), so round-tripping through datetime would break ties.
+    if isinstance(key.column.type, DateTime):
+        return type_coerce(key.column, String)
+    return key.column
+
+
+def _after(key: SortKey, value):
+    """Rows strictly after ``value`` on a single key"""
+    if value is None:
+        # NULLs sort last, so nothing comes after a NULL on this key
+        return false()
+    expr = _cursor_expr(key)
+    condition = expr < value if key.descending else expr > value
+    if key.nullable:
+        condition = or_(condition, key.column.is_(None))
+    return condition
+
+
+def _equal(key: SortKey, value):
+    return key.column.is_(None) if value is None else _cursor_expr(key) == value
+
+
+def _keyset(sort_keys: Sequence[SortKey], values: List[Any]):
+    """Rows strictly after ``values`` in the ``sort_keys`` order"""
+    descending = {key.descending for key in sort_keys}
+    if len(descending) == 1 and not any(key.nullable for key in sort_keys) and None not in values:
+        # A row-value comparison lets the database seek the index to the
+        # cursor instead of filtering every entry before it
+        row = tuple_(*(_cursor_expr(key) for key in sort_keys))
+        return row < tuple_(*values) if descending.pop() else row > tuple_(*values)
+    clauses = []
+    for i, key in enumerate(sort_keys):
+        prefix = [_equal(sort_keys[j], values[j]) for j in range(i)]
+        clauses.append(and_(*prefix, _after(key, values[i])))
+    return or_(*clauses)
+
+
+def paginate(
+    query: SAQuery,
+    sort_keys: Sequence[SortKey],
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: Optional[int] = None,
+) -> list:
+    """Return one page of ``query`` and set the next-page cursor header.
+
+    Pages are located with a keyset predicate on ``sort_keys`` rather than
+    OFFSET, so deep pages cost the same as the first one when the sort
+    order is backed by an index. ``skip`` keeps old OFFSET clients working;
+    those responses carry a ``Deprecation`` header and a cursor to move to.
+    """
+    if skip is not None and cursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either cursor or skip, not both")
+    if cursor:
+        query = query.filter(_keyset(sort_keys, decode_cursor(cursor, len(sort_keys))))
+
+    order_by = []
+    for key in sort_keys:
+        clause = key.column.desc() if key.descending else key.column.asc()
+        order_by.append(clause.nulls_last() if key.nullable else clause)
+
+    cursor_columns = [_cursor_expr(key).label(f"cursor_{i}") for i, key in enumerate(sort_keys)]
+    query = query.add_columns(*cursor_columns).order_by(*order_by)
+    if skip is not None:
+        response.headers["Deprecation"] = "true"
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(list(rows[-1][1:]))
+    return [row[0] for row in rows]
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, union
+from sqlalchemy.orm import Session
+from app import ai_service, models
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# UTC hour at which the API process refreshes insights; unset disables the scheduler
+INSIGHTS_PRECOMPUTE_HOUR = os.getenv("INSIGHTS_PRECOMPUTE_HOUR", "")
+# Users with a task, note or Pomodoro written in this many days are refreshed
+INSIGHTS_PRECOMPUTE_ACTIVE_DAYS = int(os.getenv("INSIGHTS_PRECOMPUTE_ACTIVE_DAYS", "7"))
+INSIGHTS_PRECOMPUTE_CONCURRENCY = int(os.getenv("INSIGHTS_PRECOMPUTE_CONCURRENCY", "4"))
+# Global cap on LLM calls started by a precompute run
+INSIGHTS_PRECOMPUTE_RATE_PER_MINUTE = float(os.getenv("INSIGHTS_PRECOMPUTE_RATE_PER_MINUTE", "60"))
+
+
+class RateLimiter:
+    """Async token bucket: ``acquire()`` returns at most ``rate_per_minute``
+    times a minute, with bursts of up to ``burst``"""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def active_user_ids(db: Session, days: int = INSIGHTS_PRECOMPUTE_ACTIVE_DAYS) -> List[int]:
+    """Users who wrote a task, note or Pomodoro session in the last ``days``"""
+    since = datetime.utcnow() - timedelta(days=days)
+    query = union(
+        select(models.Pomodoro.user_id).where(models.Pomodoro.created_at >= since),
+        select(models.Task.user_id).where(or_(models.Task.created_at >= since, models.Task.updated_at >= since)),
+        select(models.Note.user_id).where(or_(models.Note.created_at >= since, models.Note.updated_at >= since)),
+    )
+    return sorted(user_id for (user_id,) in db.execute(query))
+
+
+async def precompute_insights(
+    user_ids: Iterable[int],
+    session_factory: Callable[[], Session] = SessionLocal,
+    concurrency: int = INSIGHTS_PRECOMPUTE_CONCURRENCY,
+    rate_per_minute: float = INSIGHTS_PRECOMPUTE_RATE_PER_MINUTE,
+) -> Dict:
+    """Fill the insights cache for ``user_ids`` and return run statistics.
+
+    Users whose insights are already cached for their current study stats
+    cost one aggregate query and no LLM call.
+    """
+    stats = {"users": 0, "cached": 0, "llm_calls": 0, "failures": 0, "wall_seconds": 0.0}
+    if not ai_service.llm.available:
+        logger.info("LLM provider not configured, skipping insights precompute")
+        return stats
+
+    started = time.perf_counter()
+    limiter = RateLimiter(rate_per_minute)
+    pending = iter(user_ids)
+
+    async def refresh(user_id: int) -> None:
+        db = session_factory()
+        try:
+            study_data = await run_in_threadpool(ai_service.get_user_study_data, db, user_id)
+        finally:
+            db.close()
+        stats["users"] += 1
+        cache_key = ai_service.insights_cache_key(user_id, study_data)
+        if ai_service.ai_cache.get(cache_key) is not None:
+            stats["cached"] += 1
+            return
+        await limiter.acquire()
+        stats["llm_calls"] += 1
+        await ai_service.insights_for_study_data(user_id, study_data)
+        # Fallbacks are returned on failure but never cached
+        if ai_service.ai_cache.get(cache_key) is None:
+            stats["failures"] += 1
+
+    async def worker() -> None:
+        for user_id in pending:
+            try:
+                await refresh(user_id)
+            except Exception as e:
+                stats["failures"] += 1
+                logger.warning(f"Insights precompute failed for user {user_id}: {e}")
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    stats["wall_seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+class InsightsScheduler:
+    """Runs ``precompute_insights`` for active users once a day at ``hour`` UTC"""
+
+    def __init__(self, hour: Optional[int], session_factory: Callable[[], Session] = SessionLocal):
+        self.hour = hour
+        self.session_factory = session_factory
+        self.runs = 0
+        self.last_run: Optional[Dict] = None
+        self.last_run_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.hour is not None and self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def seconds_until_next_run(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.utcnow()
+        next_run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    async def run_once(self) -> Dict:
+        db = self.session_factory()
+        try:
+            user_ids = await run_in_threadpool(active_user_ids, db)
+        finally:
+            db.close()
+        stats = await precompute_insights(user_ids, self.session_factory)
+        self.runs += 1
+        self.last_run, self.last_run_at = stats, datetime.utcnow()
+        logger.info(f"Insights precompute: {stats}")
+        return stats
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run())
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Insights precompute run failed: {e}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "hour_utc": self.hour,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run": self.last_run,
+        }
+
+
+insights_scheduler = InsightsScheduler(int(INSIGHTS_PRECOMPUTE_HOUR) if INSIGHTS_PRECOMPUTE_HOUR else None)
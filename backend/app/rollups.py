@@ -0,0 +1,205 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import and_, case, delete, event, func, inspect, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app import models
+from app.sql_time import date_of, hour_of, utc_of
+
+Rollup = models.PomodoroRollup
+_COUNTERS = ("sessions", "completed_sessions", "focus_minutes")
+
+
+class _Contribution(NamedTuple):
+    user_id: int
+    day: date
+    hour: int
+    sessions: int
+    completed_sessions: int
+    focus_minutes: int
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC for bucketing; drivers may return aware datetimes in the session time zone"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _contribution(user_id, created_at, completed, duration_minutes) -> Optional[_Contribution]:
+    """What one Pomodoro row adds to its (user, day, hour) bucket"""
+    if user_id is None or created_at is None:
+        return None
+    created_at = _utc(created_at)
+    return _Contribution(
+        user_id=user_id,
+        day=created_at.date(),
+        hour=created_at.hour,
+        sessions=1,
+        completed_sessions=1 if completed else 0,
+        focus_minutes=(duration_minutes or 0) if completed else 0,
+    )
+
+
+def _increment(connection, c: _Contribution) -> None:
+    values = c._asdict()
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(Rollup).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "day", "hour"],
+            set_={name: getattr(Rollup, name) + getattr(stmt.excluded, name) for name in _COUNTERS},
+        )
+        connection.execute(stmt)
+        return
+    if not _apply(connection, c, 1):
+        connection.execute(insert(Rollup).values(**values))
+
+
+def _apply(connection, c: _Contribution, sign: int) -> int:
+    return connection.execute(
+        update(Rollup)
+        .where(Rollup.user_id == c.user_id, Rollup.day == c.day, Rollup.hour == c.hour)
+        .values({name: getattr(Rollup, name) + sign * getattr(c, name) for name in _COUNTERS})
+    ).rowcount
+
+
+def _decrement(connection, c: _Contribution) -> None:
+    # Plain UPDATE: if the bucket is already gone (e.g. the user is being
+    # deleted) there is nothing left to subtract from.
+    _apply(connection, c, -1)
+
+
+@event.listens_for(models.Pomodoro, "after_insert")
+def _pomodoro_inserted(mapper, connection, target):
+    c = _contribution(target.user_id, target.created_at, target.completed, target.duration_minutes)
+    if c:
+        _increment(connection, c)
+
+
+@event.listens_for(models.Pomodoro, "after_update")
+def _pomodoro_updated(mapper, connection, target):
+    state = inspect(target)
+
+    def previous(name):
+        history = state.attrs[name].history
+        return history.deleted[0] if history.deleted else getattr(target, name)
+
+    old = _contribution(
+        previous("user_id"), previous("created_at"), previous("completed"), previous("duration_minutes")
+    )
+    new = _contribution(target.user_id, target.created_at, target.completed, target.duration_minutes)
+    if old == new:
+        return
+    if old:
+        _decrement(connection, old)
+    if new:
+        _increment(connection, new)
+
+
+@event.listens_for(models.Pomodoro, "before_delete")
+def _pomodoro_deleted(mapper, connection, target):
+    c = _contribution(target.user_id, target.created_at, target.completed, target.duration_minutes)
+    if c:
+        _decrement(connection, c)
+
+
+def rebuild_pomodoro_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute rollups from the raw pomodoros table and return the bucket count.
+
+    Needed after writes that bypass the ORM events (bulk ``query.delete()``,
+    raw SQL) and to backfill databases created before rollups existed.
+    """
+    P = models.Pomodoro
+    created_at = utc_of(db, P.created_at)
+    day = date_of(db, created_at)
+    hour = hour_of(db, created_at)
+    rows = select(
+        P.user_id,
+        day,
+        hour,
+        func.count(P.id),
+        func.sum(case((P.completed == True, 1), else_=0)),
+        func.sum(case((P.completed == True, func.coalesce(P.duration_minutes, 0)), else_=0)),
+    ).where(P.created_at.isnot(None)).group_by(P.user_id, day, hour)
+    clear = delete(Rollup)
+    if user_id is not None:
+        rows = rows.where(P.user_id == user_id)
+        clear = clear.where(Rollup.user_id == user_id)
+
+    db.execute(clear)
+    db.execute(insert(Rollup).from_select(["user_id", "day", "hour", *_COUNTERS], rows))
+    db.commit()
+    query = db.query(func.count()).select_from(Rollup)
+    if user_id is not None:
+        query = query.filter(Rollup.user_id == user_id)
+    return query.scalar()
+
+
+def backfill_if_empty(db: Session) -> bool:
+    """Build rollups once for databases that predate the rollup table"""
+    if db.query(Rollup.user_id).first() is not None:
+        return False
+    if db.query(models.Pomodoro.id).first() is None:
+        return False
+    rebuild_pomodoro_rollups(db)
+    return True
+
+
+def _since(cutoff: datetime):
+    """Buckets whose hour starts at or after ``cutoff``'s hour"""
+    cutoff = _utc(cutoff)
+    return or_(
+        Rollup.day > cutoff.date(),
+        and_(Rollup.day == cutoff.date(), Rollup.hour >= cutoff.hour),
+    )
+
+
+def focus_totals(db: Session, user_id: int, since: Optional[datetime] = None) -> Tuple[int, int]:
+    """(completed sessions, focus minutes) for a user, optionally from ``since`` on"""
+    query = db.query(
+        func.coalesce(func.sum(Rollup.completed_sessions), 0),
+        func.coalesce(func.sum(Rollup.focus_minutes), 0),
+    ).filter(Rollup.user_id == user_id)
+    if since is not None:
+        query = query.filter(_since(since))
+    sessions, minutes = query.one()
+    return int(sessions), int(minutes)
+
+
+def daily_focus(db: Session, user_id: int, days: int, tz_offset_minutes: int = 0) -> List[Dict]:
+    """Completed sessions and minutes per local day for the last ``days`` days.
+
+    Buckets are hourly in UTC, so local days are exact for whole-hour offsets.
+    """
+    offset = timedelta(minutes=tz_offset_minutes)
+    today = (datetime.utcnow() + offset).date()
+    first_day = today - timedelta(days=days - 1)
+    start_utc = datetime.combine(first_day, datetime.min.time()) - offset
+    series = {first_day + timedelta(days=i): {"sessions": 0, "focus_minutes": 0} for i in range(days)}
+    rows = db.query(Rollup.day, Rollup.hour, Rollup.completed_sessions, Rollup.focus_minutes).filter(
+        Rollup.user_id == user_id, _since(start_utc), Rollup.completed_sessions > 0
+    )
+    for day, hour, sessions, minutes in rows:
+        local_day = (datetime.combine(day, datetime.min.time()) + timedelta(hours=hour) + offset).date()
+        if local_day in series:
+            series[local_day]["sessions"] += sessions
+            series[local_day]["focus_minutes"] += minutes
+    return [{"date": day, **totals} for day, totals in series.items()]
+
+
+def streak_days(db: Session, user_id: int, tz_offset_minutes: int = 0) -> int:
+    """Consecutive local days, ending today, with at least one completed session"""
+    offset = timedelta(minutes=tz_offset_minutes)
+    expected = (datetime.utcnow() + offset).date()
+    streak = 0
+    rows = db.query(Rollup.day, Rollup.hour).filter(
+        Rollup.user_id == user_id, Rollup.completed_sessions > 0
+    ).order_by(Rollup.day.desc(), Rollup.hour.desc()).yield_per(256)
+    for day, hour in rows:
+        local_day = (datetime.combine(day, datetime.min.time()) + timedelta(hours=hour) + offset).date()
+        if local_day == expected:
+            streak += 1
+            expected -= timedelta(days=1)
+        elif local_day < expected:
+            break
+    return streak
@@ -1,30 +1,33 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
-from app import models, auth
+from typing import List
+from app import models, auth, rollups
 from app.database import get_db
-from app.schemas_advanced import AnalyticsResponse
-from datetime import datetime, timedelta
-from collections import defaultdict
+from app.schemas_advanced import AnalyticsResponse, FocusSummaryResponse
+from app.sql_time import WEEKDAY_NAMES, weekday_of
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
+def _top_buckets(db: Session, user_id: int, bucket, tiebreak, n: int = 3) -> List[int]:
+    """Top ``n`` rollup buckets by focus minutes, earliest first on ties"""
+    Rollup = models.PomodoroRollup
+    rows = db.query(bucket.label("bucket")).filter(
+        Rollup.user_id == user_id, Rollup.completed_sessions > 0
+    ).group_by(bucket).order_by(
+        func.sum(Rollup.focus_minutes).desc(), *tiebreak
+    ).limit(n).all()
+    return [row.bucket for row in rows]
+
+
 @router.get("/", response_model=AnalyticsResponse)
 def get_analytics(
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get user-specific analytics based on study data and survey responses"""
-    # Get completed pomodoros
-    pomodoros = db.query(models.Pomodoro).filter(
-        models.Pomodoro.user_id == current_user.id,
-        models.Pomodoro.completed == True
-    ).all()
-    
-    # Get tasks
-    tasks = db.query(models.Task).filter(
-        models.Task.user_id == current_user.id
-    ).all()
+    Rollup, Task = models.PomodoroRollup, models.Task
     
     # Get user settings for survey context
     settings = db.query(models.UserSettings).filter(
@@ -32,40 +35,37 @@ def get_analytics(
     ).first()
     
     # Calculate metrics
-    total_focus_minutes = sum(p.duration_minutes for p in pomodoros)
+    session_count, total_focus_minutes = rollups.focus_totals(db, current_user.id)
     total_study_hours = total_focus_minutes / 60.0
     
-    completed_tasks = [t for t in tasks if t.completed]
-    completion_rate = len(completed_tasks) / len(tasks) * 100 if tasks else 0
+    task_count, completed_task_count = db.query(
+        func.count(Task.id), func.coalesce(func.sum(case((Task.completed == True, 1), else_=0)), 0)
+    ).filter(Task.user_id == current_user.id).one()
+    completion_rate = completed_task_count / task_count * 100 if task_count else 0
     
     # Average session length
-    avg_session_length = total_focus_minutes / len(pomodoros) if pomodoros else 0
-    
-    # Most productive days
-    day_counts = defaultdict(int)
-    for p in pomodoros:
-        if p.created_at:
-            day = p.created_at.strftime("%A")
-            day_counts[day] += p.duration_minutes
-    
-    most_productive_days = sorted(day_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-    most_productive_days = [day for day, _ in most_productive_days]
-    
-    # Most productive times
-    hour_counts = defaultdict(int)
-    for p in pomodoros:
-        if p.created_at:
-            hour = p.created_at.hour
-            hour_counts[hour] += p.duration_minutes
-    
-    most_productive_times = sorted(hour_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-    most_productive_times = [f"{hour}:00" for hour, _ in most_productive_times]
-    
-    # Subject breakdown (from tasks)
-    subject_breakdown = defaultdict(float)
-    for task in completed_tasks:
-        if task.category:
-            subject_breakdown[task.category] += 1
+    avg_session_length = total_focus_minutes / session_count if session_count else 0
+    
+    # Most productive days and times; ties go to whichever came first
+    most_productive_days = [
+        WEEKDAY_NAMES[day] for day in _top_buckets(
+            db, current_user.id, weekday_of(db, Rollup.day), [func.min(Rollup.day)]
+        )
+    ]
+    most_productive_times = [
+        f"{hour}:00" for hour in _top_buckets(
+            db, current_user.id, Rollup.hour, [func.min(Rollup.day), Rollup.hour]
+        )
+    ]
+    
+    # Subject breakdown (from completed tasks)
+    subject_counts = db.query(Task.category, func.count(Task.id)).filter(
+        Task.user_id == current_user.id,
+        Task.completed == True,
+        Task.category.isnot(None),
+        Task.category != "",
+    ).group_by(Task.category).order_by(func.min(Task.id)).all()
+    subject_breakdown = {subject: float(count) for subject, count in subject_counts}
     
     # Convert to percentages
     total_by_subject = sum(subject_breakdown.values())
@@ -96,8 +96,25 @@ def get_analytics(
         average_session_length=round(avg_session_length, 2),
         most_productive_days=most_productive_days,
         most_productive_times=most_productive_times,
-        subject_breakdown=dict(subject_breakdown),
+        subject_breakdown=subject_breakdown,
         completion_rate=round(completion_rate, 2),
         recommendations=recommendations
     )
 
+
+
+@router.get("/focus", response_model=FocusSummaryResponse)
+def get_focus_summary(
+    days: int = Query(7, ge=1, le=366),
+    tz_offset_minutes: int = Query(0, ge=-14 * 60, le=14 * 60),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Focus totals, current streak and a per-day series read from the Pomodoro rollups"""
+    total_sessions, total_focus_minutes = rollups.focus_totals(db, current_user.id)
+    return FocusSummaryResponse(
+        total_sessions=total_sessions,
+        total_focus_minutes=total_focus_minutes,
+        streak_days=rollups.streak_days(db, current_user.id, tz_offset_minutes),
+        daily=rollups.daily_focus(db, current_user.id, days, tz_offset_minutes),
+    )
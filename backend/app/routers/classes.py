@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app import models, auth
 from app.database import get_db
+from app.pagination import SortKey, limit_param, paginate
 from app.schemas_advanced import ClassCreate, ClassUpdate, ClassResponse
 import json
 
@@ -11,13 +12,18 @@ router = APIRouter(prefix="/classes", tags=["classes"])
 
 @router.get("/", response_model=List[ClassResponse])
 def get_classes(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = limit_param(),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all classes for the current user"""
-    classes = db.query(models.Class).filter(
-        models.Class.user_id == current_user.id
-    ).order_by(models.Class.created_at.desc()).all()
+    """Get classes for the current user, newest first (see X-Next-Cursor)"""
+    query = db.query(models.Class).filter(models.Class.user_id == current_user.id)
+    classes = paginate(query, [
+        SortKey(models.Class.created_at, descending=True),
+        SortKey(models.Class.id, descending=True),
+    ], response, cursor, limit)
     
     # Parse schedule JSON
     for cls in classes:
@@ -1,24 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app import models, schemas, auth
 from app.database import get_db
+from app.pagination import SortKey, limit_param, paginate, skip_param
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
 
 @router.get("/", response_model=List[schemas.NoteResponse])
 def get_notes(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = limit_param(),
+    skip: Optional[int] = skip_param(),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all notes for the current user"""
-    notes = db.query(models.Note).filter(
-        models.Note.user_id == current_user.id
-    ).order_by(models.Note.updated_at.desc(), models.Note.created_at.desc()).offset(skip).limit(limit).all()
-    return notes
+    """Get notes for the current user, most recently updated first (see X-Next-Cursor)"""
+    query = db.query(models.Note).filter(models.Note.user_id == current_user.id)
+    return paginate(query, [
+        SortKey(models.Note.updated_at, descending=True, nullable=True),
+        SortKey(models.Note.created_at, descending=True),
+        SortKey(models.Note.id, descending=True),
+    ], response, cursor, limit, skip)
 
 
 @router.post("/", response_model=schemas.NoteResponse, status_code=status.HTTP_201_CREATED)
@@ -1,24 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from app import models, schemas, auth
+from typing import List, Optional
+from app import models, schemas, auth, rollups  # rollups keeps pomodoro_rollups in step with these writes
 from app.database import get_db
+from app.pagination import SortKey, limit_param, paginate, skip_param
 
 router = APIRouter(prefix="/pomodoro", tags=["pomodoro"])
 
 
 @router.get("/", response_model=List[schemas.PomodoroResponse])
 def get_pomodoros(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = limit_param(),
+    skip: Optional[int] = skip_param(),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all Pomodoro sessions for the current user"""
-    pomodoros = db.query(models.Pomodoro).filter(
-        models.Pomodoro.user_id == current_user.id
-    ).order_by(models.Pomodoro.created_at.desc()).offset(skip).limit(limit).all()
-    return pomodoros
+    """Get Pomodoro sessions for the current user, newest first (see X-Next-Cursor)"""
+    query = db.query(models.Pomodoro).filter(models.Pomodoro.user_id == current_user.id)
+    return paginate(query, [
+        SortKey(models.Pomodoro.created_at, descending=True),
+        SortKey(models.Pomodoro.id, descending=True),
+    ], response, cursor, limit, skip)
 
 
 @router.post("/", response_model=schemas.PomodoroResponse, status_code=status.HTTP_201_CREATED)
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List
-from app import models, auth
+from typing import List, Optional
+from app import models, auth, jobs
 from app.database import get_db
-from app.schemas_advanced import QuizCreate, QuizUpdate, QuizResponse
-from app.ai_service import generate_quiz_from_syllabus
-from app.schemas_advanced import Question
+from app.pagination import SortKey, limit_param, paginate
+from app.schemas_advanced import QuizCreate, QuizUpdate, QuizResponse, QuizGenerateRequest, QuizJobResponse
+from datetime import datetime
 import json
 
 router = APIRouter(prefix="/quizzes", tags=["quizzes"])
@@ -13,17 +14,23 @@ router = APIRouter(prefix="/quizzes", tags=["quizzes"])
 
 @router.get("/", response_model=List[QuizResponse])
 def get_quizzes(
+    response: Response,
     class_id: int = None,
+    cursor: Optional[str] = None,
+    limit: int = limit_param(),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all quizzes for the current user"""
+    """Get quizzes for the current user, newest first (see X-Next-Cursor)"""
     query = db.query(models.Quiz).filter(models.Quiz.user_id == current_user.id)
     
     if class_id:
         query = query.filter(models.Quiz.class_id == class_id)
     
-    quizzes = query.order_by(models.Quiz.created_at.desc()).all()
+    quizzes = paginate(query, [
+        SortKey(models.Quiz.created_at, descending=True),
+        SortKey(models.Quiz.id, descending=True),
+    ], response, cursor, limit)
     
     # Parse questions JSON
     for quiz in quizzes:
@@ -55,58 +62,77 @@ def create_quiz(
     return db_quiz
 
 
-@router.post("/generate", response_model=QuizResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/generate", response_model=QuizJobResponse, status_code=status.HTTP_202_ACCEPTED)
 def generate_quiz(
-    request: dict,
+    request: QuizGenerateRequest,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Generate a quiz automatically from class syllabus"""
-    class_id = request.get("class_id")
-    num_questions = request.get("num_questions", 5)
+    """Queue quiz generation from a class syllabus (poll /quizzes/jobs/{job_id})"""
     cls = db.query(models.Class).filter(
-        models.Class.id == class_id,
+        models.Class.id == request.class_id,
         models.Class.user_id == current_user.id
     ).first()
     
     if not cls:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Class not found")
     
-    # Get user settings for context
-    settings = db.query(models.UserSettings).filter(
-        models.UserSettings.user_id == current_user.id
-    ).first()
-    
-    survey_data = None
-    if settings and settings.survey_responses:
-        if isinstance(settings.survey_responses, str):
-            survey_data = json.loads(settings.survey_responses)
-        else:
-            survey_data = settings.survey_responses
-    
-    # Generate quiz using AI
-    questions = generate_quiz_from_syllabus(
-        cls.syllabus_content or "",
-        cls.name,
-        num_questions,
-        survey_data
+    job = models.QuizJob(
+        user_id=current_user.id,
+        class_id=cls.id,
+        num_questions=request.num_questions,
+        status=jobs.QUEUED
     )
-    
-    quiz_dict = {
-        "title": f"Quiz: {cls.name}",
-        "description": f"Auto-generated quiz for {cls.name}",
-        "questions": json.dumps([q.dict() for q in questions]),
-        "class_id": class_id
-    }
-    
-    db_quiz = models.Quiz(user_id=current_user.id, **quiz_dict)
-    db.add(db_quiz)
+    db.add(job)
     db.commit()
-    db.refresh(db_quiz)
+    db.refresh(job)
     
-    db_quiz.questions = json.loads(db_quiz.questions)
+    jobs.quiz_jobs.submit(job.id)
+    return job
+
+
+def _get_job(db: Session, job_id: int, user_id: int) -> models.QuizJob:
+    job = db.query(models.QuizJob).filter(
+        models.QuizJob.id == job_id,
+        models.QuizJob.user_id == user_id
+    ).first()
     
-    return db_quiz
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz job not found")
+    
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=QuizJobResponse)
+def get_quiz_job(
+    job_id: int,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status of a quiz generation job"""
+    return _get_job(db, job_id, current_user.id)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=QuizJobResponse)
+def cancel_quiz_job(
+    job_id: int,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cancel a queued or running quiz generation job"""
+    job = _get_job(db, job_id, current_user.id)
+    
+    if job.status in jobs.ACTIVE_STATUSES:
+        db.execute(
+            update(models.QuizJob)
+            .where(models.QuizJob.id == job.id, models.QuizJob.status.in_(jobs.ACTIVE_STATUSES))
+            .values(status=jobs.CANCELLED, finished_at=datetime.utcnow())
+        )
+        db.commit()
+        jobs.quiz_jobs.cancel(job.id)
+        db.refresh(job)
+    
+    return job
 
 
 @router.get("/{quiz_id}", response_model=QuizResponse)
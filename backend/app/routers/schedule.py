@@ -1,27 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app import models, auth
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+from app import ai_service, calendar_feed, free_busy, models, auth, rollups, schedule_batches, syllabus
 from app.database import get_db
-from app.schemas_advanced import StudyScheduleCreate, StudyScheduleResponse
+from app.pagination import SortKey, limit_param, paginate
+from app.schemas_advanced import CalendarTokenResponse, FreeBusyResponse, StudyScheduleCreate, StudyScheduleResponse
 from app.ai_service import generate_study_schedule
-from datetime import datetime
+from app.singleflight import SingleFlight
+from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/schedule", tags=["schedule"])
 
+# Concurrent requests with the same inputs share one generation
+recommendation_flights = SingleFlight()
 
-@router.get("/recommendations", response_model=List[StudyScheduleResponse])
-def get_schedule_recommendations(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get AI-generated study schedule recommendations"""
+# Longest range /schedule/free-busy expands in one request
+FREE_BUSY_MAX_DAYS = 62
+# Longest range /schedule/range returns in one request
+SCHEDULE_RANGE_MAX_DAYS = 366
+
+
+def _load_schedule_context(db: Session, user_id: int):
     # Get user's classes
-    classes = db.query(models.Class).filter(
-        models.Class.user_id == current_user.id
+    classes = db.query(models.Class).options(selectinload(models.Class.meetings)).filter(
+        models.Class.user_id == user_id
     ).all()
     
     if not classes:
@@ -32,36 +40,42 @@ def get_schedule_recommendations(
     
     # Get user settings
     settings = db.query(models.UserSettings).filter(
-        models.UserSettings.user_id == current_user.id
+        models.UserSettings.user_id == user_id
     ).first()
     
-    # Get existing tasks and pomodoros for context
+    # Get existing tasks for context
     tasks = db.query(models.Task).filter(
-        models.Task.user_id == current_user.id
+        models.Task.user_id == user_id
     ).all()
     
-    pomodoros = db.query(models.Pomodoro).filter(
-        models.Pomodoro.user_id == current_user.id
-    ).all()
+    # Only the LLM prompt mentions Pomodoro history, and only as a count
+    pomodoro_count = None
+    if ai_service.SCHEDULE_ENGINE == "llm":
+        pomodoro_count, _ = rollups.focus_totals(db, user_id)
     
-    # Generate recommendations
-    try:
-        recommendations = generate_study_schedule(classes, settings, tasks, pomodoros)
-    except Exception as e:
-        logger.error(f"Error generating schedule recommendations: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate recommendations: {str(e)}"
-        )
+    topics = syllabus.topic_summaries(db, [cls.id for cls in classes])
     
-    if not recommendations or len(recommendations) == 0:
-        logger.warning(f"No recommendations generated for user {current_user.id}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No recommendations could be generated. Please ensure you have classes added and try again."
-        )
+    # Sessions already on the calendar are busy time for new recommendations,
+    # except upcoming generated ones, which a new batch replaces
+    now = datetime.utcnow()
+    sessions = db.query(models.StudySchedule).filter(
+        models.StudySchedule.user_id == user_id,
+        models.StudySchedule.recommended_time >= now - timedelta(days=1),
+        or_(models.StudySchedule.batch_key.is_(None), models.StudySchedule.recommended_time < now)
+    ).order_by(models.StudySchedule.recommended_time).all()
+    
+    # Generated sessions that have started belong to the current batch; they are
+    # busy time for a new plan but must not change the key of the plan they're in
+    manual_sessions = [s for s in sessions if s.batch_key is None]
+    batch_key = schedule_batches.inputs_key(
+        classes, settings, tasks, pomodoro_count, topics, manual_sessions, ai_service.SCHEDULE_ENGINE
+    )
     
-    # Save recommendations to database
+    return classes, settings, tasks, pomodoro_count, topics, sessions, batch_key
+
+
+def _save_recommendations(db: Session, user_id: int, batch_key: str, recommendations: List[dict]):
+    # Save recommendations to database, replacing the previous batch
     saved_recommendations = []
     for rec in recommendations:
         try:
@@ -87,7 +101,7 @@ def get_schedule_recommendations(
                 dt = rec_time
             
             schedule = models.StudySchedule(
-                user_id=current_user.id,
+                user_id=user_id,
                 class_id=rec.get("class_id"),
                 subject=rec.get("subject", "Study Session"),
                 recommended_time=dt,
@@ -95,7 +109,6 @@ def get_schedule_recommendations(
                 priority=rec.get("priority", "Medium"),
                 reasoning=rec.get("reasoning")
             )
-            db.add(schedule)
             saved_recommendations.append(schedule)
         except Exception as e:
             logger.error(f"Error saving recommendation {rec}: {e}", exc_info=True)
@@ -108,6 +121,7 @@ def get_schedule_recommendations(
         )
     
     try:
+        schedule_batches.replace_batch(db, user_id, batch_key, saved_recommendations)
         db.commit()
         
         for schedule in saved_recommendations:
@@ -120,21 +134,157 @@ def get_schedule_recommendations(
             detail="Failed to save recommendations to database."
         )
     
-    logger.info(f"Successfully saved {len(saved_recommendations)} schedule recommendations for user {current_user.id}")
+    logger.info(f"Successfully saved {len(saved_recommendations)} schedule recommendations for user {user_id}")
     return saved_recommendations
 
 
+@router.get("/recommendations", response_model=List[StudyScheduleResponse])
+async def get_schedule_recommendations(
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get AI-generated study schedule recommendations, reusing the stored batch while inputs are unchanged"""
+    classes, settings, tasks, pomodoro_count, topics, sessions, batch_key = await run_in_threadpool(
+        _load_schedule_context, db, current_user.id
+    )
+    
+    stored = await run_in_threadpool(schedule_batches.load_batch, db, current_user.id, batch_key)
+    if stored:
+        return stored
+    
+    async def generate():
+        try:
+            recommendations = await generate_study_schedule(classes, settings, tasks, pomodoro_count or 0, topics, sessions)
+        except Exception as e:
+            logger.error(f"Error generating schedule recommendations: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to generate recommendations: {str(e)}"
+            )
+        
+        if not recommendations or len(recommendations) == 0:
+            logger.warning(f"No recommendations generated for user {current_user.id}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No recommendations could be generated. Please ensure you have classes added and try again."
+            )
+        
+        return await run_in_threadpool(_save_recommendations, db, current_user.id, batch_key, recommendations)
+    
+    return await recommendation_flights.do((current_user.id, batch_key), generate)
+
+
+@router.get("/free-busy", response_model=FreeBusyResponse)
+def get_free_busy(
+    start: datetime,
+    end: datetime,
+    day_start: str = "08:00",
+    day_end: str = "22:00",
+    min_minutes: int = Query(30, ge=5, le=24 * 60),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get busy time (class meetings and study sessions) and free windows between start and end"""
+    start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+    first, last = free_busy.parse_clock(day_start), free_busy.parse_clock(day_end)
+    if first is None or last is None or first >= last:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="day_start must be a time before day_end")
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must be after start")
+    if end - start > timedelta(days=FREE_BUSY_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range can be at most {FREE_BUSY_MAX_DAYS} days"
+        )
+    
+    busy = free_busy.busy_intervals(db, current_user.id, start, end)
+    free = free_busy.free_windows(busy, start, end, first, last, min_minutes)
+    return {
+        "start": start,
+        "end": end,
+        "busy": [{"start": b, "end": e} for b, e in busy],
+        "free": [{"start": b, "end": e} for b, e in free],
+    }
+
+
+@router.get("/range", response_model=List[StudyScheduleResponse])
+def get_schedule_range(
+    start: datetime,
+    end: datetime,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get study schedules starting in [start, end), by time"""
+    start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must be after start")
+    if end - start > timedelta(days=SCHEDULE_RANGE_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range can be at most {SCHEDULE_RANGE_MAX_DAYS} days"
+        )
+    return db.query(models.StudySchedule).filter(
+        models.StudySchedule.user_id == current_user.id,
+        models.StudySchedule.recommended_time >= start,
+        models.StudySchedule.recommended_time < end,
+    ).order_by(models.StudySchedule.recommended_time, models.StudySchedule.id).all()
+
+
+@router.post("/calendar-token", response_model=CalendarTokenResponse)
+def create_calendar_token(
+    request: Request,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create a read-only token and subscription URL for the .ics feed, revoking the previous one"""
+    token = auth.rotate_calendar_token(db, current_user.id)
+    return {"token": token, "url": str(request.url_for("get_calendar_feed").include_query_params(token=token))}
+
+
+@router.delete("/calendar-token", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_calendar_token(
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Revoke the calendar feed token so its URL stops working"""
+    auth.revoke_calendar_token(db, current_user.id)
+    return None
+
+
+@router.get("/calendar.ics")
+def get_calendar_feed(
+    token: str,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Stream study sessions, task due dates and class meetings as iCalendar (supports If-None-Match)"""
+    user = auth.get_calendar_user(token, db)
+    start, end = calendar_feed.feed_window()
+    etag = calendar_feed.feed_etag(db, user.id, start, end)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return StreamingResponse(
+        calendar_feed.iter_calendar(db, user.id, start, end),
+        media_type="text/calendar; charset=utf-8",
+        headers={**headers, "Content-Disposition": 'inline; filename="studyplanner.ics"'},
+    )
+
+
 @router.get("/", response_model=List[StudyScheduleResponse])
 def get_schedules(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = limit_param(),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all study schedules for the current user"""
-    schedules = db.query(models.StudySchedule).filter(
-        models.StudySchedule.user_id == current_user.id
-    ).order_by(models.StudySchedule.recommended_time).all()
-    
-    return schedules
+    """Get study schedules for the current user by time (see X-Next-Cursor)"""
+    query = db.query(models.StudySchedule).filter(models.StudySchedule.user_id == current_user.id)
+    return paginate(query, [
+        SortKey(models.StudySchedule.recommended_time),
+        SortKey(models.StudySchedule.id),
+    ], response, cursor, limit)
 
 
 @router.post("/", response_model=StudyScheduleResponse, status_code=status.HTTP_201_CREATED)
@@ -1,24 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app import models, schemas, auth
 from app.database import get_db
+from app.pagination import SortKey, limit_param, paginate, skip_param
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
 @router.get("/", response_model=List[schemas.TaskResponse])
 def get_tasks(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = limit_param(),
+    skip: Optional[int] = skip_param(),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all tasks for the current user"""
-    tasks = db.query(models.Task).filter(
-        models.Task.user_id == current_user.id
-    ).order_by(models.Task.order_index, models.Task.created_at).offset(skip).limit(limit).all()
-    return tasks
+    """Get tasks for the current user, one page at a time (see X-Next-Cursor)"""
+    query = db.query(models.Task).filter(models.Task.user_id == current_user.id)
+    return paginate(query, [
+        SortKey(models.Task.order_index),
+        SortKey(models.Task.created_at),
+        SortKey(models.Task.id),
+    ], response, cursor, limit, skip)
 
 
 @router.post("/", response_model=schemas.TaskResponse, status_code=status.HTTP_201_CREATED)
@@ -1,21 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app import models, schemas, auth
 from app.database import get_db
-from datetime import timedelta
+from app.hashing import password_hasher
+from app import google_auth
 import httpx
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
+def _create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    db_user = models.User(
+        email=user.email,
+        name=user.name,
+        hashed_password=hashed_password,
+        google_id=user.google_id
+    )
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
 @router.post("/register", response_model=schemas.UserResponse)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
-    db_user = auth.get_user_by_email(db, email=user.email)
+    db_user = await run_in_threadpool(auth.get_user_by_email, db, user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -24,104 +35,102 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     
     hashed_password = None
     if user.password:
-        hashed_password = auth.get_password_hash(user.password)
+        hashed_password = await password_hasher.hash(user.password)
     
-    db_user = models.User(
-        email=user.email,
-        name=user.name,
-        hashed_password=hashed_password,
-        google_id=user.google_id
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await run_in_threadpool(_create_user, db, user, hashed_password)
 
 
 @router.post("/login", response_model=schemas.Token)
-def login(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def login(user: schemas.UserCreate, db: Session = Depends(get_db)):
     """Login with email and password"""
-    authenticated_user = auth.authenticate_user(db, user.email, user.password or "")
-    if not authenticated_user:
+    authenticated_user = await run_in_threadpool(auth.get_user_by_email, db, user.email)
+    password_ok = bool(authenticated_user and authenticated_user.hashed_password) and await password_hasher.verify(
+        user.password or "", authenticated_user.hashed_password
+    )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=30)
-    access_token = auth.create_access_token(
-        data={"sub": authenticated_user.email}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return auth.issue_tokens(authenticated_user.email)
+
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh(request: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token and rotated refresh token"""
+    return auth.rotate_refresh_token(db, request.refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(request: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    """Revoke a refresh token and every token rotated from it"""
+    try:
+        payload = auth.decode_refresh_token(request.refresh_token)
+    except HTTPException:
+        # Expired or malformed tokens are already unusable
+        return None
+    auth.revoke_refresh_family(db, payload["fam"])
+    return None
+
+
+def _get_or_create_google_user(db: Session, google_id: str, email: str, name: str):
+    # Check if user exists by Google ID
+    db_user = auth.get_user_by_google_id(db, google_id=google_id)
+    
+    if not db_user:
+        # Check if user exists by email
+        db_user = auth.get_user_by_email(db, email=email)
+        if db_user:
+            # Link Google account to existing user
+            db_user.google_id = google_id
+            db.commit()
+            db.refresh(db_user)
+        else:
+            # Create new user
+            db_user = models.User(
+                email=email,
+                name=name,
+                google_id=google_id
+            )
+            db.add(db_user)
+            db.commit()
+            db.refresh(db_user)
+    return db_user
 
 
 @router.post("/google-signin", response_model=schemas.Token)
 async def google_signin(request: dict, db: Session = Depends(get_db)):
-    """Sign in with Google OAuth token"""
-    token = request.get("token") or request.get("access_token")
-    if not token:
+    """Sign in with a Google ID token (verified locally) or OAuth access token"""
+    if not any(request.get(field) for field in ("token", "access_token", "id_token", "credential")):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Token is required"
         )
-    GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
     
     try:
-        # Verify Google token
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://www.googleapis.com/oauth2/v1/userinfo?access_token={token}"
-            )
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid Google token"
-                )
-            
-            google_user = response.json()
-            google_id = google_user.get("id")
-            email = google_user.get("email")
-            name = google_user.get("name")
-            
-            if not email:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Email not provided by Google"
-                )
-            
-            # Check if user exists by Google ID
-            db_user = auth.get_user_by_google_id(db, google_id=google_id)
-            
-            if not db_user:
-                # Check if user exists by email
-                db_user = auth.get_user_by_email(db, email=email)
-                if db_user:
-                    # Link Google account to existing user
-                    db_user.google_id = google_id
-                    db.commit()
-                    db.refresh(db_user)
-                else:
-                    # Create new user
-                    db_user = models.User(
-                        email=email,
-                        name=name,
-                        google_id=google_id
-                    )
-                    db.add(db_user)
-                    db.commit()
-                    db.refresh(db_user)
-            
-            access_token_expires = timedelta(minutes=30)
-            access_token = auth.create_access_token(
-                data={"sub": db_user.email}, expires_delta=access_token_expires
-            )
-            return {"access_token": access_token, "token_type": "bearer"}
-            
+        google_user = await google_auth.resolve_identity(request)
+    except google_auth.GoogleAuthError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid Google token"
+        )
     except httpx.HTTPError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Failed to verify Google token"
         )
+    
+    if not google_user["email"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email not provided by Google"
+        )
+    
+    db_user = await run_in_threadpool(
+        _get_or_create_google_user, db, google_user["id"], google_user["email"], google_user["name"]
+    )
+    return auth.issue_tokens(db_user.email)
 
 
 @router.get("/me", response_model=schemas.UserResponse)
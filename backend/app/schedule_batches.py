@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app import models
+
+load_dotenv()
+
+# Generated recommendations older than this are deleted; manual sessions are kept
+SCHEDULE_RETENTION_DAYS = int(os.getenv("SCHEDULE_RETENTION_DAYS", "30"))
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.replace(tzinfo=None).isoformat() if value else None
+
+
+def inputs_key(
+    classes: List[models.Class],
+    settings: Optional[models.UserSettings],
+    tasks: List[models.Task],
+    pomodoro_count: Optional[int],
+    syllabus_topics: Dict,
+    manual_sessions: List[models.StudySchedule],
+    engine: str,
+    today: Optional[str] = None,
+) -> str:
+    """Hash of everything a recommendation batch is generated from.
+
+    Recommendations are planned from today onwards, so the date is part of
+    the key. Only manually added sessions count: a batch's own sessions
+    passing their start time must not invalidate it. Pomodoro counts only
+    reach the LLM prompt, so the local engine ignores them and a new
+    Pomodoro session doesn't invalidate its batch.
+    """
+    inputs = {
+        "engine": engine,
+        "today": today or datetime.utcnow().date().isoformat(),
+        "classes": [[c.id, c.name, c.subject, c.schedule] for c in sorted(classes, key=lambda c: c.id)],
+        "topics": {str(k): v for k, v in sorted((syllabus_topics or {}).items())},
+        "settings": [
+            settings.preferred_study_times, settings.preferred_study_days,
+            settings.focus_habits, settings.study_duration_preference,
+        ] if settings else None,
+        "task_count": len(tasks),
+        "due_tasks": sorted(
+            [t.id, t.title, t.category, t.priority, _iso(t.due_date)]
+            for t in tasks if not t.completed and t.due_date is not None
+        ),
+        "busy": sorted([s.id, _iso(s.recommended_time), s.duration_minutes] for s in manual_sessions),
+    }
+    if engine == "llm":
+        inputs["pomodoro_count"] = pomodoro_count
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def load_batch(db: Session, user_id: int, batch_key: str) -> List[models.StudySchedule]:
+    """The stored recommendations generated from ``batch_key``, in time order"""
+    return db.query(models.StudySchedule).filter(
+        models.StudySchedule.user_id == user_id,
+        models.StudySchedule.batch_key == batch_key,
+    ).order_by(models.StudySchedule.recommended_time, models.StudySchedule.id).all()
+
+
+def replace_batch(db: Session, user_id: int, batch_key: str, rows: List[models.StudySchedule]) -> None:
+    """Swap the user's upcoming generated sessions for ``rows`` in one transaction.
+
+    Past recommendations from earlier batches stay as history until they
+    age out; manual sessions (no batch key) are never touched. The caller
+    commits.
+    """
+    now = datetime.utcnow()
+    db.query(models.StudySchedule).filter(
+        models.StudySchedule.user_id == user_id,
+        models.StudySchedule.batch_key.isnot(None),
+        or_(models.StudySchedule.batch_key == batch_key, models.StudySchedule.recommended_time >= now),
+    ).delete(synchronize_session=False)
+    prune_expired(db, user_id)
+    for row in rows:
+        row.batch_key = batch_key
+        db.add(row)
+
+
+def prune_expired(db: Session, user_id: Optional[int] = None, retention_days: int = SCHEDULE_RETENTION_DAYS) -> int:
+    """Delete generated recommendations more than ``retention_days`` in the past"""
+    query = db.query(models.StudySchedule).filter(
+        models.StudySchedule.batch_key.isnot(None),
+        models.StudySchedule.recommended_time < datetime.utcnow() - timedelta(days=retention_days),
+    )
+    if user_id is not None:
+        query = query.filter(models.StudySchedule.user_id == user_id)
+    return query.delete(synchronize_session=False)
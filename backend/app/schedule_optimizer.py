@@ -0,0 +1,303 @@
+import bisect
+import heapq
+import json
+import os
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from app import models
+from app.free_busy import WEEKDAYS, expand_meetings, parse_clock
+
+load_dotenv()
+
+# Days ahead that recommendations cover
+SCHEDULE_HORIZON_DAYS = int(os.getenv("SCHEDULE_HORIZON_DAYS", "7"))
+SCHEDULE_MAX_SESSIONS_PER_DAY = int(os.getenv("SCHEDULE_MAX_SESSIONS_PER_DAY", "3"))
+
+BASE_SESSIONS_PER_CLASS = 2
+MAX_SESSIONS_PER_CLASS = 4
+DEFAULT_STUDY_TIMES = ["09:00", "14:00", "19:00"]
+DEFAULT_STUDY_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+# Hours tried, after the preferred times, when those are taken
+FALLBACK_HOURS = range(8, 22)
+PRIORITY_WEIGHTS = {"High": 3.0, "Medium": 2.0, "Low": 1.0}
+
+
+def _json_list(value: Optional[str], default: List[str]) -> List[str]:
+    try:
+        parsed = json.loads(value) if value else None
+    except (TypeError, ValueError):
+        parsed = None
+    return parsed if isinstance(parsed, list) and parsed else default
+
+
+class _Calendar:
+    """Non-overlapping busy intervals kept sorted by start, for O(log n) conflict checks"""
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+
+    def add(self, start: datetime, end: datetime) -> None:
+        i = bisect.bisect_left(self.starts, start)
+        # Merge with any neighbours it touches so intervals stay disjoint
+        while i > 0 and self.ends[i - 1] >= start:
+            i -= 1
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[i])
+            del self.starts[i], self.ends[i]
+        while i < len(self.starts) and self.starts[i] <= end:
+            end = max(end, self.ends[i])
+            del self.starts[i], self.ends[i]
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        i = bisect.bisect_left(self.starts, end)
+        return i == 0 or self.ends[i - 1] <= start
+
+    def next_free(self, start: datetime, length: timedelta, latest: datetime) -> Optional[datetime]:
+        """Earliest start at or after ``start`` with ``length`` free, ending by ``latest``"""
+        while start + length <= latest:
+            i = bisect.bisect_left(self.starts, start + length)
+            if i == 0 or self.ends[i - 1] <= start:
+                return start
+            start = self.ends[i - 1]
+        return None
+
+
+def _matches(task: models.Task, cls: models.Class) -> bool:
+    names = {n.lower() for n in (cls.name, cls.subject) if n}
+    text = f"{task.category or ''} {task.title or ''}".lower()
+    return any(name in text for name in names)
+
+
+def _naive(value: datetime) -> datetime:
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+def plan_study_sessions(
+    classes: List[models.Class],
+    user_settings: Optional[models.UserSettings],
+    tasks: Iterable[models.Task],
+    existing_sessions: Iterable[models.StudySchedule] = (),
+    now: Optional[datetime] = None,
+    horizon_days: int = SCHEDULE_HORIZON_DAYS,
+) -> List[Dict]:
+    """Place study sessions for each class into free time over the next ``horizon_days``.
+
+    Class meetings and already scheduled sessions are busy time. Each class
+    gets BASE_SESSIONS_PER_CLASS sessions plus one per incomplete task due in
+    the horizon (up to MAX_SESSIONS_PER_CLASS); tasks are matched to a class
+    by its name or subject in the task's category or title. A priority queue
+    hands out slots most-urgent class first, preferring the user's study
+    times and days, keeping a class's sessions on different days spaced
+    across the horizon, and before its earliest due date where possible.
+    """
+    now = _naive(now or datetime.utcnow())
+    horizon_end = now + timedelta(days=horizon_days)
+    duration = timedelta(minutes=(user_settings.study_duration_preference if user_settings else None) or 60)
+    preferred_times = [
+        t for t in (parse_clock(v) for v in _json_list(
+            user_settings.preferred_study_times if user_settings else None, DEFAULT_STUDY_TIMES))
+        if t is not None
+    ] or [parse_clock(v) for v in DEFAULT_STUDY_TIMES]
+    preferred_days = {
+        WEEKDAYS.index(d.lower()) for d in _json_list(
+            user_settings.preferred_study_days if user_settings else None, DEFAULT_STUDY_DAYS)
+        if isinstance(d, str) and d.lower() in WEEKDAYS
+    } or set(range(5))
+
+    busy = _Calendar()
+    for cls in classes:
+        for begin, end in expand_meetings(cls.meetings, now, horizon_end):
+            busy.add(begin, end)
+    day_load: Dict = {}
+    for session in existing_sessions:
+        begin = _naive(session.recommended_time)
+        if now - timedelta(days=1) <= begin <= horizon_end:
+            busy.add(begin, begin + timedelta(minutes=session.duration_minutes or 60))
+            day_load[begin.date()] = day_load.get(begin.date(), 0) + 1
+
+    # Candidate slots, best first: preferred days and times, then other hours
+    candidates = []
+    for offset in range(horizon_days + 1):
+        day = now.date() + timedelta(days=offset)
+        preferred_day = day.weekday() in preferred_days
+        hours = [(t, 0) for t in preferred_times] + [
+            (time(h), 1) for h in FALLBACK_HOURS if time(h) not in preferred_times
+        ]
+        for start_time, rank in hours:
+            start = datetime.combine(day, start_time)
+            if now < start and start + duration <= horizon_end:
+                candidates.append((rank + (0 if preferred_day else 2), start))
+    candidates.sort()
+
+    open_tasks = [t for t in tasks if not t.completed and t.due_date is not None]
+    demand = []
+    for cls in classes:
+        due = sorted(
+            ((_naive(t.due_date), t) for t in open_tasks
+             if _matches(t, cls) and now <= _naive(t.due_date) <= horizon_end + timedelta(days=horizon_days)),
+            key=lambda item: item[0],
+        )
+        weight = sum(
+            PRIORITY_WEIGHTS.get(t.priority, 2.0) / (1 + (due_at - now).total_seconds() / 86400)
+            for due_at, t in due
+        )
+        in_horizon = sum(1 for due_at, _ in due if due_at <= horizon_end)
+        demand.append({
+            "weight": weight,
+            "sessions": min(MAX_SESSIONS_PER_CLASS, BASE_SESSIONS_PER_CLASS + in_horizon),
+            "deadline": due[0][0] if due else None,
+            "due_count": len(due),
+            "placed": [],
+        })
+
+    queue = [(-d["weight"], index) for index, d in enumerate(demand)]
+    heapq.heapify(queue)
+    recommendations = []
+    while queue:
+        neg_weight, index = heapq.heappop(queue)
+        cls, need = classes[index], demand[index]
+        remaining = need["sessions"] - len(need["placed"])
+        slot = _pick_slot(candidates, busy, day_load, need, duration, now, horizon_end, remaining)
+        if slot is None:
+            continue
+        busy.add(slot, slot + duration)
+        day_load[slot.date()] = day_load.get(slot.date(), 0) + 1
+        need["placed"].append(slot)
+        recommendations.append(_recommendation(cls, slot, duration, need, len(need["placed"])))
+        if remaining > 1:
+            # Later sessions of a class compete with other classes' first ones
+            heapq.heappush(queue, (neg_weight / 2, index))
+
+    recommendations.sort(key=lambda r: r["recommended_time"])
+    return recommendations
+
+
+def _pick_slot(candidates, busy, day_load, need, duration, now, horizon_end, remaining) -> Optional[datetime]:
+    placed = need["placed"]
+    used_days = {slot.date() for slot in placed}
+    deadline = need["deadline"]
+    # Spread what is left of this class's sessions over the time remaining
+    earliest = now
+    if placed:
+        window_end = min(deadline, horizon_end) if deadline and deadline > now else horizon_end
+        last = max(placed)
+        earliest = last + (window_end - last) / (remaining + 1)
+
+    def usable(start, strict):
+        end = start + duration
+        if not busy.is_free(start, end):
+            return False
+        if strict:
+            if start.date() in used_days or day_load.get(start.date(), 0) >= SCHEDULE_MAX_SESSIONS_PER_DAY:
+                return False
+            if start < earliest - timedelta(hours=12):
+                return False
+            if deadline and end > deadline and deadline > now + duration:
+                return False
+        return True
+
+    for strict in (True, False):
+        for _, start in candidates:
+            if usable(start, strict):
+                return start
+    return None
+
+
+def _recommendation(cls, slot: datetime, duration: timedelta, need: Dict, number: int) -> Dict:
+    name = cls.name or cls.subject or "Study Session"
+    reasons = [f"Free {slot.strftime('%A %H:%M')} slot outside your classes and planned sessions."]
+    if need["due_count"]:
+        reasons.append(
+            f"{need['due_count']} task{'s' if need['due_count'] != 1 else ''} due soon, "
+            f"the first on {need['deadline'].strftime('%a %b %d')}."
+        )
+    if number > 1:
+        reasons.append(f"Session {number} of {need['sessions']}, spaced from the last for better retention.")
+    urgent = need["deadline"] is not None and need["deadline"] - slot <= timedelta(days=3)
+    return {
+        "class_id": cls.id,
+        "subject": name,
+        "recommended_time": slot.isoformat(),
+        "duration_minutes": int(duration.total_seconds() // 60),
+        "priority": "High" if urgent or (number == 1 and need["due_count"]) else ("Medium" if number <= 2 else "Low"),
+        "reasoning": " ".join(reasons),
+    }
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return _naive(value)
+    try:
+        return _naive(datetime.fromisoformat(str(value).replace("Z", "+00:00")))
+    except ValueError:
+        return None
+
+
+def fit_sessions(
+    sessions: List[Dict],
+    plan: List[Dict],
+    classes: List[models.Class],
+    existing_sessions: Iterable[models.StudySchedule] = (),
+) -> List[Dict]:
+    """Make sessions planned class by class fit together.
+
+    ``sessions`` mixes LLM answers with sessions taken from the local
+    ``plan``; the planned ones already avoid class meetings, existing
+    sessions and each other, so they are placed first. The rest are placed
+    in time order: one that overlaps anything placed so far moves to the
+    next free time that day, else is replaced by an unused planned session
+    of its class, else is dropped.
+    """
+    planned = {id(rec) for rec in plan}
+    timed = []
+    for rec in sessions:
+        start = _parse_time(rec.get("recommended_time"))
+        if start is None:
+            continue
+        timed.append((id(rec) not in planned, start, rec))
+    if not timed:
+        return []
+    timed.sort(key=lambda item: (item[0], item[1]))
+
+    window_start = min(start for _, start, _ in timed) - timedelta(days=1)
+    window_end = max(start for _, start, _ in timed) + timedelta(days=2)
+    busy = _Calendar()
+    for cls in classes:
+        for begin, end in expand_meetings(cls.meetings, window_start, window_end):
+            busy.add(begin, end)
+    for session in existing_sessions:
+        begin = _naive(session.recommended_time)
+        busy.add(begin, begin + timedelta(minutes=session.duration_minutes or 60))
+
+    used = {id(rec) for _, _, rec in timed}
+    spare: Dict = {}
+    for rec in plan:
+        if id(rec) not in used:
+            spare.setdefault(rec["class_id"], []).append(rec)
+
+    def span(rec: Dict):
+        start = _parse_time(rec["recommended_time"])
+        return start, start + timedelta(minutes=int(rec.get("duration_minutes") or 60))
+
+    fitted = []
+    for _, _, rec in timed:
+        start, end = span(rec)
+        if not busy.is_free(start, end):
+            latest = datetime.combine(start.date(), time(FALLBACK_HOURS.stop))
+            moved = busy.next_free(start, end - start, latest)
+            if moved is not None:
+                rec = dict(rec, recommended_time=moved.isoformat())
+            else:
+                rec = next((alt for alt in spare.get(rec.get("class_id"), []) if busy.is_free(*span(alt))), None)
+                if rec is None:
+                    continue
+                spare[rec["class_id"]].remove(rec)
+            start, end = span(rec)
+        busy.add(start, end)
+        fitted.append(rec)
+    fitted.sort(key=lambda rec: _parse_time(rec["recommended_time"]))
+    return fitted
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 
 
 class UserSettingsBase(BaseModel):
@@ -101,6 +101,26 @@ class QuizResponse(BaseModel):
         from_attributes = True
 
 
+class QuizGenerateRequest(BaseModel):
+    class_id: int
+    num_questions: int = Field(5, ge=1, le=50)
+
+
+class QuizJobResponse(BaseModel):
+    id: int
+    class_id: int
+    num_questions: int
+    status: str
+    quiz_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class StudyScheduleBase(BaseModel):
     class_id: Optional[int] = None
     subject: str
@@ -123,6 +143,23 @@ class StudyScheduleResponse(StudyScheduleBase):
         from_attributes = True
 
 
+class TimeWindow(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class FreeBusyResponse(BaseModel):
+    start: datetime
+    end: datetime
+    busy: List[TimeWindow]
+    free: List[TimeWindow]
+
+
+class CalendarTokenResponse(BaseModel):
+    token: str
+    url: str
+
+
 class AnalyticsResponse(BaseModel):
     total_study_hours: float
     average_session_length: float
@@ -132,3 +169,16 @@ class AnalyticsResponse(BaseModel):
     completion_rate: float
     recommendations: List[str]
 
+
+
+class DailyFocus(BaseModel):
+    date: date
+    sessions: int
+    focus_minutes: int
+
+
+class FocusSummaryResponse(BaseModel):
+    total_sessions: int
+    total_focus_minutes: int
+    streak_days: int
+    daily: List[DailyFocus]
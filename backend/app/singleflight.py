@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlightTimeout(TimeoutError):
+    """A caller gave up waiting on another caller's in-flight work"""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key starts ``fn()`` as a task; callers that arrive
+    while it is running wait up to ``timeout`` seconds for its result (or
+    exception) instead of repeating the work. The task is shielded, so it
+    finishes even if every caller waiting on it goes away.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None
+    ) -> Any:
+        task = self._tasks.get(key)
+        if task is not None and task.get_loop() is not asyncio.get_running_loop():
+            # Left over from an event loop that is gone
+            task = None
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+            return await asyncio.shield(task)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise SingleFlightTimeout(f"Timed out waiting for in-flight call {key!r}")
+        self.shared += 1
+        return result
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "executions": self.executions,
+            "shared": self.shared,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,39 @@
+from sqlalchemy import Date, Integer, cast, func
+
+# Index matches SQL day-of-week numbering (0 = Sunday)
+WEEKDAY_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def _dialect(db) -> str:
+    """Dialect name for a Session or Connection"""
+    dialect = getattr(db, "dialect", None) or db.get_bind().dialect
+    return dialect.name
+
+
+def utc_of(db, column):
+    """A timezone-aware timestamp column as naive UTC; PostgreSQL would
+    otherwise read it in the session time zone"""
+    if _dialect(db) == "postgresql":
+        return func.timezone("UTC", column)
+    return column
+
+
+def date_of(db, column):
+    """Calendar date of a timestamp column"""
+    if _dialect(db) == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+
+def weekday_of(db, column):
+    """Day of week of a timestamp column as an integer, 0 = Sunday"""
+    if _dialect(db) == "sqlite":
+        return cast(func.strftime("%w", column), Integer)
+    return cast(func.extract("dow", column), Integer)
+
+
+def hour_of(db, column):
+    """Hour of day (0-23) of a timestamp column"""
+    if _dialect(db) == "sqlite":
+        return cast(func.strftime("%H", column), Integer)
+    return cast(func.extract("hour", column), Integer)
@@ -0,0 +1,262 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import delete, event, exists, insert, inspect, select
+from sqlalchemy.orm import Session
+from app import models
+
+load_dotenv()
+
+# Longest chunk stored; longer sections are split on paragraph/sentence breaks
+SYLLABUS_CHUNK_CHARS = int(os.getenv("SYLLABUS_CHUNK_CHARS", "1200"))
+# Syllabus text allowed in one quiz prompt
+SYLLABUS_PROMPT_TOKENS = int(os.getenv("SYLLABUS_PROMPT_TOKENS", "1500"))
+KEYWORDS_PER_CHUNK = 10
+
+Chunk = models.SyllabusChunk
+
+_HEADING = re.compile(
+    r"^\s*(?:"
+    r"#{1,6}\s+\S.*"                                                            # markdown heading
+    r"|(?i:week|unit|module|chapter|lecture|lesson|topic|part|section)\s*[\dIVXivx]+\b.*"  # Week 3: ...
+    r"|[A-Z][\w ,&/()'-]{1,60}:"                                                # Title-cased label ending in ':'
+    r")\s*$"
+)
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]{2,}")
+_STOPWORDS = frozenset("""
+    the and for with from that this these those into onto over under about above below between
+    are was were been being have has had not but any all can will would should could may might
+    must shall our your their its his her they them you she him who whom what which when where
+    why how than then there here also such each other some more most very just only own same
+    both few off out too via per use used using students student course class classes week
+    weeks unit units module modules chapter chapters lecture lectures lesson lessons topic topics
+    part section read reading readings due assignment assignments introduction overview review
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+def _split_long(text: str, limit: int) -> List[str]:
+    """Split ``text`` into pieces of at most ``limit`` characters on natural breaks"""
+    if len(text) <= limit:
+        return [text]
+    units = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    if len(units) == 1:
+        units = re.split(r"(?<=[.!?])\s+", text)
+    pieces, current = [], ""
+    for unit in units:
+        while len(unit) > limit:
+            # A single paragraph/sentence longer than the limit: hard cut
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(unit[:limit])
+            unit = unit[limit:]
+        candidate = f"{current}\n{unit}" if current else unit
+        if len(candidate) > limit:
+            pieces.append(current)
+            current = unit
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return [piece.strip() for piece in pieces if piece.strip()]
+
+
+def extract_keywords(text: str, heading: Optional[str] = None, limit: int = KEYWORDS_PER_CHUNK) -> List[str]:
+    """Most frequent non-trivial words, with heading words counting double"""
+    counts: Counter = Counter()
+    first_seen: Dict[str, int] = {}
+    for weight, source in ((2, heading or ""), (1, text)):
+        for word in _WORD.findall(source):
+            word = word.lower().strip("'-")
+            if len(word) < 3 or word in _STOPWORDS:
+                continue
+            counts[word] += weight
+            first_seen.setdefault(word, len(first_seen))
+    return sorted(counts, key=lambda w: (-counts[w], first_seen[w]))[:limit]
+
+
+def chunk_syllabus(text: Optional[str], max_chars: int = SYLLABUS_CHUNK_CHARS) -> List[Dict]:
+    """Split syllabus text into headed sections of at most ``max_chars``"""
+    sections = []
+    heading, lines = None, []
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body or heading:
+            sections.append((heading, body or heading))
+
+    for line in (text or "").splitlines():
+        if _HEADING.match(line) and line.strip():
+            flush()
+            heading, lines = line.strip().lstrip("#").strip().rstrip(":").strip(), []
+        else:
+            lines.append(line)
+    flush()
+
+    chunks = []
+    for heading, body in sections:
+        for piece in _split_long(body, max_chars):
+            chunks.append({
+                "position": len(chunks),
+                "heading": heading,
+                "content": piece,
+                "keywords": extract_keywords(piece, heading),
+                "token_estimate": estimate_tokens(piece),
+            })
+    return chunks
+
+
+def _chunk_rows(class_id: int, syllabus_content: Optional[str]) -> List[Dict]:
+    rows = []
+    for chunk in chunk_syllabus(syllabus_content):
+        rows.append({
+            "class_id": class_id,
+            "position": chunk["position"],
+            "heading": chunk["heading"],
+            "content": chunk["content"],
+            "keywords": json.dumps(chunk["keywords"]),
+            "token_estimate": chunk["token_estimate"],
+        })
+    return rows
+
+
+def _reindex(connection, class_id: int, syllabus_content: Optional[str]) -> None:
+    connection.execute(delete(Chunk).where(Chunk.class_id == class_id))
+    rows = _chunk_rows(class_id, syllabus_content)
+    if rows:
+        connection.execute(insert(Chunk), rows)
+
+
+@event.listens_for(models.Class, "after_insert")
+def _class_inserted(mapper, connection, target):
+    if target.syllabus_content:
+        _reindex(connection, target.id, target.syllabus_content)
+
+
+@event.listens_for(models.Class, "after_update")
+def _class_updated(mapper, connection, target):
+    if inspect(target).attrs.syllabus_content.history.has_changes():
+        _reindex(connection, target.id, target.syllabus_content)
+
+
+@event.listens_for(models.Class, "before_delete")
+def _class_deleted(mapper, connection, target):
+    connection.execute(delete(Chunk).where(Chunk.class_id == target.id))
+
+
+def index_missing(db: Session) -> int:
+    """Chunk classes whose syllabus predates the index; returns how many"""
+    classes = db.execute(
+        select(models.Class.id, models.Class.syllabus_content).where(
+            models.Class.syllabus_content.isnot(None),
+            models.Class.syllabus_content != "",
+            ~exists().where(Chunk.class_id == models.Class.id),
+        )
+    ).all()
+    for class_id, syllabus_content in classes:
+        _reindex(db.connection(), class_id, syllabus_content)
+    db.commit()
+    return len(classes)
+
+
+def load_chunks(db: Session, class_id: int) -> List[Dict]:
+    """A class's chunks in syllabus order, as plain dicts safe to use off-session"""
+    rows = db.query(Chunk).filter(Chunk.class_id == class_id).order_by(Chunk.position).all()
+    return [
+        {
+            "position": row.position,
+            "heading": row.heading,
+            "content": row.content,
+            "keywords": json.loads(row.keywords or "[]"),
+            "token_estimate": row.token_estimate or estimate_tokens(row.content),
+        }
+        for row in rows
+    ]
+
+
+def _render(chunk: Dict) -> str:
+    heading = chunk.get("heading")
+    if heading and not chunk["content"].startswith(heading):
+        return f"{heading}\n{chunk['content']}"
+    return chunk["content"]
+
+
+def select_chunks(chunks: List[Dict], token_budget: int = SYLLABUS_PROMPT_TOKENS) -> str:
+    """Syllabus text for a prompt: every chunk if they fit, otherwise the chunks
+    that cover the most distinct keywords per token, in syllabus order"""
+    if not chunks:
+        return ""
+    rendered = {chunk["position"]: _render(chunk) for chunk in chunks}
+    if sum(estimate_tokens(text) for text in rendered.values()) <= token_budget:
+        return "\n\n".join(rendered[c["position"]] for c in chunks)
+
+    chosen, covered, used = [], set(), 0
+    remaining = list(chunks)
+    while remaining:
+        def gain(chunk):
+            new = len(set(chunk["keywords"]) - covered)
+            return (new / max(1, estimate_tokens(rendered[chunk["position"]])), -chunk["position"])
+        best = max(remaining, key=gain)
+        remaining.remove(best)
+        cost = estimate_tokens(rendered[best["position"]])
+        if used + cost > token_budget:
+            continue
+        chosen.append(best)
+        covered.update(best["keywords"])
+        used += cost
+    if not chosen:
+        # Even the best chunk is over budget on its own; send its beginning
+        return rendered[chunks[0]["position"]][: token_budget * 4]
+    return "\n\n".join(rendered[c["position"]] for c in sorted(chosen, key=lambda c: c["position"]))
+
+
+def partition_chunks(chunks: List[Dict], parts: int) -> List[List[Dict]]:
+    """Split chunks into ``parts`` contiguous groups of similar size; with fewer
+    chunks than parts the groups repeat"""
+    if not chunks:
+        return [[] for _ in range(parts)]
+    target = sum(c["token_estimate"] for c in chunks) / parts
+    groups, current, size = [], [], 0
+    for i, chunk in enumerate(chunks):
+        current.append(chunk)
+        size += chunk["token_estimate"]
+        chunks_left = len(chunks) - i - 1
+        groups_left = parts - len(groups) - 1
+        if size >= target and groups_left > 0 and chunks_left >= groups_left:
+            groups.append(current)
+            current, size = [], 0
+    if current:
+        groups.append(current)
+    return [groups[i % len(groups)] for i in range(parts)]
+
+
+def topic_summary(chunks: Iterable[Dict], max_topics: int = 8, max_keywords: int = 10) -> Dict[str, List[str]]:
+    """Compact description of a syllabus for schedule prompts"""
+    chunks = list(chunks)
+    topics = list(dict.fromkeys(c["heading"] for c in chunks if c.get("heading")))[:max_topics]
+    counts: Counter = Counter()
+    for chunk in chunks:
+        counts.update(chunk["keywords"])
+    return {"topics": topics, "keywords": [word for word, _ in counts.most_common(max_keywords)]}
+
+
+def topic_summaries(db: Session, class_ids: List[int]) -> Dict[int, Dict[str, List[str]]]:
+    """``topic_summary`` for several classes in one query"""
+    by_class: Dict[int, List[Dict]] = {class_id: [] for class_id in class_ids}
+    rows = (
+        db.query(Chunk.class_id, Chunk.heading, Chunk.keywords)
+        .filter(Chunk.class_id.in_(class_ids))
+        .order_by(Chunk.class_id, Chunk.position)
+    )
+    for class_id, heading, keywords in rows:
+        by_class[class_id].append({"heading": heading, "keywords": json.loads(keywords or "[]")})
+    return {class_id: topic_summary(chunks) for class_id, chunks in by_class.items() if chunks}
@@ -0,0 +1,91 @@
+"""
+Script to load-test the AI endpoints of a running API server.
+
+Start the server against the fake LLM provider so no network is needed:
+    LLM_PROVIDER=fake FAKE_LLM_LATENCY_MS=800 FAKE_LLM_JITTER_MS=400 uvicorn app.main:app
+
+Then, with a user that has classes (see prefill_user.py):
+    python scripts/load_test_ai.py
+    python scripts/load_test_ai.py --endpoint quiz --requests 200 --concurrency 20
+"""
+
+import sys
+import argparse
+import asyncio
+import math
+import time
+from collections import Counter
+import httpx
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def build_request(endpoint, class_ids, i):
+    if endpoint == "quiz":
+        return "POST", "/quizzes/generate", {"class_id": class_ids[i % len(class_ids)], "num_questions": 5}
+    if endpoint == "schedule":
+        return "GET", "/schedule/recommendations", None
+    return "GET", "/ai/insights", None
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        login = await client.post("/users/login", json={"email": args.email, "password": args.password})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        class_ids = [c["id"] for c in (await client.get("/classes/")).json()]
+        if args.endpoint in ("quiz", "schedule") and not class_ids:
+            print("❌ User has no classes. Run scripts/prefill_user.py first.")
+            sys.exit(1)
+
+        latencies = []
+        statuses = Counter()
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(i):
+            method, path, body = build_request(args.endpoint, class_ids, i)
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        print(f"\n✓ {args.requests} {args.endpoint} requests, concurrency {args.concurrency}, {elapsed:.2f}s")
+        print(f"   Throughput: {args.requests / elapsed:.1f} req/s")
+        print(f"   Latency ms: p50 {percentile(latencies, 50):.0f}  p95 {percentile(latencies, 95):.0f}  "
+              f"p99 {percentile(latencies, 99):.0f}  max {latencies[-1]:.0f}")
+        print(f"   Responses: {dict(statuses)}")
+
+        server_stats = await client.get("/metrics")
+        if server_stats.status_code == 200:
+            print(f"   Server LLM stats: {server_stats.json().get('llm')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the AI endpoints")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--email", default="demo@example.com", help="User email")
+    parser.add_argument("--password", default="demo123", help="User password")
+    parser.add_argument("--endpoint", choices=["quiz", "schedule", "insights"], default="schedule")
+    parser.add_argument("--requests", type=int, default=100, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once")
+    parser.add_argument("--timeout", type=float, default=60, help="Client timeout per request in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
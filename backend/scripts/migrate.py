@@ -0,0 +1,31 @@
+"""
+Script to bring an existing database up to date with the current models.
+
+Creates missing tables, and any columns and indexes declared on the models
+after the database was first created. Safe to run repeatedly.
+
+Usage:
+    python scripts/migrate.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import engine
+from app.migrations import run_migrations
+
+
+def main():
+    print(f"\n🚀 Migrating database: {engine.url.render_as_string(hide_password=True)}\n")
+    created = run_migrations(engine)
+    for name in created:
+        print(f"✓ Created {name}")
+    if not created:
+        print("✓ Schema already up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Script to precompute AI insights for recently active users.
+
+Run it off-peak (e.g. from cron) so daytime /ai/insights requests are
+cache reads. Insights are written to the configured AI cache, so use
+AI_CACHE_BACKEND=sqlite to share them with the API workers. Alternatively
+set INSIGHTS_PRECOMPUTE_HOUR on one API process to run it in-process.
+
+Usage:
+    python scripts/precompute_insights.py
+    python scripts/precompute_insights.py --days 3 --concurrency 8 --rate 120
+    python scripts/precompute_insights.py --email user@example.com
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app import models
+from app.precompute import (
+    INSIGHTS_PRECOMPUTE_ACTIVE_DAYS,
+    INSIGHTS_PRECOMPUTE_CONCURRENCY,
+    INSIGHTS_PRECOMPUTE_RATE_PER_MINUTE,
+    active_user_ids,
+    precompute_insights,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute AI insights for active users")
+    parser.add_argument("--email", help="Only precompute insights for this user")
+    parser.add_argument("--days", type=int, default=INSIGHTS_PRECOMPUTE_ACTIVE_DAYS,
+                        help="Users active within this many days")
+    parser.add_argument("--concurrency", type=int, default=INSIGHTS_PRECOMPUTE_CONCURRENCY,
+                        help="Users processed at once")
+    parser.add_argument("--rate", type=float, default=INSIGHTS_PRECOMPUTE_RATE_PER_MINUTE,
+                        help="Maximum LLM calls per minute")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.email:
+            user = db.query(models.User).filter(models.User.email == args.email).first()
+            if not user:
+                print(f"❌ No user with email {args.email}")
+                sys.exit(1)
+            user_ids = [user.id]
+        else:
+            user_ids = active_user_ids(db, args.days)
+    finally:
+        db.close()
+
+    stats = asyncio.run(precompute_insights(user_ids, concurrency=args.concurrency, rate_per_minute=args.rate))
+    print(f"✓ Processed {stats['users']} users in {stats['wall_seconds']:.1f}s")
+    print(f"   Already cached: {stats['cached']}")
+    print(f"   LLM calls: {stats['llm_calls']}")
+    print(f"   Failures: {stats['failures']}")
+    if stats["failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
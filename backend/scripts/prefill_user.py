@@ -19,6 +19,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from app.database import SessionLocal, engine
 from app import models
 from app.auth import get_password_hash
+from app.rollups import rebuild_pomodoro_rollups
 from sqlalchemy.orm import Session
 
 
@@ -60,6 +61,8 @@ def clear_user_data(db: Session, user: models.User):
     db.query(models.UserSettings).filter(models.UserSettings.user_id == user.id).delete()
     
     db.commit()
+    # Bulk deletes skip the ORM events that maintain the rollups
+    rebuild_pomodoro_rollups(db, user.id)
     print("✓ Cleared existing data")
 
 
@@ -0,0 +1,41 @@
+"""
+Script to delete generated study recommendations that are long past.
+
+Each new recommendation batch already prunes the requesting user's expired
+rows; run this periodically (e.g. nightly from cron) to clean up users who
+have stopped requesting recommendations. Manually created sessions are
+never deleted.
+
+Usage:
+    python scripts/prune_schedules.py
+    python scripts/prune_schedules.py --days 90
+"""
+
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.schedule_batches import SCHEDULE_RETENTION_DAYS, prune_expired
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune expired study recommendations")
+    parser.add_argument("--days", type=int, default=SCHEDULE_RETENTION_DAYS,
+                        help="Keep recommendations from the last this many days")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        deleted = prune_expired(db, retention_days=args.days)
+        db.commit()
+        print(f"✓ Deleted {deleted} recommendations older than {args.days} days")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Script to rebuild the hourly Pomodoro rollups from the raw pomodoros table.
+
+The API keeps rollups up to date as sessions are created, updated and
+deleted. Run this after bulk edits that bypass the API, or to verify them.
+
+Usage:
+    python scripts/rebuild_rollups.py
+    python scripts/rebuild_rollups.py --email user@example.com
+"""
+
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app import models
+from app.rollups import rebuild_pomodoro_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild Pomodoro rollups")
+    parser.add_argument("--email", help="Only rebuild rollups for this user")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_id = None
+        if args.email:
+            user = db.query(models.User).filter(models.User.email == args.email).first()
+            if not user:
+                print(f"❌ No user with email {args.email}")
+                sys.exit(1)
+            user_id = user.id
+        buckets = rebuild_pomodoro_rollups(db, user_id)
+        print(f"✓ Rebuilt {buckets} hourly rollup buckets")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.database import Base, get_db
 from app.main import app
-from app import models, auth
+from app import models, auth, ai_service, jobs
 
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -13,10 +13,18 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Background jobs open their own sessions; point them at the test database
+jobs.quiz_jobs.session_factory = TestingSessionLocal
+
 
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test"""
+    auth.principal_cache.clear()
+    ai_service.ai_cache.clear()
+    ai_service.quiz_cache.clear()
+    ai_service.schedule_cache.clear()
+    ai_service.llm.breaker.reset()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -1,4 +1,6 @@
 import pytest
+from app import models
+from app.llm_providers import FakeProvider, FakeProviderError, LLMProvider
 
 
 def test_get_ai_insights(client, auth_headers, test_user, test_tasks, test_pomodoros, test_notes):
@@ -21,3 +23,492 @@ def test_get_ai_insights_unauthorized(client):
     response = client.get("/ai/insights")
     assert response.status_code == 401
 
+
+
+
+def _fake_llm(monkeypatch, reply='{"summary": "Shared", "focus_area": "Balance", "daily_tip": "Rest."}'):
+    """Stand in for Gemini with a call that blocks until the returned event is set"""
+    import asyncio
+    from app import ai_service
+
+    release = asyncio.Event()
+    calls = []
+
+    async def call(prompt, kind):
+        calls.append(prompt)
+        await release.wait()
+        return reply
+
+    monkeypatch.setattr(ai_service.llm, "provider", FakeProvider())
+    monkeypatch.setattr(ai_service.llm, "_call", call)
+    return release, calls
+
+
+async def test_concurrent_insights_share_one_generation(db, test_user, monkeypatch):
+    """Test concurrent requests for the same user and day make one LLM call"""
+    import asyncio
+    from app import ai_service
+
+    release, calls = _fake_llm(monkeypatch)
+    pending = asyncio.gather(*(ai_service.generate_ai_insights(db, test_user.id) for _ in range(5)))
+    while not calls:
+        await asyncio.sleep(0.01)
+    release.set()
+    results = await pending
+
+    assert len(calls) == 1
+    assert [r["summary"] for r in results] == ["Shared"] * 5
+
+
+async def test_insights_waiter_times_out_to_fallback(db, test_user, monkeypatch):
+    """Test a request stuck behind a slow generation gets the static insights"""
+    import asyncio
+    from app import ai_service
+
+    release, calls = _fake_llm(monkeypatch)
+    monkeypatch.setattr(ai_service, "AI_INSIGHTS_WAIT_SECONDS", 0.05)
+    leader = asyncio.ensure_future(ai_service.generate_ai_insights(db, test_user.id))
+    while not calls:
+        await asyncio.sleep(0.01)
+    try:
+        assert await ai_service.generate_ai_insights(db, test_user.id) == ai_service.FALLBACK_INSIGHTS
+    finally:
+        release.set()
+        await leader
+
+
+def test_user_study_data_counts(db, test_user, test_tasks, test_pomodoros, test_notes):
+    """Test the aggregate study stats match the user's rows"""
+    from app.ai_service import get_user_study_data
+    other = models.User(email="other@example.com", name="Other", hashed_password="x")
+    db.add(other)
+    db.flush()
+    db.add(models.Task(title="Not mine", priority="High", user_id=other.id))
+    db.add(models.Note(title="Not mine", user_id=other.id))
+    db.commit()
+
+    data = get_user_study_data(db, test_user.id)
+    assert data["total_tasks"] == 3
+    assert data["completed_tasks"] == 1
+    assert data["active_tasks"] == 2
+    assert data["high_priority_tasks"] == 1
+    assert data["notes_count"] == 2
+    assert data["recent_pomodoros"] == 2
+    assert data["total_focus_minutes"] == 55
+    assert get_user_study_data(db, other.id)["notes_count"] == 1
+
+
+def test_insights_fingerprint_ignores_small_changes():
+    """Test the fingerprint moves only when study stats change materially"""
+    from app.ai_service import insights_fingerprint
+    base = {"total_tasks": 100, "completed_tasks": 60, "recent_pomodoros": 40, "notes_count": 0}
+    assert insights_fingerprint(base) == insights_fingerprint({**base, "total_tasks": 101})
+    assert insights_fingerprint(base) != insights_fingerprint({**base, "recent_pomodoros": 80})
+    assert insights_fingerprint(base) != insights_fingerprint({**base, "notes_count": 1})
+
+
+async def test_insights_regenerate_only_when_profile_changes(db, test_user, monkeypatch):
+    """Test insights are reused across days and regenerated after a burst of activity"""
+    from app import ai_service
+    release, calls = _fake_llm(monkeypatch)
+    release.set()
+    await ai_service.generate_ai_insights(db, test_user.id)
+    await ai_service.generate_ai_insights(db, test_user.id)
+    assert len(calls) == 1
+
+    for i in range(5):
+        db.add(models.Task(title=f"Task {i}", user_id=test_user.id))
+    db.commit()
+    await ai_service.generate_ai_insights(db, test_user.id)
+    assert len(calls) == 2
+
+
+async def test_llm_calls_are_limited_and_time_out():
+    """Test the LLM client caps concurrent calls and enforces its deadline"""
+    import asyncio
+    from app.ai_service import LLMClient, LLMTimeout
+
+    client = LLMClient(FakeProvider(), max_concurrency=2, timeout_seconds=1)
+    running, peak = 0, 0
+
+    async def call(prompt, kind):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return prompt
+
+    client._call = call
+    assert await asyncio.gather(*(client.generate(str(i)) for i in range(6))) == [str(i) for i in range(6)]
+    assert peak == 2
+    assert client.stats()["queue_latency"]["count"] == 6
+
+    async def hang(prompt, kind):
+        await asyncio.sleep(10)
+
+    client._call = hang
+    with pytest.raises(LLMTimeout):
+        await client.generate("slow", timeout=0.05)
+    assert client.stats()["timeouts"] == 1
+    assert client.stats()["in_flight"] == 0
+
+
+def test_llm_cap_is_shared_across_event_loops():
+    """Test calls from separate event loops (requests, jobs) share one concurrency cap"""
+    import asyncio
+    import threading
+    from app.ai_service import LLMClient, LLMTimeout
+
+    client = LLMClient(FakeProvider(), max_concurrency=2, timeout_seconds=5)
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    async def call(prompt, kind):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        with lock:
+            running -= 1
+        return prompt
+
+    client._call = call
+
+    async def burst():
+        return await asyncio.gather(*(client.generate(str(i)) for i in range(4)))
+
+    threads = [threading.Thread(target=lambda: asyncio.run(burst())) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+    assert client.stats()["completed"] == 12
+
+    # A waiter that gives up doesn't leak its slot
+    client._call = lambda prompt, kind: asyncio.sleep(0.2, prompt)
+
+    async def crowd():
+        results = await asyncio.gather(*(client.generate(str(i), timeout=0.1) for i in range(3)),
+                                       return_exceptions=True)
+        assert any(isinstance(r, LLMTimeout) for r in results)
+        assert await client.generate("after", timeout=1) == "after"
+
+    asyncio.run(crowd())
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    """Route every LLM call through the deterministic fake provider"""
+    from app import ai_service
+    provider = FakeProvider(seed=7)
+    monkeypatch.setattr(ai_service.llm, "provider", provider)
+    return provider
+
+
+def test_fake_provider_generates_quiz(client, db, auth_headers, fake_provider):
+    """Test quiz generation parses the fake provider's questions"""
+    from tests.test_quizzes import wait_for_job
+    cls = client.post("/classes/", json={"name": "Biology 101", "syllabus_content": "Cells"}, headers=auth_headers)
+    response = client.post(
+        "/quizzes/generate", json={"class_id": cls.json()["id"], "num_questions": 3}, headers=auth_headers
+    )
+    assert response.status_code == 202
+    job = wait_for_job(client, db, auth_headers, response.json()["id"])
+    questions = client.get(f"/quizzes/{job['quiz_id']}", headers=auth_headers).json()["questions"]
+    assert len(questions) == 3
+    assert all("Biology 101" in q["question"] and len(q["options"]) == 4 for q in questions)
+
+
+def test_fake_provider_generates_schedule(client, auth_headers, fake_provider, monkeypatch):
+    """Test schedule recommendations parse the fake provider's sessions"""
+    from app import ai_service
+    monkeypatch.setattr(ai_service, "SCHEDULE_ENGINE", "llm")
+    for name in ["Biology 101", 'Physics "Honors"']:
+        client.post("/classes/", json={"name": name}, headers=auth_headers)
+    response = client.get("/schedule/recommendations", headers=auth_headers)
+    assert response.status_code == 200
+    subjects = [rec["subject"] for rec in response.json()]
+    assert subjects.count("Biology 101") == 2
+    assert subjects.count('Physics "Honors"') == 2
+
+
+def test_provider_must_implement_complete():
+    """Test a provider without complete() can't be created"""
+    class Silent(LLMProvider):
+        name = "silent"
+
+    with pytest.raises(TypeError):
+        Silent()
+
+
+async def test_fake_provider_is_repeatable_and_injects_errors():
+    """Test seeded fakes repeat their answers and honour the error rate"""
+    first = await FakeProvider(seed=3).complete("x", "insights")
+    assert first == await FakeProvider(seed=3).complete("x", "insights")
+    with pytest.raises(FakeProviderError):
+        await FakeProvider(error_rate=1).complete("x", "quiz")
+
+
+async def test_provider_errors_fall_back(db, test_user, monkeypatch):
+    """Test a failing provider yields the static insights"""
+    from app import ai_service
+    monkeypatch.setattr(ai_service.llm, "provider", FakeProvider(error_rate=1))
+    assert await ai_service.generate_ai_insights(db, test_user.id) == ai_service.FALLBACK_INSIGHTS
+    assert ai_service.llm.stats()["failed"] >= 1
+
+
+async def test_quiz_generation_is_cached_by_content(fake_provider, monkeypatch):
+    """Test identical material is generated once, whatever its whitespace or case"""
+    from app import ai_service
+    calls = []
+    complete = fake_provider.complete
+
+    async def counting_complete(prompt, kind=None):
+        calls.append(kind)
+        return await complete(prompt, kind)
+
+    monkeypatch.setattr(fake_provider, "complete", counting_complete)
+    first = await ai_service.generate_quiz_from_syllabus("Cells  and\nGenetics", "Biology", 3)
+    second = await ai_service.generate_quiz_from_syllabus("cells and genetics ", "biology", 3)
+    assert first == second
+    assert len(calls) == 1
+
+    await ai_service.generate_quiz_from_syllabus("Cells and genetics", "Biology", 4)
+    await ai_service.generate_quiz_from_syllabus("Cells and genetics", "Biology", 3, {"style": "visual"})
+    assert len(calls) == 3
+    assert ai_service.quiz_cache.stats()["hits"] >= 1
+
+
+def test_split_syllabus_keeps_sections_contiguous():
+    """Test syllabi are split on line boundaries into similar-sized sections"""
+    from app.ai_service import split_syllabus
+    syllabus = "\n".join(f"Week {i}: topic {i}" for i in range(1, 11))
+    sections = split_syllabus(syllabus, 3)
+    assert len(sections) == 3
+    assert "\n".join(sections) == syllabus
+    assert split_syllabus("Only one line", 3) == ["Only one line"] * 3
+
+
+def test_dedupe_questions_drops_near_duplicates():
+    """Test rephrasings are dropped but questions about different terms kept"""
+    from app.ai_service import dedupe_questions
+    from app.schemas_advanced import Question
+
+    def q(text):
+        return Question(question=text, options=["A", "B", "C", "D"], correct_answer=0)
+
+    kept = dedupe_questions([
+        q("What is the function of mitochondria?"),
+        q("What is the function of the mitochondria?"),
+        q("What is the role of ribosomes in a cell?"),
+        q("What is the role of lysosomes in a cell?"),
+    ])
+    assert [k.question for k in kept] == [
+        "What is the function of mitochondria?",
+        "What is the role of ribosomes in a cell?",
+        "What is the role of lysosomes in a cell?",
+    ]
+
+
+async def test_large_quiz_fans_out_over_sections(fake_provider, monkeypatch):
+    """Test a 20-question quiz runs as concurrent batches over distinct sections"""
+    import asyncio
+    from app import ai_service
+    prompts, running, peak = [], 0, 0
+    complete = fake_provider.complete
+
+    async def tracking_complete(prompt, kind=None):
+        nonlocal running, peak
+        prompts.append(prompt)
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return await complete(prompt, kind)
+
+    monkeypatch.setattr(fake_provider, "complete", tracking_complete)
+    syllabus = "\n".join(
+        " ".join(f"concept{chr(97 + i)}{chr(97 + j)}" for j in range(6)) for i in range(8)
+    )
+    questions = await ai_service.generate_quiz_from_syllabus(syllabus, "Biology", 20)
+
+    assert len(prompts) == 4
+    assert peak == 4
+    assert all(f"part {i} of 4" in p for i, p in enumerate(prompts, 1))
+    assert len({q.question for q in questions}) == 20
+    assert not any(q.question.startswith("Key concept question") for q in questions)
+
+
+async def test_large_quiz_leaves_llm_slots_free(fake_provider, monkeypatch):
+    """Test a 50-question quiz runs at most QUIZ_FANOUT_CONCURRENCY batches, below the global cap"""
+    import asyncio
+    from app import ai_service
+    running, peak = 0, 0
+    complete = fake_provider.complete
+
+    async def tracking_complete(prompt, kind=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return await complete(prompt, kind)
+
+    monkeypatch.setattr(fake_provider, "complete", tracking_complete)
+    syllabus = "\n".join(
+        " ".join(f"concept{chr(97 + i)}{chr(97 + j)}" for j in range(10)) for i in range(20)
+    )
+    await ai_service.generate_quiz_from_syllabus(syllabus, "Biology", 50)
+
+    assert ai_service.QUIZ_FANOUT_CONCURRENCY < ai_service.LLM_MAX_CONCURRENCY
+    assert peak == ai_service.QUIZ_FANOUT_CONCURRENCY
+
+
+async def test_failed_quiz_generation_has_distinct_fallbacks(monkeypatch):
+    """Test fallback questions are distinct objects with distinct text"""
+    from app import ai_service
+    monkeypatch.setattr(ai_service.llm, "provider", FakeProvider(error_rate=1))
+    questions = await ai_service.generate_quiz_from_syllabus("Cells", "Biology", 4)
+    assert len({id(q) for q in questions}) == 4
+    assert len({q.question for q in questions}) == 4
+
+
+def test_circuit_breaker_trips_and_recovers():
+    """Test the breaker opens on errors or slow calls and closes after a good probe"""
+    from app.circuit_breaker import CircuitBreaker
+    now = [0.0]
+    breaker = CircuitBreaker(window=4, min_calls=4, error_rate=0.5, slow_call_ms=100, open_seconds=10,
+                             clock=lambda: now[0])
+    for failed in (False, True, False, True):
+        token = breaker.allow()
+        assert token
+        breaker.record(token, failed, 5)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.state == "half_open"
+    token = breaker.allow()
+    assert token
+    assert not breaker.allow()  # one probe at a time
+    breaker.record(token, False, 500)  # too slow: open again
+    assert breaker.state == "open"
+
+    now[0] = 20
+    token = breaker.allow()
+    assert token
+    breaker.record(token, False, 5)
+    assert breaker.state == "closed"
+    assert breaker.stats()["trips"] == 2
+    assert breaker.stats()["rejected"] == 2
+
+    for _ in range(4):
+        breaker.record(breaker.allow(), False, 150)
+    assert breaker.state == "open"
+
+
+def test_circuit_breaker_ignores_calls_from_before_a_trip():
+    """Test a call that started before the breaker opened can't settle the half-open probe"""
+    from app.circuit_breaker import CircuitBreaker
+    now = [0.0]
+    breaker = CircuitBreaker(window=2, min_calls=2, error_rate=0.5, open_seconds=10, clock=lambda: now[0])
+    slow_call = breaker.allow()
+    for _ in range(2):
+        breaker.record(breaker.allow(), True, 5)
+    assert breaker.state == "open"
+
+    now[0] = 10
+    probe = breaker.allow()
+    assert probe
+    breaker.record(slow_call, False, 5)
+    breaker.release(slow_call)
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # the real probe is still in flight
+
+    breaker.record(probe, False, 5)
+    assert breaker.state == "closed"
+
+
+async def test_open_circuit_rejects_calls():
+    """Test a failing provider stops being called once the circuit opens"""
+    from app import ai_service
+    from app.circuit_breaker import CircuitBreaker, CircuitOpen
+    provider = FakeProvider(error_rate=1)
+    client = ai_service.LLMClient(provider, breaker=CircuitBreaker(min_calls=3, open_seconds=60))
+    for _ in range(3):
+        with pytest.raises(FakeProviderError):
+            await client.generate("x", "quiz")
+    with pytest.raises(CircuitOpen):
+        await client.generate("x", "quiz")
+    assert client.stats()["failed"] == 3
+    assert client.stats()["circuit"]["state"] == "open"
+    assert client.stats()["circuit"]["rejected"] == 1
+
+
+async def test_schedule_classes_fail_and_time_out_independently(db, fake_provider, monkeypatch):
+    """Test one failing and one slow class fall back locally while the others keep their LLM sessions"""
+    import asyncio
+    import time
+    from app import ai_service
+    monkeypatch.setattr(ai_service, "SCHEDULE_ENGINE", "llm")
+    monkeypatch.setattr(ai_service, "SCHEDULE_CLASS_TIMEOUT_SECONDS", 0.5)
+    calls = []
+    complete = fake_provider.complete
+
+    async def flaky_complete(prompt, kind=None):
+        calls.append(prompt)
+        if '"name": "Chemistry"' in prompt:
+            return "not json"
+        if '"name": "Physics"' in prompt:
+            await asyncio.sleep(5)
+        return await complete(prompt, kind)
+
+    monkeypatch.setattr(fake_provider, "complete", flaky_complete)
+    classes = [models.Class(id=i, name=name) for i, name in enumerate(["Biology", "Chemistry", "Physics", "History"], 1)]
+    for cls in classes:
+        cls.meetings = []
+
+    started = time.perf_counter()
+    recs = await ai_service.generate_study_schedule(classes, None, [], 0)
+    assert time.perf_counter() - started < 2
+    by_class = {cls.id: [r for r in recs if r["class_id"] == cls.id] for cls in classes}
+    assert all(len(sessions) == 2 for sessions in by_class.values())
+    assert all("fake provider" in r["reasoning"] for r in by_class[1] + by_class[4])
+    assert not any("fake provider" in r["reasoning"] for r in by_class[2] + by_class[3])
+
+    # Answered classes come from the cache; only the failed ones are asked again
+    calls.clear()
+    monkeypatch.setattr(ai_service, "SCHEDULE_CLASS_TIMEOUT_SECONDS", 0.1)
+    await ai_service.generate_study_schedule(classes, None, [], 0)
+    assert sorted('"name": "Chemistry"' in p for p in calls) == [False, True]
+
+
+
+async def test_schedule_classes_do_not_overlap(fake_provider, monkeypatch):
+    """Test sessions planned class by class avoid each other, class meetings and existing sessions"""
+    from datetime import datetime, time, timedelta
+    from app import ai_service
+    monkeypatch.setattr(ai_service, "SCHEDULE_ENGINE", "llm")
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).date()
+    classes = [models.Class(id=i, name=name) for i, name in enumerate(["Biology", "Chemistry", "Physics"], 1)]
+    for cls in classes:
+        cls.meetings = []
+    classes[0].meetings = [models.ClassMeeting(weekday=tomorrow.weekday(), start_time=time(9, 30), end_time=time(10, 30))]
+    existing = [models.StudySchedule(
+        subject="Reading", recommended_time=datetime.combine(tomorrow + timedelta(days=1), time(14)), duration_minutes=60
+    )]
+
+    recs = await ai_service.generate_study_schedule(classes, None, [], 0, existing_sessions=existing)
+    assert all(len([r for r in recs if r["class_id"] == cls.id]) == 2 for cls in classes)
+    spans = sorted(
+        (datetime.fromisoformat(r["recommended_time"]),
+         datetime.fromisoformat(r["recommended_time"]) + timedelta(minutes=r["duration_minutes"]))
+        for r in recs
+    )
+    spans += [(datetime.combine(tomorrow, time(9, 30)), datetime.combine(tomorrow, time(10, 30))),
+              (existing[0].recommended_time, existing[0].recommended_time + timedelta(hours=1))]
+    spans.sort()
+    assert all(end <= next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
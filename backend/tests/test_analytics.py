@@ -0,0 +1,72 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from app import models
+
+
+def _reference_analytics(pomodoros, tasks):
+    """The original in-Python computation the SQL version must match"""
+    completed = [p for p in pomodoros if p.completed]
+    total = sum(p.duration_minutes for p in completed)
+    day_counts, hour_counts = defaultdict(int), defaultdict(int)
+    for p in sorted(completed, key=lambda p: p.created_at):
+        day_counts[p.created_at.strftime("%A")] += p.duration_minutes
+        hour_counts[p.created_at.hour] += p.duration_minutes
+    done = [t for t in tasks if t.completed]
+    subjects = defaultdict(float)
+    for t in done:
+        if t.category:
+            subjects[t.category] += 1
+    by_subject = sum(subjects.values())
+    return {
+        "total_study_hours": round(total / 60.0, 2),
+        "average_session_length": round(total / len(completed), 2) if completed else 0,
+        "most_productive_days": [d for d, _ in sorted(day_counts.items(), key=lambda x: x[1], reverse=True)[:3]],
+        "most_productive_times": [f"{h}:00" for h, _ in sorted(hour_counts.items(), key=lambda x: x[1], reverse=True)[:3]],
+        "subject_breakdown": {s: c / by_subject * 100 for s, c in subjects.items()},
+        "completion_rate": round(len(done) / len(tasks) * 100, 2) if tasks else 0,
+    }
+
+
+def test_analytics_matches_reference(client, auth_headers, db, test_user):
+    """Test SQL aggregation yields the same numbers as the in-Python version"""
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1, 6, 0)
+    pomodoros = [
+        models.Pomodoro(
+            user_id=test_user.id,
+            completed=rng.random() < 0.8,
+            duration_minutes=rng.choice([15, 25, 30, 50]),
+            created_at=start + timedelta(hours=rng.randrange(0, 24 * 60)),
+        )
+        for _ in range(300)
+    ]
+    tasks = [
+        models.Task(
+            user_id=test_user.id,
+            title=f"Task {i}",
+            completed=rng.random() < 0.6,
+            category=rng.choice(["Math", "History", "Physics", "", None]),
+        )
+        for i in range(40)
+    ]
+    db.add_all(pomodoros + tasks)
+    db.commit()
+
+    response = client.get("/analytics/", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    expected = _reference_analytics(pomodoros, tasks)
+    for field, value in expected.items():
+        assert data[field] == value, field
+
+
+def test_analytics_without_data(client, auth_headers):
+    """Test analytics for a user with no sessions or tasks"""
+    response = client.get("/analytics/", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_study_hours"] == 0
+    assert data["most_productive_days"] == []
+    assert data["subject_breakdown"] == {}
+    assert "Start tracking your study sessions to identify your most productive days." in data["recommendations"]
@@ -0,0 +1,75 @@
+import time
+import pytest
+from app.cache import CacheBackend, MemoryCache, SQLiteCache, create_cache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def factory(max_entries=3, ttl_seconds=60):
+        if request.param == "memory":
+            return MemoryCache(max_entries, ttl_seconds)
+        return SQLiteCache(str(tmp_path / "cache.db"), "test", max_entries, ttl_seconds)
+    return factory
+
+
+def test_get_set_and_stats(make_cache):
+    """Test values round-trip and hits/misses are counted"""
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", {"summary": "hi", "n": [1, 2]})
+    assert cache.get("a") == {"summary": "hi", "n": [1, 2]}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_lru_eviction(make_cache):
+    """Test the least recently used entry is evicted at the size limit"""
+    cache = make_cache(max_entries=2)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.size() == 2
+
+
+def test_ttl_expiry(make_cache):
+    """Test entries expire after their TTL"""
+    cache = make_cache()
+    cache.set("short", 1, ttl_seconds=0.05)
+    cache.set("long", 2)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    """Test two workers on one host see each other's entries"""
+    path = str(tmp_path / "shared.db")
+    worker_a = SQLiteCache(path, "insights")
+    worker_b = SQLiteCache(path, "insights")
+    other = SQLiteCache(path, "quizzes")
+    worker_a.set("1_2024-01-01", {"summary": "shared"})
+    assert worker_b.get("1_2024-01-01") == {"summary": "shared"}
+    assert other.get("1_2024-01-01") is None
+
+
+def test_create_cache_falls_back_to_memory():
+    """Test unknown backends fall back to the in-memory cache"""
+    assert isinstance(create_cache("insights", backend="redis"), MemoryCache)
+
+
+def test_incomplete_backend_fails_on_instantiation():
+    """Test a backend missing an override can't be created"""
+    class NoSize(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        NoSize()
@@ -0,0 +1,108 @@
+import time
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from app import google_auth, models
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+@pytest.fixture
+def google_stub(monkeypatch):
+    """Local stand-in for Google's certs and userinfo endpoints"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": "test-kid", "use": "sig", "alg": "RS256"})
+    calls = {"certs": 0, "userinfo": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/certs"):
+            calls["certs"] += 1
+            return httpx.Response(200, json={"keys": [public_jwk]}, headers={"Cache-Control": "public, max-age=600"})
+        calls["userinfo"] += 1
+        if request.headers.get("authorization") != "Bearer good-access-token":
+            return httpx.Response(401, json={"error": "invalid_token"})
+        return httpx.Response(200, json={"id": "g-2", "email": "access@example.com", "name": "Access User"})
+
+    monkeypatch.setattr(google_auth, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    google_auth.configure_transport(httpx.MockTransport(handler))
+    google_auth.google_keys.clear()
+
+    def make_id_token(**overrides):
+        claims = {
+            "iss": "https://accounts.google.com",
+            "aud": CLIENT_ID,
+            "sub": "g-1",
+            "email": "googler@example.com",
+            "email_verified": True,
+            "name": "Google User",
+            "iat": int(time.time()),
+            "exp": int(time.time()) + 600,
+        }
+        claims.update(overrides)
+        return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": "test-kid"})
+
+    yield make_id_token, calls
+    google_auth.configure_transport(None)
+    google_auth.google_keys.clear()
+
+
+def test_google_signin_with_id_token(client, db, google_stub):
+    """Test ID tokens are verified locally and the key set is fetched once"""
+    make_id_token, calls = google_stub
+    for _ in range(2):
+        response = client.post("/users/google-signin", json={"id_token": make_id_token()})
+        assert response.status_code == 200
+        assert response.json()["access_token"]
+    assert calls["certs"] == 1
+    assert calls["userinfo"] == 0
+    user = db.query(models.User).filter(models.User.google_id == "g-1").first()
+    assert user.email == "googler@example.com"
+
+
+def test_google_signin_rejects_wrong_audience(client, google_stub):
+    """Test ID tokens minted for another client are rejected"""
+    make_id_token, _ = google_stub
+    response = client.post("/users/google-signin", json={"token": make_id_token(aud="someone-else")})
+    assert response.status_code == 401
+
+
+def test_google_signin_with_access_token(client, db, google_stub):
+    """Test OAuth access tokens still resolve through userinfo"""
+    _, calls = google_stub
+    response = client.post("/users/google-signin", json={"token": "good-access-token"})
+    assert response.status_code == 200
+    assert calls["userinfo"] == 1
+
+    response = client.post("/users/google-signin", json={"token": "bad-access-token"})
+    assert response.status_code == 401
+
+
+async def test_concurrent_verifications_fetch_keys_once(google_stub):
+    """Test requests arriving with an empty key cache share one JWKS fetch"""
+    import asyncio
+    make_id_token, calls = google_stub
+    token = make_id_token()
+    results = await asyncio.gather(*(google_auth.verify_id_token(token) for _ in range(10)))
+    assert {r["id"] for r in results} == {"g-1"}
+    assert calls["certs"] == 1
+
+
+async def test_id_token_algorithm_is_pinned(google_stub):
+    """Test a token whose header names another algorithm is rejected"""
+    make_id_token, _ = google_stub
+    forged = jwt.encode({"sub": "g-1", "aud": CLIENT_ID, "iss": "https://accounts.google.com",
+                         "exp": int(time.time()) + 600}, "secret", algorithm="HS256", headers={"kid": "test-kid"})
+    with pytest.raises(google_auth.GoogleAuthError):
+        await google_auth.verify_id_token(forged)
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import text
+from app import models
+from app.migrations import ensure_columns, ensure_indexes
+from app.pagination import SortKey, _keyset
+from tests.conftest import engine
+
+
+def _query_plan(db, query) -> str:
+    sql = str(query.statement.compile(db.bind, compile_kwargs={"literal_binds": True}))
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("build_query, index_name", [
+    (lambda db: db.query(models.Task).filter(models.Task.user_id == 1)
+        .order_by(models.Task.order_index, models.Task.created_at), "ix_tasks_user_order"),
+    (lambda db: db.query(models.Pomodoro).filter(models.Pomodoro.user_id == 1)
+        .order_by(models.Pomodoro.created_at.desc()), "ix_pomodoros_user_created"),
+    (lambda db: db.query(models.Note).filter(models.Note.user_id == 1)
+        .order_by(models.Note.updated_at.desc(), models.Note.created_at.desc()), "ix_notes_user_updated"),
+    (lambda db: db.query(models.Class).filter(models.Class.user_id == 1)
+        .order_by(models.Class.created_at.desc()), "ix_classes_user_created"),
+    (lambda db: db.query(models.Quiz).filter(models.Quiz.user_id == 1)
+        .order_by(models.Quiz.created_at.desc()), "ix_quizzes_user_created"),
+    (lambda db: db.query(models.Quiz).filter(models.Quiz.user_id == 1, models.Quiz.class_id == 2)
+        .order_by(models.Quiz.created_at.desc()), "ix_quizzes_user_class_created"),
+    (lambda db: db.query(models.StudySchedule).filter(models.StudySchedule.user_id == 1)
+        .order_by(models.StudySchedule.recommended_time), "ix_study_schedules_user_time"),
+])
+def test_list_queries_use_composite_indexes(db, build_query, index_name):
+    """Test each per-user list query is served by its index with no extra sort"""
+    plan = _query_plan(db, build_query(db))
+    assert index_name in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_ensure_indexes_adds_missing_indexes(db):
+    """Test existing databases get indexes declared after they were created"""
+    db.execute(text("DROP INDEX ix_tasks_user_order"))
+    db.commit()
+    assert ensure_indexes(engine) == ["ix_tasks_user_order"]
+    assert ensure_indexes(engine) == []
+
+
+def test_ensure_columns_adds_missing_columns(db):
+    """Test existing databases get nullable columns declared after they were created"""
+    db.execute(text("DROP INDEX ix_study_schedules_user_batch"))
+    db.execute(text("ALTER TABLE study_schedules DROP COLUMN batch_key"))
+    db.commit()
+    assert ensure_columns(engine) == ["study_schedules.batch_key"]
+    assert ensure_columns(engine) == []
+    assert ensure_indexes(engine) == ["ix_study_schedules_user_batch"]
+
+
+@pytest.mark.parametrize("model, keys, values, descending, seek", [
+    (models.Task, ("order_index", "created_at", "id"), [3, "2024-01-01 00:00:00", 5], False,
+     "(order_index,created_at)>(?,?)"),
+    (models.Pomodoro, ("created_at", "id"), ["2024-01-01 00:00:00", 5], True, "created_at<?"),
+])
+def test_cursor_pages_seek_the_index(db, model, keys, values, descending, seek):
+    """Test a cursor page seeks to its position in the index rather than filtering earlier rows"""
+    sort_keys = [SortKey(getattr(model, k), descending=descending) for k in keys]
+    query = db.query(model).filter(model.user_id == 1, _keyset(sort_keys, values))
+    assert seek in _query_plan(db, query)
@@ -62,3 +62,30 @@ def test_delete_note(client, auth_headers, test_notes):
     get_response = client.get(f"/notes/{note_id}", headers=auth_headers)
     assert get_response.status_code == 404
 
+
+
+def test_notes_cursor_pagination_with_unedited_notes(client, auth_headers, db, test_user):
+    """Test paging across edited notes followed by never-edited ones"""
+    from datetime import datetime, timedelta
+    from app import models
+    now = datetime.utcnow()
+    for i in range(5):
+        db.add(models.Note(
+            title=f"Note {i}",
+            user_id=test_user.id,
+            created_at=now - timedelta(hours=i),
+            updated_at=now if i % 2 else None,
+        ))
+    db.commit()
+
+    full = client.get("/notes/", headers=auth_headers).json()
+    paged, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/notes/", params=params, headers=auth_headers)
+        paged.extend(note["id"] for note in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert paged == [note["id"] for note in full]
+    assert [note["updated_at"] is not None for note in full] == [True, True, False, False, False]
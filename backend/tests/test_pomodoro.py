@@ -52,3 +52,46 @@ def test_delete_pomodoro(client, auth_headers, test_pomodoros):
     get_response = client.get(f"/pomodoro/{pomodoro_id}", headers=auth_headers)
     assert get_response.status_code == 404
 
+
+
+def _rollup_rows(db):
+    from app import models
+    return sorted(
+        (r.user_id, r.day, r.hour, r.sessions, r.completed_sessions, r.focus_minutes)
+        for r in db.query(models.PomodoroRollup).filter(models.PomodoroRollup.sessions != 0)
+    )
+
+
+def test_rollups_follow_pomodoro_writes(client, auth_headers, db, test_pomodoros):
+    """Test create/update/delete keep the rollups equal to a full rebuild"""
+    from app.rollups import rebuild_pomodoro_rollups
+    created = client.post("/pomodoro/", json={"duration_minutes": 40, "completed": True}, headers=auth_headers)
+    client.put(f"/pomodoro/{test_pomodoros[2].id}", json={"completed": True, "duration_minutes": 20}, headers=auth_headers)
+    client.delete(f"/pomodoro/{test_pomodoros[0].id}", headers=auth_headers)
+    client.put(f"/pomodoro/{created.json()['id']}", json={"duration_minutes": 45}, headers=auth_headers)
+
+    incremental = _rollup_rows(db)
+    rebuild_pomodoro_rollups(db)
+    assert incremental == _rollup_rows(db)
+    assert sum(row[5] for row in incremental) == 30 + 20 + 45
+
+
+def test_focus_summary(client, auth_headers, test_pomodoros):
+    """Test the rollup-backed focus summary used by the dashboard"""
+    response = client.get("/analytics/focus", params={"days": 7}, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_sessions"] == 2
+    assert data["total_focus_minutes"] == 55
+    assert len(data["daily"]) == 7
+    assert sum(day["focus_minutes"] for day in data["daily"]) == 55
+
+
+def test_rollups_bucket_in_utc():
+    """Test aware timestamps from the driver land in their UTC day and hour"""
+    from datetime import date, datetime, timedelta, timezone
+    from app.rollups import _contribution
+    local = datetime(2024, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+    c = _contribution(1, local, True, 25)
+    assert (c.day, c.hour) == (date(2024, 3, 2), 4)
+    assert _contribution(1, datetime(2024, 3, 1, 23, 30), True, 25).hour == 23
@@ -0,0 +1,59 @@
+import time
+from datetime import datetime, timedelta
+from app import ai_service, models
+from app.llm_providers import FakeProvider
+from app.precompute import InsightsScheduler, RateLimiter, active_user_ids, precompute_insights
+from tests.conftest import TestingSessionLocal
+
+
+def test_active_user_ids(db, test_user, test_tasks):
+    """Test only users with recent writes are picked for precompute"""
+    idle = models.User(email="idle@example.com", name="Idle", hashed_password="x")
+    db.add(idle)
+    db.flush()
+    db.add(models.Note(title="Old", user_id=idle.id, created_at=datetime.utcnow() - timedelta(days=30)))
+    db.commit()
+    assert active_user_ids(db, days=7) == [test_user.id]
+    assert active_user_ids(db, days=60) == sorted([test_user.id, idle.id])
+
+
+async def test_precompute_fills_insights_cache(db, test_user, test_tasks, monkeypatch):
+    """Test a run generates once per user and later requests are cache reads"""
+    monkeypatch.setattr(ai_service.llm, "provider", FakeProvider(seed=1))
+    stats = await precompute_insights([test_user.id], TestingSessionLocal, rate_per_minute=0)
+    assert stats["users"] == 1
+    assert stats["llm_calls"] == 1
+    assert stats["failures"] == 0
+
+    completed = ai_service.llm.stats()["completed"]
+    await ai_service.generate_ai_insights(db, test_user.id)
+    assert ai_service.llm.stats()["completed"] == completed
+
+    again = await precompute_insights([test_user.id], TestingSessionLocal, rate_per_minute=0)
+    assert again["cached"] == 1
+    assert again["llm_calls"] == 0
+
+
+async def test_precompute_counts_failures(db, test_user, monkeypatch):
+    """Test provider errors are reported as failures and nothing is cached"""
+    monkeypatch.setattr(ai_service.llm, "provider", FakeProvider(error_rate=1))
+    stats = await precompute_insights([test_user.id], TestingSessionLocal, rate_per_minute=0)
+    assert stats["llm_calls"] == 1
+    assert stats["failures"] == 1
+    assert ai_service.ai_cache.size() == 0
+
+
+async def test_rate_limiter_spaces_calls():
+    """Test the token bucket holds calls to its rate"""
+    limiter = RateLimiter(rate_per_minute=1200)  # one call per 50ms
+    started = time.monotonic()
+    for _ in range(4):
+        await limiter.acquire()
+    assert time.monotonic() - started >= 0.14
+
+
+def test_scheduler_waits_for_its_hour():
+    """Test the next run is today at the configured hour, or tomorrow once it has passed"""
+    scheduler = InsightsScheduler(hour=3)
+    assert scheduler.seconds_until_next_run(datetime(2024, 1, 15, 1, 30)) == 90 * 60
+    assert scheduler.seconds_until_next_run(datetime(2024, 1, 15, 3, 0)) == 24 * 3600
@@ -0,0 +1,101 @@
+import time
+import pytest
+from app import models
+from app.jobs import quiz_jobs
+
+
+def wait_for_job(client, db, auth_headers, job_id, timeout=5):
+    """Poll a quiz job until it leaves the queued/running states"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.expire_all()
+        job = client.get(f"/quizzes/jobs/{job_id}", headers=auth_headers).json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Quiz job {job_id} did not finish")
+
+
+def wait_until_idle(timeout=5):
+    deadline = time.monotonic() + timeout
+    while quiz_jobs.stats()["running"] or quiz_jobs.stats()["queued"]:
+        assert time.monotonic() < deadline, "Quiz job runner did not go idle"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def test_class(client, auth_headers):
+    response = client.post(
+        "/classes/", json={"name": "Biology 101", "syllabus_content": "Cells and genetics"}, headers=auth_headers
+    )
+    return response.json()
+
+
+def test_generate_quiz_returns_job(client, db, auth_headers, test_class):
+    """Test quiz generation is queued and stores the quiz when done"""
+    response = client.post(
+        "/quizzes/generate", json={"class_id": test_class["id"], "num_questions": 3}, headers=auth_headers
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] in ("queued", "running", "succeeded")
+
+    job = wait_for_job(client, db, auth_headers, response.json()["id"])
+    assert job["status"] == "succeeded"
+    quiz = client.get(f"/quizzes/{job['quiz_id']}", headers=auth_headers).json()
+    assert quiz["class_id"] == test_class["id"]
+    assert len(quiz["questions"]) == 3
+    assert quiz_jobs.stats()["queue_latency"]["count"] >= 1
+
+
+def test_generate_quiz_unknown_class(client, auth_headers):
+    """Test queuing a job for someone else's or a missing class"""
+    response = client.post("/quizzes/generate", json={"class_id": 999}, headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_cancel_running_quiz_job(client, db, auth_headers, test_class, monkeypatch):
+    """Test cancelling a running job stops it without storing a quiz"""
+    from app import ai_service
+    from app.llm_providers import FakeProvider
+    monkeypatch.setattr(ai_service.llm, "provider", FakeProvider(latency_ms=10000))
+
+    job_id = client.post("/quizzes/generate", json={"class_id": test_class["id"]}, headers=auth_headers).json()["id"]
+    deadline = time.monotonic() + 5
+    while quiz_jobs.stats()["running"] == 0:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    response = client.post(f"/quizzes/jobs/{job_id}/cancel", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    wait_until_idle()
+    assert db.query(models.Quiz).count() == 0
+
+
+def test_job_runs_once_when_submitted_twice(client, db, auth_headers, test_class):
+    """Test a duplicate submission (e.g. recovery in another worker) is skipped"""
+    job_id = client.post("/quizzes/generate", json={"class_id": test_class["id"]}, headers=auth_headers).json()["id"]
+    quiz_jobs.submit(job_id)
+    wait_for_job(client, db, auth_headers, job_id)
+    wait_until_idle()
+    assert db.query(models.Quiz).count() == 1
+
+
+def test_recover_requeues_queued_jobs(client, db, auth_headers, test_class, test_user):
+    """Test jobs left queued by a previous process run on startup"""
+    job = models.QuizJob(user_id=test_user.id, class_id=test_class["id"], num_questions=2, status="queued")
+    db.add(job)
+    db.commit()
+    assert quiz_jobs.recover() == 1
+    assert wait_for_job(client, db, auth_headers, job.id)["status"] == "succeeded"
+
+
+def test_quiz_job_is_private(client, db, auth_headers, test_class):
+    """Test other users cannot read or cancel a job"""
+    job_id = client.post("/quizzes/generate", json={"class_id": test_class["id"]}, headers=auth_headers).json()["id"]
+    wait_for_job(client, db, auth_headers, job_id)
+    client.post("/users/register", json={"email": "other@example.com", "password": "otherpass1"})
+    token = client.post("/users/login", json={"email": "other@example.com", "password": "otherpass1"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    assert client.get(f"/quizzes/jobs/{job_id}", headers=other).status_code == 404
+    assert client.post(f"/quizzes/jobs/{job_id}/cancel", headers=other).status_code == 404
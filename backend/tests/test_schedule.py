@@ -0,0 +1,260 @@
+import json
+import time
+from datetime import datetime, time as clock, timedelta
+from app import models, schedule_batches
+from app.free_busy import free_windows, meetings_from_schedule, merge_intervals, parse_clock
+from app.schedule_optimizer import plan_study_sessions
+
+MONDAY = datetime(2024, 1, 15, 7, 0)
+
+
+def _class(id, name, days=None, at=None):
+    schedule = json.dumps({"days": days, "time": at}) if days else None
+    cls = models.Class(id=id, name=name, schedule=schedule)
+    cls.meetings = [models.ClassMeeting(class_id=id, **row) for row in meetings_from_schedule(schedule)]
+    return cls
+
+
+def _spans(recommendations):
+    return [
+        (datetime.fromisoformat(r["recommended_time"]),
+         datetime.fromisoformat(r["recommended_time"]) + timedelta(minutes=r["duration_minutes"]))
+        for r in recommendations
+    ]
+
+
+def test_parse_clock_and_meetings():
+    """Test the time formats used by settings and class schedules"""
+    assert parse_clock("9:00 AM").hour == 9
+    assert parse_clock("12:30 PM").hour == 12
+    assert parse_clock("2 pm").hour == 14
+    assert parse_clock("14:30").minute == 30
+    assert parse_clock("soon") is None
+    meetings = meetings_from_schedule(json.dumps({"days": ["Monday", "Wednesday"], "time": "10:00 AM", "location": "Room 1"}))
+    assert [(m["weekday"], m["start_time"], m["end_time"]) for m in meetings] == [
+        (0, clock(10), clock(11, 15)), (2, clock(10), clock(11, 15))
+    ]
+    dated = meetings_from_schedule(json.dumps({"days": "Friday", "start_time": "13:00", "end_time": "2:30 PM",
+                                               "start_date": "2024-01-08", "end_date": "2024-05-03"}))
+    assert dated[0]["end_time"] == clock(14, 30) and dated[0]["end_date"].month == 5
+
+
+def test_sessions_avoid_classes_and_existing_sessions():
+    """Test sessions land in free time, on distinct days per class, without overlapping"""
+    settings = models.UserSettings(preferred_study_times=json.dumps(["10:00 AM", "2:00 PM"]))
+    classes = [_class(1, "Biology", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"], "10:00 AM"),
+               _class(2, "Physics")]
+    existing = [models.StudySchedule(recommended_time=MONDAY.replace(hour=14), duration_minutes=60)]
+    recs = plan_study_sessions(classes, settings, [], existing, now=MONDAY)
+
+    assert len(recs) == 4
+    spans = sorted(_spans(recs))
+    assert all(a_end <= b_start for (_, a_end), (b_start, _) in zip(spans, spans[1:]))
+    for start, end in spans:
+        assert not (start.hour <= 10 < end.hour or start.hour == 10)  # class meets 10:00-11:15 every weekday
+        assert start != MONDAY.replace(hour=14)
+    for class_id in (1, 2):
+        days = [r["recommended_time"][:10] for r in recs if r["class_id"] == class_id]
+        assert len(set(days)) == len(days) == 2
+
+
+def test_due_tasks_add_earlier_sessions():
+    """Test a class with work due soon gets extra, high-priority sessions before the deadline"""
+    classes = [_class(1, "Biology"), _class(2, "Chemistry")]
+    due = MONDAY + timedelta(days=3)
+    tasks = [models.Task(title="Lab report", category="Chemistry", priority="High", completed=False, due_date=due),
+             models.Task(title="Chemistry problem set", priority="Medium", completed=False, due_date=due),
+             models.Task(title="Chemistry reading", priority="Low", completed=True, due_date=due)]
+    recs = plan_study_sessions(classes, None, tasks, now=MONDAY)
+
+    chemistry = [r for r in recs if r["class_id"] == 2]
+    assert len(chemistry) == 4
+    assert len([r for r in recs if r["class_id"] == 1]) == 2
+    assert recs[0]["class_id"] == 2
+    assert chemistry[0]["priority"] == "High"
+    assert "2 tasks due soon" in chemistry[0]["reasoning"]
+    assert sum(1 for start, end in _spans(chemistry) if end <= due) >= 2
+
+
+def test_semester_of_data_plans_quickly():
+    """Test planning over a semester of classes, tasks and sessions stays fast"""
+    days = ["Monday", "Wednesday", "Friday"]
+    classes = [_class(i, f"Course {i}", days, f"{8 + i % 10}:00") for i in range(1, 13)]
+    tasks = [models.Task(title=f"Course {i % 12 + 1} homework {i}", priority="Medium", completed=False,
+                         due_date=MONDAY + timedelta(hours=7 * i)) for i in range(600)]
+    sessions = [models.StudySchedule(recommended_time=MONDAY + timedelta(hours=5 * i), duration_minutes=45)
+                for i in range(2000)]
+    started = time.perf_counter()
+    recs = plan_study_sessions(classes, None, tasks, sessions, now=MONDAY, horizon_days=120)
+    assert time.perf_counter() - started < 0.5
+    assert len(recs) == 12 * 4
+
+
+def test_recommendations_endpoint_uses_local_plan(client, auth_headers):
+    """Test recommendations are planned locally and tied to their classes"""
+    cls = client.post("/classes/", json={"name": "Biology"}, headers=auth_headers).json()
+    response = client.get("/schedule/recommendations", headers=auth_headers)
+    assert response.status_code == 200
+    assert {r["class_id"] for r in response.json()} == {cls["id"]}
+
+
+def test_unchanged_inputs_return_stored_batch(client, db, auth_headers):
+    """Test repeated requests reuse one batch and changed inputs replace it"""
+    client.post("/classes/", json={"name": "Biology"}, headers=auth_headers)
+    first = client.get("/schedule/recommendations", headers=auth_headers).json()
+    again = client.get("/schedule/recommendations", headers=auth_headers).json()
+    assert [r["id"] for r in again] == [r["id"] for r in first]
+
+    client.post("/classes/", json={"name": "Physics"}, headers=auth_headers)
+    changed = client.get("/schedule/recommendations", headers=auth_headers).json()
+    assert sorted(r["subject"] for r in changed) == ["Biology", "Biology", "Physics", "Physics"]
+    assert db.query(models.StudySchedule).count() == 4
+
+
+def test_manual_sessions_are_kept_and_avoided(client, db, auth_headers):
+    """Test a new batch leaves manual sessions alone and plans around them"""
+    client.post("/classes/", json={"name": "Biology"}, headers=auth_headers)
+    first = client.get("/schedule/recommendations", headers=auth_headers).json()
+    taken = first[0]["recommended_time"]
+    manual = client.post("/schedule/", json={"subject": "Tutoring", "recommended_time": taken},
+                         headers=auth_headers).json()
+
+    replanned = client.get("/schedule/recommendations", headers=auth_headers).json()
+    assert taken not in {r["recommended_time"] for r in replanned}
+    assert db.get(models.StudySchedule, manual["id"]) is not None
+
+
+def test_prune_expired_recommendations(db, test_user):
+    """Test only generated sessions past the retention window are pruned"""
+    old = datetime.utcnow() - timedelta(days=45)
+    db.add_all([
+        models.StudySchedule(user_id=test_user.id, subject="Old", recommended_time=old, batch_key="a"),
+        models.StudySchedule(user_id=test_user.id, subject="Manual", recommended_time=old),
+        models.StudySchedule(user_id=test_user.id, subject="Recent", batch_key="a",
+                             recommended_time=datetime.utcnow() - timedelta(days=2)),
+    ])
+    db.commit()
+    assert schedule_batches.prune_expired(db) == 1
+    db.commit()
+    assert sorted(s.subject for s in db.query(models.StudySchedule)) == ["Manual", "Recent"]
+
+
+def test_merge_and_free_windows():
+    """Test overlapping busy intervals merge and free windows fill the gaps"""
+    at = lambda h, m=0: MONDAY.replace(hour=h, minute=m)
+    busy = merge_intervals([(at(13), at(14)), (at(9), at(10)), (at(9, 30), at(11)), (at(11), at(11, 15))])
+    assert busy == [(at(9), at(11, 15)), (at(13), at(14))]
+    free = free_windows(busy, at(0), at(23, 59), clock(8), clock(18), min_minutes=60)
+    assert free == [(at(8), at(9)), (at(11, 15), at(13)), (at(14), at(18))]
+
+
+def test_class_meetings_follow_schedule(db, test_user):
+    """Test the meetings table is rebuilt when a class schedule changes"""
+    cls = models.Class(user_id=test_user.id, name="Biology",
+                       schedule=json.dumps({"days": ["Monday", "Wednesday"], "time": "10:00 AM"}))
+    db.add(cls)
+    db.commit()
+    assert [m.weekday for m in db.query(models.ClassMeeting).filter_by(class_id=cls.id)] == [0, 2]
+
+    cls.schedule = json.dumps({"days": ["Friday"], "time": "1:00 PM", "end_time": "3:00 PM"})
+    db.commit()
+    meetings = db.query(models.ClassMeeting).filter_by(class_id=cls.id).all()
+    assert [(m.weekday, m.start_time, m.end_time, m.user_id) for m in meetings] == [(4, clock(13), clock(15), test_user.id)]
+
+    db.delete(cls)
+    db.commit()
+    assert db.query(models.ClassMeeting).count() == 0
+
+
+def test_free_busy_endpoint(client, db, test_user, auth_headers):
+    """Test free/busy merges class meetings with study sessions over a date range"""
+    schedule = {"days": ["Monday"], "time": "10:00", "end_time": "11:00", "end_date": "2024-01-20"}
+    db.add(models.Class(user_id=test_user.id, name="Biology", schedule=json.dumps(schedule)))
+    db.commit()
+    client.post("/schedule/", json={"subject": "Review", "recommended_time": "2024-01-15T10:30:00",
+                                    "duration_minutes": 60}, headers=auth_headers)
+    response = client.get("/schedule/free-busy", params={
+        "start": "2024-01-15T00:00:00", "end": "2024-01-23T00:00:00", "day_end": "18:00", "min_minutes": 60
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["busy"] == [{"start": "2024-01-15T10:00:00", "end": "2024-01-15T11:30:00"}]
+    assert body["free"][:2] == [{"start": "2024-01-15T08:00:00", "end": "2024-01-15T10:00:00"},
+                                {"start": "2024-01-15T11:30:00", "end": "2024-01-15T18:00:00"}]
+    # The class ends on the 20th, so the next Monday is free all day
+    assert {"start": "2024-01-22T08:00:00", "end": "2024-01-22T18:00:00"} in body["free"]
+
+    too_long = client.get("/schedule/free-busy", params={"start": "2024-01-01T00:00:00", "end": "2024-06-01T00:00:00"},
+                          headers=auth_headers)
+    assert too_long.status_code == 400
+
+
+def test_schedule_range(client, auth_headers):
+    """Test the range query returns only sessions starting inside it, in time order"""
+    for when in ["2024-01-20T09:00:00", "2024-01-15T09:00:00", "2024-02-01T09:00:00"]:
+        client.post("/schedule/", json={"subject": when, "recommended_time": when}, headers=auth_headers)
+    response = client.get("/schedule/range", params={"start": "2024-01-15T00:00:00", "end": "2024-02-01T09:00:00"},
+                          headers=auth_headers)
+    assert response.status_code == 200
+    assert [r["subject"] for r in response.json()] == ["2024-01-15T09:00:00", "2024-01-20T09:00:00"]
+    backwards = client.get("/schedule/range", params={"start": "2024-02-01T00:00:00", "end": "2024-01-01T00:00:00"},
+                           headers=auth_headers)
+    assert backwards.status_code == 400
+
+
+def test_calendar_feed(client, db, test_user, auth_headers):
+    """Test the .ics feed lists sessions, tasks and meetings and revalidates with its ETag"""
+    schedule = {"days": ["Monday"], "time": "10:00", "end_time": "11:00", "end_date": "2099-05-01"}
+    db.add(models.Class(user_id=test_user.id, name="Biology; Lab", schedule=json.dumps(schedule)))
+    db.commit()
+    soon = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+    client.post("/schedule/", json={"subject": "Review", "recommended_time": soon.isoformat(),
+                                    "reasoning": "A long explanation " * 10}, headers=auth_headers)
+    token = client.post("/schedule/calendar-token", headers=auth_headers).json()["token"]
+    assert client.get("/schedule/range", params={"start": "2024-01-01T00:00:00", "end": "2024-02-01T00:00:00"},
+                      headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+    response = client.get("/schedule/calendar.ics", params={"token": token})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    body = response.text
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    assert all(len(line.encode()) <= 75 for line in body.split("\r\n"))
+    assert f"DTSTART:{soon.strftime('%Y%m%dT%H%M%SZ')}" in body
+    assert "CATEGORIES:Medium\r\nDESCRIPTION:A long explanation" in body
+    assert "SUMMARY:Biology\\; Lab" in body
+    assert "RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20990501T235959" in body
+
+    etag = response.headers["etag"]
+    cached = client.get("/schedule/calendar.ics", params={"token": token}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    client.post("/tasks/", json={"title": "Essay", "due_date": soon.isoformat()}, headers=auth_headers)
+    changed = client.get("/schedule/calendar.ics", params={"token": token}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert "SUMMARY:Due: Essay" in changed.text
+
+    assert client.get("/schedule/calendar.ics", params={"token": "nope"}).status_code == 401
+
+
+def test_calendar_token_rotation_and_revocation(client, auth_headers):
+    """Test a new calendar token revokes the old one and revoking disables the feed"""
+    old = client.post("/schedule/calendar-token", headers=auth_headers).json()
+    new = client.post("/schedule/calendar-token", headers=auth_headers).json()
+    assert "token=" in new["url"]
+    assert client.get("/schedule/calendar.ics", params={"token": old["token"]}).status_code == 401
+    assert client.get("/schedule/calendar.ics", params={"token": new["token"]}).status_code == 200
+
+    assert client.delete("/schedule/calendar-token", headers=auth_headers).status_code == 204
+    assert client.get("/schedule/calendar.ics", params={"token": new["token"]}).status_code == 401
+
+
+def test_started_sessions_keep_their_batch(client, db, auth_headers):
+    """Test a batch is still reused after its first session's start time passes"""
+    client.post("/classes/", json={"name": "Biology"}, headers=auth_headers)
+    first = client.get("/schedule/recommendations", headers=auth_headers).json()
+    started = db.get(models.StudySchedule, first[0]["id"])
+    started.recommended_time = datetime.utcnow() - timedelta(minutes=5)
+    db.commit()
+
+    again = client.get("/schedule/recommendations", headers=auth_headers).json()
+    assert sorted(r["id"] for r in again) == sorted(r["id"] for r in first)
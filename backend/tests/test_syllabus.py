@@ -0,0 +1,104 @@
+import subprocess
+import sys
+from app import models, syllabus
+
+SYLLABUS = """Course Policies:
+Attendance is required. Late work loses ten percent per day.
+
+Week 1: Cell Structure
+Membranes, organelles and the cytoskeleton.
+
+Week 2: Genetics
+Mendelian inheritance, alleles and dominance.
+
+# Evolution
+Natural selection, drift and speciation."""
+
+
+def test_chunk_syllabus_splits_on_headings():
+    """Test sections start at headings and carry heading-weighted keywords"""
+    chunks = syllabus.chunk_syllabus(SYLLABUS)
+    assert [c["heading"] for c in chunks] == ["Course Policies", "Week 1: Cell Structure", "Week 2: Genetics", "Evolution"]
+    assert chunks[2]["content"] == "Mendelian inheritance, alleles and dominance."
+    assert chunks[2]["keywords"][0] == "genetics"
+    assert "week" not in chunks[1]["keywords"]
+    assert [c["position"] for c in chunks] == [0, 1, 2, 3]
+
+
+def test_chunk_syllabus_bounds_long_sections():
+    """Test unheaded text longer than the chunk limit is split on paragraphs"""
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 60 for i in range(10))
+    chunks = syllabus.chunk_syllabus(text, max_chars=700)
+    assert len(chunks) > 1
+    assert all(len(c["content"]) <= 700 for c in chunks)
+    assert all(c["heading"] is None for c in chunks)
+
+
+def test_index_follows_class_writes(client, db, auth_headers):
+    """Test chunks are built on create, rebuilt on syllabus edits and removed on delete"""
+    cls = client.post("/classes/", json={"name": "Biology", "syllabus_content": SYLLABUS}, headers=auth_headers).json()
+    assert [c["heading"] for c in syllabus.load_chunks(db, cls["id"])][-1] == "Evolution"
+
+    client.put(f"/classes/{cls['id']}", json={"instructor": "Dr. Lee"}, headers=auth_headers)
+    assert len(syllabus.load_chunks(db, cls["id"])) == 4
+
+    client.put(f"/classes/{cls['id']}", json={"syllabus_content": "Unit 1: Ecology\nFood webs."}, headers=auth_headers)
+    assert [c["heading"] for c in syllabus.load_chunks(db, cls["id"])] == ["Unit 1: Ecology"]
+
+    client.delete(f"/classes/{cls['id']}", headers=auth_headers)
+    assert db.query(models.SyllabusChunk).count() == 0
+
+
+def test_index_listeners_load_with_models():
+    """Test importing the models alone registers the class_meetings and syllabus_chunks listeners"""
+    code = (
+        "import sys, app.models; "
+        "print(all(m in sys.modules for m in ('app.free_busy', 'app.syllabus', 'app.rollups')))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "True"
+
+
+def test_index_missing_backfills_existing_classes(db, test_user):
+    """Test classes stored before the index existed are chunked by the migration step"""
+    db.add(models.Class(user_id=test_user.id, name="Biology", syllabus_content=SYLLABUS))
+    db.commit()
+    db.query(models.SyllabusChunk).delete()
+    db.commit()
+    assert syllabus.index_missing(db) == 1
+    assert db.query(models.SyllabusChunk).count() == 4
+    assert syllabus.index_missing(db) == 0
+
+
+def test_select_chunks_stays_within_budget():
+    """Test over-budget syllabi keep the chunks covering the most new keywords"""
+    filler = [{"position": i, "heading": None, "content": "alpha beta gamma " * 40,
+               "keywords": ["alpha", "beta", "gamma"], "token_estimate": 170} for i in range(10)]
+    distinct = {"position": 10, "heading": "Photosynthesis", "content": "Chlorophyll captures light energy.",
+                "keywords": ["photosynthesis", "chlorophyll", "light", "energy"], "token_estimate": 9}
+    text = syllabus.select_chunks(filler + [distinct], token_budget=200)
+    assert syllabus.estimate_tokens(text) <= 200
+    assert "Photosynthesis\nChlorophyll" in text
+    assert text.count("alpha beta gamma") == 40
+
+
+async def test_quiz_prompts_are_budgeted(monkeypatch):
+    """Test a large syllabus is trimmed to the prompt budget before reaching the LLM"""
+    from app import ai_service
+    from app.llm_providers import FakeProvider
+    prompts = []
+    provider = FakeProvider(seed=1)
+    complete = provider.complete
+
+    async def recording_complete(prompt, kind=None):
+        prompts.append(prompt)
+        return await complete(prompt, kind)
+
+    monkeypatch.setattr(provider, "complete", recording_complete)
+    monkeypatch.setattr(ai_service.llm, "provider", provider)
+    names = [f"concept{chr(97 + i // 26)}{chr(97 + i % 26)}" for i in range(40)]
+    big = "\n".join(f"# {name}\n" + f"{name}detail " * 150 for name in names)
+    await ai_service.generate_quiz_from_syllabus(big, "Biology", 5)
+    assert len(prompts) == 1
+    assert len(prompts[0]) < len(big) / 5
+    assert syllabus.estimate_tokens(prompts[0]) < syllabus.SYLLABUS_PROMPT_TOKENS + 300
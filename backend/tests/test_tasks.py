@@ -91,3 +91,46 @@ def test_get_tasks_unauthorized(client):
     response = client.get("/tasks/")
     assert response.status_code == 401
 
+
+
+def test_tasks_cursor_pagination(client, auth_headers, db, test_user):
+    """Test walking every task page by page with the next cursor"""
+    from app import models
+    # Same order_index and created_at for all rows, so only the id breaks ties
+    for i in range(7):
+        db.add(models.Task(title=f"Task {i}", user_id=test_user.id, order_index=0))
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/tasks/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen.extend(task["id"] for task in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert len(seen) == 7
+    assert seen == sorted(seen)
+
+
+def test_tasks_invalid_cursor(client, auth_headers):
+    """Test a malformed cursor is rejected"""
+    response = client.get("/tasks/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_tasks_legacy_skip(client, auth_headers, test_tasks):
+    """Test the deprecated skip parameter still pages by offset"""
+    everything = client.get("/tasks/", headers=auth_headers).json()
+    response = client.get("/tasks/", params={"skip": 1, "limit": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["deprecation"] == "true"
+    assert [t["id"] for t in response.json()] == [everything[1]["id"]]
+    assert response.headers.get("x-next-cursor")
+
+    both = client.get("/tasks/", params={"skip": 1, "cursor": response.headers["x-next-cursor"]},
+                      headers=auth_headers)
+    assert both.status_code == 400
@@ -1,5 +1,4 @@
 import pytest
-from app import models
 
 
 def test_register_user(client):
@@ -87,3 +86,96 @@ def test_get_current_user_unauthorized(client):
     response = client.get("/users/me")
     assert response.status_code == 401
 
+
+
+def test_current_user_served_from_principal_cache(client, db, auth_headers):
+    """Test repeated requests with the same token skip the user lookup"""
+    from app import auth
+    client.get("/users/me", headers=auth_headers)
+    hits_before = auth.principal_cache.stats()["hits"]
+    response = client.get("/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "testuser@example.com"
+    assert auth.principal_cache.stats()["hits"] == hits_before + 1
+
+
+def test_principal_cache_invalidated_on_user_update(client, db, auth_headers, test_user):
+    """Test updating a user evicts the cached principal"""
+    from app import auth
+    client.get("/users/me", headers=auth_headers)
+    assert auth.principal_cache.stats()["size"] == 1
+
+    test_user.name = "Renamed User"
+    db.commit()
+    assert auth.principal_cache.stats()["size"] == 0
+
+    response = client.get("/users/me", headers=auth_headers)
+    assert response.json()["name"] == "Renamed User"
+
+
+def test_principal_cache_cleared_on_bulk_user_write(client, db, auth_headers, test_user):
+    """Test bulk updates, which skip the mapper events, still evict cached principals"""
+    from app import auth
+    from app.models import User
+    client.get("/users/me", headers=auth_headers)
+    assert auth.principal_cache.stats()["size"] == 1
+
+    db.query(User).filter(User.id == test_user.id).update({"name": "Bulk Renamed"})
+    db.commit()
+    assert auth.principal_cache.stats()["size"] == 0
+
+
+def test_login_rejected_when_hash_pool_saturated(client, test_user, monkeypatch):
+    """Test login fails fast with 503 when the hashing pool queue is full"""
+    from app.hashing import password_hasher
+    monkeypatch.setattr(password_hasher, "_pending", password_hasher.max_pending)
+    response = client.post(
+        "/users/login",
+        json={"email": "testuser@example.com", "password": "testpass123"}
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def _login(client):
+    response = client.post(
+        "/users/login",
+        json={"email": "testuser@example.com", "password": "testpass123"}
+    )
+    return response.json()
+
+
+def test_refresh_token_rotation(client, test_user):
+    """Test a refresh token yields new tokens and cannot be used twice"""
+    tokens = _login(client)
+    assert tokens["refresh_token"]
+
+    response = client.post("/users/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    me = client.get("/users/me", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert me.status_code == 200
+
+    # Replaying the old token is rejected and revokes the rotated one as well
+    replay = client.post("/users/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+    response = client.post("/users/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_refresh_token_not_accepted_as_access_token(client, test_user):
+    """Test refresh tokens cannot authenticate API requests"""
+    tokens = _login(client)
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert response.status_code == 401
+
+
+def test_logout_revokes_refresh_token(client, test_user):
+    """Test logout revokes the refresh token family"""
+    tokens = _login(client)
+    response = client.post("/users/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 204
+    response = client.post("/users/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
@@ -5,11 +5,13 @@ import { useRouter } from 'next/navigation'
 import { useAuthStore } from '@/store/authStore'
 import { classesAPI, Class, quizzesAPI, tasksAPI } from '@/lib/api'
 import Layout from '@/components/Layout'
+import LoadMoreButton from '@/components/LoadMoreButton'
 
 export default function ClassesPage() {
   const router = useRouter()
   const { isAuthenticated } = useAuthStore()
   const [classes, setClasses] = useState<Class[]>([])
+  const [nextCursor, setNextCursor] = useState<string | undefined>()
   const [loading, setLoading] = useState(true)
   const [showModal, setShowModal] = useState(false)
   const [editingClass, setEditingClass] = useState<Class | null>(null)
@@ -31,8 +33,9 @@ export default function ClassesPage() {
 
   const loadClasses = async () => {
     try {
-      const data = await classesAPI.getAll()
-      setClasses(data)
+      const page = await classesAPI.getPage()
+      setClasses(page.items)
+      setNextCursor(page.nextCursor)
     } catch (error) {
       console.error('Failed to load classes:', error)
     } finally {
@@ -40,6 +43,16 @@ export default function ClassesPage() {
     }
   }
 
+  const loadMoreClasses = async () => {
+    try {
+      const page = await classesAPI.getPage(nextCursor)
+      setClasses((current) => [...current, ...page.items])
+      setNextCursor(page.nextCursor)
+    } catch (error) {
+      console.error('Failed to load classes:', error)
+    }
+  }
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     try {
@@ -224,6 +237,7 @@ export default function ClassesPage() {
             <p className="text-text-secondary mb-4">No classes yet. Add your first class to get started!</p>
           </div>
         )}
+        {nextCursor && <LoadMoreButton onLoadMore={loadMoreClasses} />}
 
         {/* Modal */}
         {showModal && (
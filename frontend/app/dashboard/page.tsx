@@ -4,7 +4,7 @@ import { useEffect, useState } from 'react'
 import { useRouter } from 'next/navigation'
 import { useAuthStore } from '@/store/authStore'
 import { useTaskStore } from '@/store/taskStore'
-import { Task, Pomodoro, Note, aiAPI, pomodoroAPI, notesAPI, AIInsights, analyticsAPI, Analytics } from '@/lib/api'
+import { Task, Note, aiAPI, notesAPI, AIInsights, analyticsAPI, Analytics, FocusSummary } from '@/lib/api'
 import Layout from '@/components/Layout'
 import { LineChart, Line, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, PieChart, Pie, Cell } from 'recharts'
 import Link from 'next/link'
@@ -13,7 +13,7 @@ export default function DashboardPage() {
   const router = useRouter()
   const { isAuthenticated } = useAuthStore()
   const { tasks, fetchTasks } = useTaskStore()
-  const [pomodoros, setPomodoros] = useState<Pomodoro[]>([])
+  const [focus, setFocus] = useState<FocusSummary | null>(null)
   const [notes, setNotes] = useState<Note[]>([])
   const [insights, setInsights] = useState<AIInsights | null>(null)
   const [analytics, setAnalytics] = useState<Analytics | null>(null)
@@ -29,14 +29,14 @@ export default function DashboardPage() {
     const loadData = async () => {
       try {
         await fetchTasks()
-        const [pomodoroData, notesData, insightsData, analyticsData] = await Promise.all([
-          pomodoroAPI.getAll(),
-          notesAPI.getAll(),
+        const [focusData, notesData, insightsData, analyticsData] = await Promise.all([
+          analyticsAPI.getFocus(7),
+          notesAPI.getPage(),
           aiAPI.getInsights(),
           analyticsAPI.get().catch(() => null),
         ])
-        setPomodoros(pomodoroData)
-        setNotes(notesData)
+        setFocus(focusData)
+        setNotes(notesData.items)
         setInsights(insightsData)
         setAnalytics(analyticsData)
       } catch (error) {
@@ -73,35 +73,9 @@ export default function DashboardPage() {
 
   const activeTasks = tasks.filter((t) => !t.completed)
   const completedTasks = tasks.filter((t) => t.completed)
-  const completedPomodoros = pomodoros.filter((p) => p.completed)
-  const totalFocusMinutes = completedPomodoros.reduce((sum, p) => sum + p.duration_minutes, 0)
-
-  // Calculate study streak (consecutive days with at least one completed pomodoro)
-  const calculateStreak = () => {
-    if (completedPomodoros.length === 0) return 0
-    const dates = completedPomodoros
-      .map((p) => new Date(p.created_at).toDateString())
-      .filter((date, index, self) => self.indexOf(date) === index)
-      .sort()
-      .reverse()
-
-    let streak = 0
-    const today = new Date().toDateString()
-    let currentDate = new Date()
-
-    for (const dateStr of dates) {
-      const checkDate = new Date(currentDate).toDateString()
-      if (dateStr === checkDate) {
-        streak++
-        currentDate.setDate(currentDate.getDate() - 1)
-      } else {
-        break
-      }
-    }
-    return streak
-  }
-
-  const streak = calculateStreak()
+  // Focus totals and the streak are aggregated server-side from the Pomodoro rollups
+  const totalFocusMinutes = focus?.total_focus_minutes ?? 0
+  const streak = focus?.streak_days ?? 0
 
   // Prepare chart data for completed tasks (last 7 days)
   const taskChartData = []
@@ -123,16 +97,12 @@ export default function DashboardPage() {
   })
 
   // Prepare chart data for Pomodoro sessions (last 7 days)
-  const pomodoroChartData = []
-  last7Days.forEach((dateStr) => {
-    const date = new Date(dateStr)
-    const pomodorosOnDate = completedPomodoros.filter(
-      (p) => p.created_at && new Date(p.created_at).toDateString() === dateStr
-    ).length
-    pomodoroChartData.push({
-      date: date.toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
-      sessions: pomodorosOnDate,
-    })
+  const pomodoroChartData = (focus?.daily ?? []).map((day) => {
+    const [year, month, dayOfMonth] = day.date.split('-').map(Number)
+    return {
+      date: new Date(year, month - 1, dayOfMonth).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
+      sessions: day.sessions,
+    }
   })
 
   const recentTasks = tasks
@@ -25,6 +25,9 @@ export default function LoginPage() {
       // Store token first so getCurrentUser can use it
       if (typeof window !== 'undefined') {
         localStorage.setItem('token', response.access_token)
+        if (response.refresh_token) {
+          localStorage.setItem('refresh_token', response.refresh_token)
+        }
       }
       const userResponse = await authAPI.getCurrentUser()
       setAuth(userResponse, response.access_token)
@@ -33,6 +36,7 @@ export default function LoginPage() {
       setError(err.response?.data?.detail || 'Login failed')
       if (typeof window !== 'undefined') {
         localStorage.removeItem('token')
+        localStorage.removeItem('refresh_token')
       }
     } finally {
       setLoading(false)
@@ -5,11 +5,13 @@ import { useRouter } from 'next/navigation'
 import { useAuthStore } from '@/store/authStore'
 import { Note, notesAPI } from '@/lib/api'
 import Layout from '@/components/Layout'
+import LoadMoreButton from '@/components/LoadMoreButton'
 
 export default function NotesPage() {
   const router = useRouter()
   const { isAuthenticated } = useAuthStore()
   const [notes, setNotes] = useState<Note[]>([])
+  const [nextCursor, setNextCursor] = useState<string | undefined>()
   const [loading, setLoading] = useState(true)
   const [showModal, setShowModal] = useState(false)
   const [editingNote, setEditingNote] = useState<Note | null>(null)
@@ -29,8 +31,9 @@ export default function NotesPage() {
 
   const loadNotes = async () => {
     try {
-      const data = await notesAPI.getAll()
-      setNotes(data)
+      const page = await notesAPI.getPage()
+      setNotes(page.items)
+      setNextCursor(page.nextCursor)
     } catch (error) {
       console.error('Failed to load notes:', error)
     } finally {
@@ -38,6 +41,16 @@ export default function NotesPage() {
     }
   }
 
+  const loadMoreNotes = async () => {
+    try {
+      const page = await notesAPI.getPage(nextCursor)
+      setNotes((current) => [...current, ...page.items])
+      setNextCursor(page.nextCursor)
+    } catch (error) {
+      console.error('Failed to load notes:', error)
+    }
+  }
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
 
@@ -148,6 +161,7 @@ export default function NotesPage() {
                 No notes yet. Create your first note!
               </div>
             )}
+            {nextCursor && <LoadMoreButton onLoadMore={loadMoreNotes} />}
           </div>
         </div>
 
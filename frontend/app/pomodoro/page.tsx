@@ -4,14 +4,17 @@ import { useEffect, useState } from 'react'
 import { useRouter } from 'next/navigation'
 import { useAuthStore } from '@/store/authStore'
 import { usePomodoroStore } from '@/store/pomodoroStore'
-import { Pomodoro, pomodoroAPI } from '@/lib/api'
+import { FocusSummary, Pomodoro, analyticsAPI, pomodoroAPI } from '@/lib/api'
 import Layout from '@/components/Layout'
+import LoadMoreButton from '@/components/LoadMoreButton'
 import { LineChart, Line, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts'
 
 export default function PomodoroPage() {
   const router = useRouter()
   const { isAuthenticated } = useAuthStore()
   const [pomodoros, setPomodoros] = useState<Pomodoro[]>([])
+  const [nextCursor, setNextCursor] = useState<string | undefined>()
+  const [focus, setFocus] = useState<FocusSummary | null>(null)
   const [loading, setLoading] = useState(true)
   const [currentSession, setCurrentSession] = useState<Pomodoro | null>(null)
   
@@ -136,8 +139,10 @@ export default function PomodoroPage() {
 
   const loadPomodoros = async () => {
     try {
-      const data = await pomodoroAPI.getAll()
-      setPomodoros(data)
+      const [page, focusData] = await Promise.all([pomodoroAPI.getPage(), analyticsAPI.getFocus(7)])
+      setPomodoros(page.items)
+      setNextCursor(page.nextCursor)
+      setFocus(focusData)
     } catch (error) {
       console.error('Failed to load pomodoros:', error)
     } finally {
@@ -145,6 +150,16 @@ export default function PomodoroPage() {
     }
   }
 
+  const loadMorePomodoros = async () => {
+    try {
+      const page = await pomodoroAPI.getPage(nextCursor)
+      setPomodoros((current) => [...current, ...page.items])
+      setNextCursor(page.nextCursor)
+    } catch (error) {
+      console.error('Failed to load pomodoros:', error)
+    }
+  }
+
   const handleStart = async () => {
     try {
       const newSession = await pomodoroAPI.create({
@@ -271,28 +286,16 @@ export default function PomodoroPage() {
   const circumference = 2 * Math.PI * radius
   const offset = circumference - (progress / 100) * circumference
 
-  const completedPomodoros = pomodoros.filter((p) => p.completed)
-  const totalFocusMinutes = completedPomodoros.reduce((sum, p) => sum + p.duration_minutes, 0)
-
-  // Prepare chart data for last 7 days
-  const chartData: Array<{ date: string; sessions: number; minutes: number }> = []
-  const last7Days = Array.from({ length: 7 }, (_, i) => {
-    const date = new Date()
-    date.setDate(date.getDate() - (6 - i))
-    return date.toDateString()
-  })
-
-  last7Days.forEach((dateStr) => {
-    const date = new Date(dateStr)
-    const pomodorosOnDate = completedPomodoros.filter(
-      (p) => p.created_at && new Date(p.created_at).toDateString() === dateStr
-    )
-    const focusMinutes = pomodorosOnDate.reduce((sum, p) => sum + p.duration_minutes, 0)
-    chartData.push({
-      date: date.toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
-      sessions: pomodorosOnDate.length,
-      minutes: focusMinutes,
-    })
+  // Totals and the chart come from the server-side rollups, not the loaded page of history
+  const totalSessions = focus?.total_sessions ?? 0
+  const totalFocusMinutes = focus?.total_focus_minutes ?? 0
+  const chartData = (focus?.daily ?? []).map((day) => {
+    const [year, month, dayOfMonth] = day.date.split('-').map(Number)
+    return {
+      date: new Date(year, month - 1, dayOfMonth).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
+      sessions: day.sessions,
+      minutes: day.focus_minutes,
+    }
   })
 
   if (loading) {
@@ -465,7 +468,7 @@ export default function PomodoroPage() {
         <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
           <div className="bg-white rounded-lg shadow-md p-6 border border-gray-200">
             <div className="text-text-secondary text-sm font-medium mb-1">Total Sessions</div>
-            <div className="text-3xl font-bold text-text">{completedPomodoros.length}</div>
+            <div className="text-3xl font-bold text-text">{totalSessions}</div>
           </div>
           <div className="bg-white rounded-lg shadow-md p-6 border border-gray-200">
             <div className="text-text-secondary text-sm font-medium mb-1">Total Focus Time</div>
@@ -474,9 +477,7 @@ export default function PomodoroPage() {
           <div className="bg-white rounded-lg shadow-md p-6 border border-gray-200">
             <div className="text-text-secondary text-sm font-medium mb-1">Average Session</div>
             <div className="text-3xl font-bold text-text">
-              {completedPomodoros.length > 0
-                ? Math.round(totalFocusMinutes / completedPomodoros.length)
-                : 0}{' '}
+              {totalSessions > 0 ? Math.round(totalFocusMinutes / totalSessions) : 0}{' '}
               min
             </div>
           </div>
@@ -558,6 +559,7 @@ export default function PomodoroPage() {
           ) : (
             <div className="text-center py-8 text-text-secondary">No sessions yet. Start your first Pomodoro!</div>
           )}
+          {nextCursor && <LoadMoreButton onLoadMore={loadMorePomodoros} />}
         </div>
       </div>
     </Layout>
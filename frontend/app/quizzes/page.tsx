@@ -5,12 +5,14 @@ import { useRouter, useSearchParams } from 'next/navigation'
 import { useAuthStore } from '@/store/authStore'
 import { quizzesAPI, classesAPI, Quiz, Class, Question } from '@/lib/api'
 import Layout from '@/components/Layout'
+import LoadMoreButton from '@/components/LoadMoreButton'
 
 export default function QuizzesPage() {
   const router = useRouter()
   const searchParams = useSearchParams()
   const { isAuthenticated } = useAuthStore()
   const [quizzes, setQuizzes] = useState<Quiz[]>([])
+  const [nextCursor, setNextCursor] = useState<string | undefined>()
   const [classes, setClasses] = useState<Class[]>([])
   const [loading, setLoading] = useState(true)
   const [generating, setGenerating] = useState(false)
@@ -44,9 +46,10 @@ export default function QuizzesPage() {
 
   const loadData = async () => {
     try {
-      const [quizzesData, classesData] = await Promise.all([quizzesAPI.getAll(), classesAPI.getAll()])
-      setQuizzes(quizzesData)
-      setClasses(classesData)
+      const [quizzesPage, classesPage] = await Promise.all([quizzesAPI.getPage(), classesAPI.getPage()])
+      setQuizzes(quizzesPage.items)
+      setNextCursor(quizzesPage.nextCursor)
+      setClasses(classesPage.items)
     } catch (error) {
       console.error('Failed to load data:', error)
     } finally {
@@ -56,8 +59,19 @@ export default function QuizzesPage() {
 
   const loadQuizzes = async (classId?: number) => {
     try {
-      const data = await quizzesAPI.getAll(classId)
-      setQuizzes(data)
+      const page = await quizzesAPI.getPage(classId)
+      setQuizzes(page.items)
+      setNextCursor(page.nextCursor)
+    } catch (error) {
+      console.error('Failed to load quizzes:', error)
+    }
+  }
+
+  const loadMoreQuizzes = async () => {
+    try {
+      const page = await quizzesAPI.getPage(selectedClassId ?? undefined, nextCursor)
+      setQuizzes((current) => [...current, ...page.items])
+      setNextCursor(page.nextCursor)
     } catch (error) {
       console.error('Failed to load quizzes:', error)
     }
@@ -227,6 +241,7 @@ export default function QuizzesPage() {
                 </p>
               </div>
             )}
+            {nextCursor && <LoadMoreButton onLoadMore={loadMoreQuizzes} />}
           </div>
         ) : (
           <div className="bg-white rounded-lg shadow-md p-6 border border-gray-200">
@@ -27,6 +27,9 @@ export default function RegisterPage() {
       // Store token first so getCurrentUser can use it
       if (typeof window !== 'undefined') {
         localStorage.setItem('token', response.access_token)
+        if (response.refresh_token) {
+          localStorage.setItem('refresh_token', response.refresh_token)
+        }
       }
       const userResponse = await authAPI.getCurrentUser()
       setAuth(userResponse, response.access_token)
@@ -35,6 +38,7 @@ export default function RegisterPage() {
       setError(err.response?.data?.detail || 'Registration failed')
       if (typeof window !== 'undefined') {
         localStorage.removeItem('token')
+        localStorage.removeItem('refresh_token')
       }
     } finally {
       setLoading(false)
@@ -5,11 +5,13 @@ import { useRouter } from 'next/navigation'
 import { useAuthStore } from '@/store/authStore'
 import { scheduleAPI, classesAPI, StudySchedule, Class } from '@/lib/api'
 import Layout from '@/components/Layout'
+import LoadMoreButton from '@/components/LoadMoreButton'
 
 export default function SchedulePage() {
   const router = useRouter()
   const { isAuthenticated } = useAuthStore()
   const [schedules, setSchedules] = useState<StudySchedule[]>([])
+  const [nextCursor, setNextCursor] = useState<string | undefined>()
   const [classes, setClasses] = useState<Class[]>([])
   const [loading, setLoading] = useState(true)
   const [generating, setGenerating] = useState(false)
@@ -24,12 +26,13 @@ export default function SchedulePage() {
 
   const loadData = async () => {
     try {
-      const [schedulesData, classesData] = await Promise.all([
-        scheduleAPI.getAll(),
-        classesAPI.getAll(),
+      const [schedulesPage, classesPage] = await Promise.all([
+        scheduleAPI.getPage(),
+        classesAPI.getPage(),
       ])
-      setSchedules(schedulesData)
-      setClasses(classesData)
+      setSchedules(schedulesPage.items)
+      setNextCursor(schedulesPage.nextCursor)
+      setClasses(classesPage.items)
     } catch (error) {
       console.error('Failed to load data:', error)
     } finally {
@@ -37,6 +40,16 @@ export default function SchedulePage() {
     }
   }
 
+  const loadMoreSchedules = async () => {
+    try {
+      const page = await scheduleAPI.getPage(nextCursor)
+      setSchedules((current) => [...current, ...page.items])
+      setNextCursor(page.nextCursor)
+    } catch (error) {
+      console.error('Failed to load schedules:', error)
+    }
+  }
+
   const handleGenerateRecommendations = async () => {
     if (classes.length === 0) {
       alert('Please add classes first to generate schedule recommendations')
@@ -208,6 +221,7 @@ export default function SchedulePage() {
             ))}
           </div>
         )}
+        {nextCursor && <LoadMoreButton onLoadMore={loadMoreSchedules} />}
       </div>
     </Layout>
   )
@@ -7,11 +7,13 @@ import { useAuthStore } from '@/store/authStore'
 import { useTaskStore } from '@/store/taskStore'
 import { Task } from '@/lib/api'
 import Layout from '@/components/Layout'
+import LoadMoreButton from '@/components/LoadMoreButton'
 
 export default function TasksPage() {
   const router = useRouter()
   const { isAuthenticated } = useAuthStore()
-  const { tasks, loading, fetchTasks, addTask, updateTask, deleteTask, reorderTasks } = useTaskStore()
+  const { tasks, nextCursor, loading, fetchTasks, fetchMoreTasks, addTask, updateTask, deleteTask, reorderTasks } =
+    useTaskStore()
   const [showModal, setShowModal] = useState(false)
   const [editingTask, setEditingTask] = useState<Task | null>(null)
   const [formData, setFormData] = useState({
@@ -238,6 +240,7 @@ export default function TasksPage() {
               No active tasks. Create one to get started!
             </div>
           )}
+          {nextCursor && <LoadMoreButton onLoadMore={fetchMoreTasks} />}
         </div>
 
         {/* Completed Tasks */}
@@ -1,6 +1,6 @@
 'use client'
 
-import { useGoogleLogin } from '@react-oauth/google'
+import { GoogleLogin, CredentialResponse } from '@react-oauth/google'
 import { useState, useEffect } from 'react'
 import { useRouter } from 'next/navigation'
 import { useAuthStore } from '@/store/authStore'
@@ -25,73 +25,66 @@ export default function GoogleLoginButton({ onError }: GoogleLoginButtonProps) {
     setClientId(envClientId)
   }, [])
 
-  const googleLogin = useGoogleLogin({
-    onSuccess: async (tokenResponse) => {
-      if (!enabled || !clientId) {
-        if (onError) onError('Google sign-in is not configured')
-        return
-      }
-      setLoading(true)
-      try {
-        const response = await authAPI.googleSignIn(tokenResponse.access_token)
-        // Store token first so getCurrentUser can use it
-        if (typeof window !== 'undefined') {
-          localStorage.setItem('token', response.access_token)
-        }
-        const userResponse = await authAPI.getCurrentUser()
-        setAuth(userResponse, response.access_token)
-        router.push('/dashboard')
-      } catch (err: any) {
-        const errorMsg = err.response?.data?.detail || 'Google sign-in failed'
-        if (onError) onError(errorMsg)
-        if (typeof window !== 'undefined') {
-          localStorage.removeItem('token')
+  // The credential flow returns a signed ID token, which the backend verifies
+  // locally instead of calling Google's userinfo endpoint
+  const handleCredential = async (credentialResponse: CredentialResponse) => {
+    if (!credentialResponse.credential) {
+      if (onError) onError('Google sign-in failed. Please try again.')
+      return
+    }
+    setLoading(true)
+    try {
+      const response = await authAPI.googleSignIn(credentialResponse.credential)
+      // Store token first so getCurrentUser can use it
+      if (typeof window !== 'undefined') {
+        localStorage.setItem('token', response.access_token)
+        if (response.refresh_token) {
+          localStorage.setItem('refresh_token', response.refresh_token)
         }
-      } finally {
-        setLoading(false)
       }
-    },
-    onError: (error) => {
-      console.error('Google login error:', error)
-      setLoading(false)
-      if (onError) {
-        if (!enabled || !clientId) {
-          onError('Google sign-in is not configured. Please set NEXT_PUBLIC_GOOGLE_CLIENT_ID in your frontend/.env.local file and restart the server.')
-        } else {
-          onError('Google sign-in failed. Please try again.')
-        }
+      const userResponse = await authAPI.getCurrentUser()
+      setAuth(userResponse, response.access_token)
+      router.push('/dashboard')
+    } catch (err: any) {
+      const errorMsg = err.response?.data?.detail || 'Google sign-in failed'
+      if (onError) onError(errorMsg)
+      if (typeof window !== 'undefined') {
+        localStorage.removeItem('token')
+        localStorage.removeItem('refresh_token')
       }
-    },
-  })
+    } finally {
+      setLoading(false)
+    }
+  }
 
   const handleClick = () => {
-    if (loading) return
-
-    if (!enabled || !clientId) {
-      if (onError) {
-        onError('Google sign-in is not configured. Please add NEXT_PUBLIC_GOOGLE_CLIENT_ID to your frontend/.env.local file and restart the development server.')
-      }
-      return
-    }
-    
-    try {
-      googleLogin()
-    } catch (error) {
-      console.error('Error initiating Google login:', error)
-      setLoading(false)
-      if (onError) {
-        onError('Failed to start Google sign-in. Please check your configuration and try again.')
-      }
+    if (onError) {
+      onError('Google sign-in is not configured. Please add NEXT_PUBLIC_GOOGLE_CLIENT_ID to your frontend/.env.local file and restart the development server.')
     }
   }
 
+  if (enabled && clientId) {
+    return (
+      <div className={`w-full flex justify-center ${loading ? 'opacity-50 pointer-events-none' : ''}`}>
+        <GoogleLogin
+          onSuccess={handleCredential}
+          onError={() => {
+            console.error('Google login error')
+            if (onError) onError('Google sign-in failed. Please try again.')
+          }}
+          text="signin_with"
+          width="320"
+        />
+      </div>
+    )
+  }
+
   return (
     <button
       type="button"
       onClick={handleClick}
-      disabled={loading}
       className="w-full bg-white border border-gray-300 hover:bg-gray-50 text-text font-semibold py-2 px-4 rounded-md transition-colors flex items-center justify-center space-x-2 disabled:opacity-50 disabled:cursor-not-allowed"
-      title={!enabled ? 'Google sign-in is not configured. Click to see instructions.' : 'Sign in with Google'}
+      title="Google sign-in is not configured. Click to see instructions."
     >
       <svg className="w-5 h-5" viewBox="0 0 24 24">
         <path
@@ -111,7 +104,7 @@ export default function GoogleLoginButton({ onError }: GoogleLoginButtonProps) {
           d="M12 5.38c1.62 0 3.06.56 4.21 1.64l3.15-3.15C17.45 2.09 14.97 1 12 1 7.7 1 3.99 3.47 2.18 7.07l3.66 2.84c.87-2.6 3.3-4.53 6.16-4.53z"
         />
       </svg>
-      <span>{loading ? 'Signing in...' : 'Sign in with Google'}</span>
+      <span>Sign in with Google</span>
     </button>
   )
 }
@@ -29,8 +29,8 @@ export default function Layout({ children }: { children: React.ReactNode }) {
     return <>{children}</>
   }
 
-  const handleLogout = () => {
-    logout()
+  const handleLogout = async () => {
+    await logout()
     router.push('/login')
   }
 
@@ -0,0 +1,32 @@
+'use client'
+
+import { useState } from 'react'
+
+interface LoadMoreButtonProps {
+  onLoadMore: () => Promise<void>
+}
+
+// Shown under a paged list while the server has more rows to give
+export default function LoadMoreButton({ onLoadMore }: LoadMoreButtonProps) {
+  const [loading, setLoading] = useState(false)
+
+  const handleClick = async () => {
+    setLoading(true)
+    try {
+      await onLoadMore()
+    } finally {
+      setLoading(false)
+    }
+  }
+
+  return (
+    <button
+      type="button"
+      onClick={handleClick}
+      disabled={loading}
+      className="w-full mt-4 px-4 py-2 bg-gray-200 hover:bg-gray-300 text-text font-semibold rounded-md transition-colors disabled:opacity-50"
+    >
+      {loading ? 'Loading...' : 'Load more'}
+    </button>
+  )
+}
@@ -21,20 +21,62 @@ api.interceptors.request.use((config) => {
   return config
 })
 
-// Handle 401 errors (unauthorized)
+// Concurrent 401s share a single refresh call
+let refreshPromise: Promise<string | null> | null = null
+
+const refreshAccessToken = (): Promise<string | null> => {
+  const refreshToken = localStorage.getItem('refresh_token')
+  if (!refreshToken) return Promise.resolve(null)
+  if (!refreshPromise) {
+    refreshPromise = axios
+      .post(`${API_URL}/users/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        localStorage.setItem('token', response.data.access_token)
+        localStorage.setItem('refresh_token', response.data.refresh_token)
+        return response.data.access_token as string
+      })
+      .catch(() => null)
+      .finally(() => {
+        refreshPromise = null
+      })
+  }
+  return refreshPromise
+}
+
+// Handle 401 errors (unauthorized): refresh once, then send the user to login
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      if (typeof window !== 'undefined') {
-        localStorage.removeItem('token')
-        window.location.href = '/login'
+  async (error) => {
+    const original = error.config
+    if (error.response?.status === 401 && typeof window !== 'undefined') {
+      if (original && !original._retried) {
+        original._retried = true
+        const token = await refreshAccessToken()
+        if (token) {
+          original.headers.Authorization = `Bearer ${token}`
+          return api(original)
+        }
       }
+      localStorage.removeItem('token')
+      localStorage.removeItem('refresh_token')
+      window.location.href = '/login'
     }
     return Promise.reject(error)
   }
 )
 
+// List endpoints return one page at a time and put the next page's cursor in
+// the X-Next-Cursor header; views ask for the next page when they need it
+export interface Page<T> {
+  items: T[]
+  nextCursor?: string
+}
+
+const getPage = async <T>(url: string, params: Record<string, any> = {}, cursor?: string): Promise<Page<T>> => {
+  const response = await api.get(url, { params: { ...params, cursor } })
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] || undefined }
+}
+
 export interface Task {
   id: number
   title: string
@@ -89,21 +131,23 @@ export const authAPI = {
     const response = await api.post('/users/login', { email, password })
     return response.data
   },
-  googleSignIn: async (token: string) => {
-    const response = await api.post('/users/google-signin', { token })
+  googleSignIn: async (idToken: string) => {
+    const response = await api.post('/users/google-signin', { id_token: idToken })
     return response.data
   },
   getCurrentUser: async () => {
     const response = await api.get('/users/me')
     return response.data
   },
+  logout: async (refreshToken: string) => {
+    await api.post('/users/logout', { refresh_token: refreshToken })
+  },
 }
 
 // Tasks API
 export const tasksAPI = {
-  getAll: async (): Promise<Task[]> => {
-    const response = await api.get('/tasks/')
-    return response.data
+  getPage: async (cursor?: string): Promise<Page<Task>> => {
+    return getPage<Task>('/tasks/', {}, cursor)
   },
   getById: async (id: number): Promise<Task> => {
     const response = await api.get(`/tasks/${id}`)
@@ -127,9 +171,8 @@ export const tasksAPI = {
 
 // Pomodoro API
 export const pomodoroAPI = {
-  getAll: async (): Promise<Pomodoro[]> => {
-    const response = await api.get('/pomodoro/')
-    return response.data
+  getPage: async (cursor?: string): Promise<Page<Pomodoro>> => {
+    return getPage<Pomodoro>('/pomodoro/', {}, cursor)
   },
   getById: async (id: number): Promise<Pomodoro> => {
     const response = await api.get(`/pomodoro/${id}`)
@@ -150,9 +193,8 @@ export const pomodoroAPI = {
 
 // Notes API
 export const notesAPI = {
-  getAll: async (): Promise<Note[]> => {
-    const response = await api.get('/notes/')
-    return response.data
+  getPage: async (cursor?: string): Promise<Page<Note>> => {
+    return getPage<Note>('/notes/', {}, cursor)
   },
   getById: async (id: number): Promise<Note> => {
     const response = await api.get(`/notes/${id}`)
@@ -222,6 +264,18 @@ export interface Quiz {
   updated_at?: string
 }
 
+export interface QuizJob {
+  id: number
+  class_id: number
+  num_questions: number
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled'
+  quiz_id?: number
+  error?: string
+  created_at: string
+  started_at?: string
+  finished_at?: string
+}
+
 export interface StudySchedule {
   id: number
   user_id: number
@@ -244,6 +298,19 @@ export interface Analytics {
   recommendations: string[]
 }
 
+export interface DailyFocus {
+  date: string
+  sessions: number
+  focus_minutes: number
+}
+
+export interface FocusSummary {
+  total_sessions: number
+  total_focus_minutes: number
+  streak_days: number
+  daily: DailyFocus[]
+}
+
 // Settings API
 export const settingsAPI = {
   get: async (): Promise<UserSettings> => {
@@ -262,9 +329,8 @@ export const settingsAPI = {
 
 // Classes API
 export const classesAPI = {
-  getAll: async (): Promise<Class[]> => {
-    const response = await api.get('/classes/')
-    return response.data
+  getPage: async (cursor?: string): Promise<Page<Class>> => {
+    return getPage<Class>('/classes/', {}, cursor)
   },
   getById: async (id: number): Promise<Class> => {
     const response = await api.get(`/classes/${id}`)
@@ -285,10 +351,9 @@ export const classesAPI = {
 
 // Quizzes API
 export const quizzesAPI = {
-  getAll: async (classId?: number): Promise<Quiz[]> => {
+  getPage: async (classId?: number, cursor?: string): Promise<Page<Quiz>> => {
     const params = classId ? { class_id: classId } : {}
-    const response = await api.get('/quizzes/', { params })
-    return response.data
+    return getPage<Quiz>('/quizzes/', params, cursor)
   },
   getById: async (id: number): Promise<Quiz> => {
     const response = await api.get(`/quizzes/${id}`)
@@ -298,10 +363,29 @@ export const quizzesAPI = {
     const response = await api.post('/quizzes/', quiz)
     return response.data
   },
+  // Generation runs as a background job; poll it until the quiz is stored
   generate: async (classId: number, numQuestions: number = 5): Promise<Quiz> => {
-    const response = await api.post('/quizzes/generate', null, {
-      params: { class_id: classId, num_questions: numQuestions },
-    })
+    const response = await api.post('/quizzes/generate', { class_id: classId, num_questions: numQuestions })
+    let job: QuizJob = response.data
+    const deadline = Date.now() + 5 * 60 * 1000
+    while (job.status === 'queued' || job.status === 'running') {
+      if (Date.now() > deadline) {
+        throw new Error('Quiz generation timed out')
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000))
+      job = await quizzesAPI.getJob(job.id)
+    }
+    if (job.status !== 'succeeded' || !job.quiz_id) {
+      throw new Error(job.error || `Quiz generation ${job.status}`)
+    }
+    return quizzesAPI.getById(job.quiz_id)
+  },
+  getJob: async (jobId: number): Promise<QuizJob> => {
+    const response = await api.get(`/quizzes/jobs/${jobId}`)
+    return response.data
+  },
+  cancelJob: async (jobId: number): Promise<QuizJob> => {
+    const response = await api.post(`/quizzes/jobs/${jobId}/cancel`)
     return response.data
   },
   update: async (id: number, quiz: Partial<Quiz>): Promise<Quiz> => {
@@ -319,9 +403,8 @@ export const scheduleAPI = {
     const response = await api.get('/schedule/recommendations')
     return response.data
   },
-  getAll: async (): Promise<StudySchedule[]> => {
-    const response = await api.get('/schedule/')
-    return response.data
+  getPage: async (cursor?: string): Promise<Page<StudySchedule>> => {
+    return getPage<StudySchedule>('/schedule/', {}, cursor)
   },
   create: async (schedule: Partial<StudySchedule>): Promise<StudySchedule> => {
     const response = await api.post('/schedule/', schedule)
@@ -338,5 +421,11 @@ export const analyticsAPI = {
     const response = await api.get('/analytics/')
     return response.data
   },
+  getFocus: async (days = 7): Promise<FocusSummary> => {
+    const response = await api.get('/analytics/focus', {
+      params: { days, tz_offset_minutes: -new Date().getTimezoneOffset() },
+    })
+    return response.data
+  },
 }
 
@@ -1,5 +1,6 @@
 import { create } from 'zustand'
 import { persist } from 'zustand/middleware'
+import { authAPI } from '@/lib/api'
 
 interface User {
   id: number
@@ -11,7 +12,7 @@ interface AuthState {
   user: User | null
   token: string | null
   setAuth: (user: User, token: string) => void
-  logout: () => void
+  logout: () => Promise<void>
   isAuthenticated: () => boolean
 }
 
@@ -26,9 +27,19 @@ export const useAuthStore = create<AuthState>()(
         }
         set({ user, token })
       },
-      logout: () => {
+      logout: async () => {
         if (typeof window !== 'undefined') {
+          // Revoke the refresh token server-side so it can't be used again
+          const refreshToken = localStorage.getItem('refresh_token')
+          if (refreshToken) {
+            try {
+              await authAPI.logout(refreshToken)
+            } catch (error) {
+              console.error('Logout request failed:', error)
+            }
+          }
           localStorage.removeItem('token')
+          localStorage.removeItem('refresh_token')
         }
         set({ user: null, token: null })
       },
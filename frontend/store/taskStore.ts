@@ -3,9 +3,11 @@ import { Task, tasksAPI } from '@/lib/api'
 
 interface TaskState {
   tasks: Task[]
+  nextCursor?: string
   loading: boolean
   error: string | null
   fetchTasks: () => Promise<void>
+  fetchMoreTasks: () => Promise<void>
   addTask: (task: Partial<Task>) => Promise<void>
   updateTask: (id: number, task: Partial<Task>) => Promise<void>
   deleteTask: (id: number) => Promise<void>
@@ -19,12 +21,20 @@ export const useTaskStore = create<TaskState>((set, get) => ({
   fetchTasks: async () => {
     set({ loading: true, error: null })
     try {
-      const tasks = await tasksAPI.getAll()
-      set({ tasks, loading: false })
+      const page = await tasksAPI.getPage()
+      set({ tasks: page.items, nextCursor: page.nextCursor, loading: false })
     } catch (error: any) {
       set({ error: error.message, loading: false })
     }
   },
+  fetchMoreTasks: async () => {
+    try {
+      const page = await tasksAPI.getPage(get().nextCursor)
+      set((state) => ({ tasks: [...state.tasks, ...page.items], nextCursor: page.nextCursor }))
+    } catch (error: any) {
+      set({ error: error.message })
+    }
+  },
   addTask: async (task) => {
     try {
       const newTask = await tasksAPI.create(task)